@@ -0,0 +1,92 @@
+import pygame, os
+
+def surface_bytes(s: pygame.Surface) -> int:
+    """Memory of the pixels of a surface."""
+    return s.get_pitch()*s.get_height()
+
+class asset_manager:
+    def __init__(self):
+        """**Loads every asset file once and hands out the same surface to everyone who asks for it.**\n
+
+        Paths are made absolute before they are used as keys, so "vehicles/car/default.png" and an absolute path to the same file share one surface,
+        and nothing depends on the current working directory. As soon as a display exists, surfaces are converted to its pixel format
+        (```convert_alpha```), otherwise every blit would convert them again. Surfaces loaded before the display was created are converted on their next request.
+
+        Besides files, objects built out of them (like a ```texture``` with baked rotations) can be shared with ```shared```.
+        """
+        self._images = {} # absolute path: [surface, converted]
+        self._shared = {} # key: object
+        self.loads = 0 # files loaded from disk
+        self.hits = 0 # requests answered with an already loaded file
+
+    @staticmethod
+    def path(*parts: str) -> str:
+        """Absolute path out of path parts, without changing the working directory."""
+        return os.path.abspath(os.path.join(*parts))
+
+    def image(self, path: str) -> pygame.Surface:
+        """Returns the surface of an image file, loaded and converted only once. Dont draw on it, it is shared.
+
+        Args:
+            path (str): filepath of the image, relative to the working directory or absolute
+
+        Returns:
+            pygame.Surface: the shared surface
+        """
+        path = self.path(path)
+        entry = self._images.get(path)
+        if entry is None:
+            entry = self._images[path] = [pygame.image.load(path), False]
+            self.loads += 1
+        else:
+            self.hits += 1
+        if not entry[1] and pygame.display.get_surface() is not None:
+            entry[0] = entry[0].convert_alpha()
+            entry[1] = True
+        return entry[0]
+
+    def add(self, path: str, surface: pygame.Surface):
+        """Registers an already loaded surface (e.g. out of a session bundle) for a file, later requests of that file get it without loading."""
+        self._images[self.path(path)] = [surface, False]
+
+    def images(self, paths: dict, folder = "") -> dict:
+        """```image``` for every value of a dict, like ```{"default": "default.png"}```, with paths relative to ```folder```."""
+        return {name: self.image(os.path.join(folder, path)) for name, path in paths.items()}
+
+    def shared(self, key, make):
+        """Returns the object saved under key, or makes it with ```make()``` the first time.
+
+        Args:
+            key (hashable): what the object is made of, e.g. ```("texture", folder, sheet size)```
+            make (callable): builds the object when it doesnt exist yet
+        """
+        o = self._shared.get(key)
+        if o is None:
+            o = self._shared[key] = make()
+        return o
+
+    def memory(self) -> dict:
+        """Memory of the loaded assets.
+
+        Returns:
+            dict: ```{"files", "file_bytes", "shared", "shared_bytes"}```, shared bytes count objects with a ```memory()``` method (like ```texture```)
+        """
+        return {
+            "files": len(self._images),
+            "file_bytes": sum(surface_bytes(i[0]) for i in self._images.values()),
+            "shared": len(self._shared),
+            "shared_bytes": sum(i.memory() for i in self._shared.values() if hasattr(i, "memory")),
+        }
+
+    def report(self) -> str:
+        m = self.memory()
+        return (str(m["files"])+" files ("+str(round(m["file_bytes"]/2**20, 1))+" MiB), "+str(m["shared"])+" shared objects ("
+                +str(round(m["shared_bytes"]/2**20, 1))+" MiB), "+str(self.loads)+" loads, "+str(self.hits)+" reused")
+
+    def clear(self):
+        """Forgets every asset, surfaces still in use stay alive where they are used."""
+        self._images.clear()
+        self._shared.clear()
+
+# assets of the whole program
+assets = asset_manager()
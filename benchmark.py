@@ -0,0 +1,168 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window needed
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from simulation import simulation, load_configs
+from world import world
+from physics import physics, move_direction
+from render import render, vehicle, map
+import argparse, platform, statistics, json, time, sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MAP_BENCHMARKS = ("map.update", "render.render") # the only ones that depend on the map, run on every map
+
+def map_names() -> list[str]:
+    """Every map in maps/ (folders with a map.json)."""
+    return sorted(i for i in os.listdir(ROOT+"/maps") if os.path.exists(ROOT+"/maps/"+i+"/map.json"))
+
+def measure(f, number: int, repeat: int) -> list[float]:
+    """Calls f ```number``` times per run, for ```repeat``` runs.
+
+    Returns:
+        list[float]: operations per second of every run
+    """
+    f() # warm up (caches, lazy loading)
+    runs = []
+    for r in range(repeat):
+        start = time.perf_counter()
+        for i in range(number):
+            f()
+        runs.append(number/(time.perf_counter()-start))
+    return runs
+
+def benchmarks(map_name: str) -> dict:
+    """Sets up every hot path and returns them as ```{name: (function, number)}```."""
+    configs = load_configs(ROOT)
+    configs["session"]["map"] = map_name
+    with open(ROOT+"/maps/"+map_name+"/map.json", "r") as f:
+        configs["map"] = json.load(f)
+        f.close()
+    mapdata = configs["map"]
+    binds = configs["config"]["binds"]
+
+    sim = simulation(configs)
+    motor = sim.motor
+    motor.throttle = 1
+    throttle = {i: i in ("throttle_100", "left_50") for i in binds.keys()}
+
+    display = render(tuple(configs["config"]["resolution"]))
+    m = map(display.size, ROOT+"/maps/"+map_name+"/"+mapdata["texture"], mapdata["size"], mapdata["chunksize"])
+    car = vehicle(display.size, ROOT+"/vehicles/"+configs["session"]["vehicle"], [0, 0], 0, rotation_sheet = 360)
+    display.add_object("map", m)
+    display.add_object("main", car)
+    cars = world(configs, 500)
+    cars.throttle[:] = 1
+    cars.steer[:] = [i/250-1 for i in range(500)]
+    tires = configs["tires"][configs["session"]["tires"]]
+    integrators = {i: physics(configs["vehicle"], tires, i) for i in (1, 4, 16)}
+    display.cam_zoom = sim.defaultzoom
+    scale = (display.size[0]/(display.cam_zoom*display.ratio), display.size[1]/display.cam_zoom)
+    car_size = (car.size[0]*scale[0], car.size[1]*scale[1])
+
+    # values that change every call, like they do while driving
+    state = {"x": 0.0, "rotation": 0.0}
+    def point_at_graph():
+        state["x"] = (state["x"]+37.3) % 6600
+        motor._point_at_graph(state["x"])
+    def point_at_graph_exact():
+        motor.exact = True
+        point_at_graph()
+        motor.exact = False
+    def move():
+        state["rotation"] = (state["rotation"]+0.5) % 360
+        move_direction([0, 0], state["rotation"], 0.3)
+    def physics_step(p: physics):
+        # the vehicle keeps driving circles, so speed and heading change every call
+        return lambda: p.step(0.01, 250, 6000, 1, 0, 0.3)
+    def map_update():
+        state["x"] = (state["x"]+0.3) % 100
+        m.update((display.cam_zoom*display.ratio, display.cam_zoom), (state["x"], 0), scale)
+    def obj_update():
+        car.rotation = state["rotation"] = (state["rotation"]+0.5) % 360
+        car.update((display.size[0]/2, display.size[1]/2), car_size)
+    def render_frame():
+        sim.step(throttle)
+        car.pos, car.rotation = sim.pos, sim.rotation
+        display.cam_pos, display.cam_zoom = sim.cam_pos, sim.cam_zoom
+        display.render()
+
+    return {
+        "engine._point_at_graph": (point_at_graph, 20000),
+        "engine._point_at_graph (exact)": (point_at_graph_exact, 20000),
+        "engine.update_revs": (lambda: motor.update_revs(0.9), 20000),
+        "move_direction": (move, 20000),
+        "simulation.step": (lambda: sim.step(throttle), 20000),
+        "physics.step (1 substep)": (physics_step(integrators[1]), 20000),
+        "physics.step (4 substeps)": (physics_step(integrators[4]), 20000),
+        "physics.step (16 substeps)": (physics_step(integrators[16]), 5000),
+        "world.step (500 cars)": (cars.step, 2000),
+        "map.update": (map_update, 50),
+        "obj.update": (obj_update, 2000),
+        "render.render": (render_frame, 30),
+    }
+
+def run(map_names: list, repeat: int, only = None) -> dict:
+    """Runs the benchmarks on every map. Benchmarks that dont depend on the map run only once,
+    the others are named after the map, like ```map.update (track2)```."""
+    results = {}
+    for n, map_name in enumerate(map_names):
+        for name, (f, number) in benchmarks(map_name).items():
+            if only and only not in name: continue
+            if name in MAP_BENCHMARKS:
+                name += " ("+map_name+")"
+            elif n:
+                continue
+            runs = measure(f, number, repeat)
+            results[name] = {
+                "mean": statistics.mean(runs),
+                "stdev": statistics.stdev(runs) if len(runs) > 1 else 0,
+                "runs": runs,
+            }
+            print(name.ljust(32)+str(round(results[name]["mean"])).rjust(12)+" ops/s  +- "+str(round(100*results[name]["stdev"]/results[name]["mean"], 1))+"%")
+    return {
+        "meta": {"maps": list(map_names), "repeat": repeat, "python": platform.python_version(), "machine": platform.machine(), "time": time.time()},
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Finds benchmarks that got slower than the baseline.
+
+    A benchmark counts as regression when its mean ops/sec dropped by more than ```threshold``` (0.1 = 10%)
+    and by more than two standard deviations of both runs together, so noise alone doesnt flag it.
+
+    Returns:
+        list[str]: names of regressed benchmarks
+    """
+    regressions = []
+    for name, now in current["results"].items():
+        if name not in baseline["results"]: continue
+        base = baseline["results"][name]
+        change = now["mean"]/base["mean"]-1
+        noise = 2*(now["stdev"]**2+base["stdev"]**2)**0.5
+        flag = change < -threshold and base["mean"]-now["mean"] > noise
+        print(name.ljust(32)+(("+" if change >= 0 else "")+str(round(change*100, 1))+"%").rjust(9)+("  REGRESSION" if flag else ""))
+        if flag: regressions.append(name)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the hot paths, without a window.")
+    parser.add_argument("--map", action="append", help="map to benchmark on, can be given more than once. Defaults to every map in maps/.")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark. Defaults to 5.")
+    parser.add_argument("--only", help="only run benchmarks containing this text")
+    parser.add_argument("--save", help="save results as json")
+    parser.add_argument("--compare", help="json of an earlier run to compare against, exits with 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown that counts as regression, 0.1 = 10%%. Defaults to 0.1.")
+    args = parser.parse_args()
+
+    result = run(args.map or map_names(), args.repeat, args.only)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=4)
+            f.close()
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+            f.close()
+        print("\ncompared to "+args.compare)
+        if compare(result, baseline, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,203 @@
+from simulation import load_configs
+from engine import torque_table
+from render import map
+from assets import assets
+from array import array
+import pygame, json, mmap, os, struct, time
+
+MAGIC = b"SVSBNDL1"
+VERSION = 1
+ALIGN = 64 # every buffer starts at a multiple of this, relative to the data section
+FORMAT = "BGRA" # byte order of 32 bit SRCALPHA surfaces on little endian machines, surfaces are wrapped without converting
+
+def sources(configs: dict) -> list[str]:
+    """Files a session is made of, relative to the root folder. When one of them changes, the bundle is baked again."""
+    vehicle = "vehicles/"+configs["session"]["vehicle"]
+    folder = "maps/"+configs["session"]["map"]
+    files = ["config.json", "session.json", "vehicles/engines.json", "vehicles/transmissions.json", "vehicles/tires.json", vehicle+"/vehicle.json", folder+"/map.json"]
+    files += [vehicle+"/"+i for i in configs["vehicle"]["textures"].values()]
+    if not configs["map"].get("streamed"):
+        files.append(folder+"/"+configs["map"]["texture"])
+    return files
+
+class session_bundle:
+    def __init__(self, path: str):
+        """**Everything a session loads at startup, baked into one file that is mapped into memory.**\n
+
+        Starting a session normally parses seven json files, decodes the map texture, cuts it into chunks (and mipmaps),
+        decodes the vehicle textures and samples the torque tables. ```bake``` does all of that once and saves the results
+        as raw pixel and table buffers, plus a json header with the resolved configs.
+        Opening a bundle maps the file and wraps surfaces straight around its buffers with ```pygame.image.frombuffer```, nothing gets decoded or copied.
+
+        The header holds the modification time of every source file (see ```sources```), ```open``` bakes the bundle again as soon as one of them changed.
+
+        Layout: ```MAGIC```, header length (uint64), json header, data section. Offsets in the header are relative to the data section.
+
+        Args:
+            path (str): filepath of the bundle
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            f.close()
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(path+" is not a session bundle")
+        length = struct.unpack_from("<Q", self._mmap, len(MAGIC))[0]
+        start = len(MAGIC)+8
+        self.header = json.loads(bytes(self._mmap[start:start+length]))
+        self._data = -(-(start+length)//ALIGN)*ALIGN
+        self.configs = self.header["configs"]
+
+    @classmethod
+    def open(cls, path: str, root = "."):
+        """Opens a bundle, bakes it first if it doesnt exist or a source file changed.
+
+        Args:
+            path (str): filepath of the bundle
+            root (str, optional): folder with config.json, session.json, vehicles/ and maps/. Defaults to ".".
+
+        Returns:
+            session_bundle: the opened bundle, with its textures and torque tables installed (see ```install```)
+        """
+        b = None
+        try:
+            b = cls(path)
+        except (OSError, ValueError):
+            pass
+        if b is None or b.stale(root):
+            b = None # release the old mapping before it is replaced
+            cls.bake(path, root)
+            b = cls(path)
+        b.install(root)
+        return b
+
+    def stale(self, root = ".") -> bool:
+        """True if the bundle was baked by another version or one of its source files changed since."""
+        if self.header.get("version") != VERSION:
+            return True
+        for name, mtime in self.header["sources"].items():
+            try:
+                if os.path.getmtime(os.path.join(root, name)) != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _buffer(self, offset: int, length: int) -> memoryview:
+        return memoryview(self._mmap)[self._data+offset:self._data+offset+length]
+
+    def _surface(self, entry: dict, n = 0) -> pygame.Surface:
+        """n-th surface of a buffer entry ```{"pixels", "offset"}```, surfaces of the same size lie right after each other."""
+        w, h = entry["pixels"]
+        return pygame.image.frombuffer(self._buffer(entry["offset"]+n*w*h*4, w*h*4), (w, h), FORMAT)
+
+    def install(self, root = "."):
+        """Hands the textures to ```assets``` and the torque tables to ```torque_table.compiled```,
+        so vehicles and engines created afterwards take them instead of loading and sampling.
+        """
+        for name, entry in self.header["textures"].items():
+            assets.add(os.path.join(root, name), self._surface(entry))
+        for i in self.header["torque"]:
+            table = array("d")
+            table.frombytes(self._buffer(i["offset"], i["length"]*8))
+            torque_table.compiled[(tuple(i["functions"]), tuple(i["limits"]), i["step"])] = torque_table(i["functions"], i["limits"], i["step"], table.tolist())
+
+    def map(self, win_resolution: tuple):
+        """The map of the session out of the baked chunks and mipmaps.
+
+        Returns:
+            map: the map object, None if the map is streamed or the bundle was baked for another resolution
+        """
+        m = self.header["map"]
+        if m is None or list(win_resolution) != m["resolution"]:
+            return None
+        levels = []
+        for level in m["levels"]:
+            columns, rows = level["chunks"]
+            levels.append([[self._surface(level, y*columns+x) for x in range(columns)] for y in range(rows)])
+        return map.from_levels(win_resolution, levels, m["size"], m["chunksize"])
+
+    @staticmethod
+    def bake(path: str, root = "."):
+        """Loads a session the normal way and saves it as a bundle.
+
+        Args:
+            path (str): filepath to save the bundle to
+            root (str, optional): folder with config.json, session.json, vehicles/ and maps/. Defaults to ".".
+        """
+        configs = load_configs(root)
+        buffers = []
+        size = 0
+        def add(data) -> int:
+            # offset of the data in the data section
+            nonlocal size
+            offset = size
+            buffers.append(data)
+            size += len(data)
+            padding = -size % ALIGN
+            buffers.append(bytes(padding))
+            size += padding
+            return offset
+
+        header = {"version": VERSION, "configs": configs, "map": None, "textures": {}, "torque": []}
+        header["sources"] = {i: os.path.getmtime(os.path.join(root, i)) for i in sources(configs)}
+
+        # map chunks and mipmap levels, every level as one buffer of chunks (row by row)
+        mapdata = configs["map"]
+        if not mapdata.get("streamed"):
+            resolution = configs["config"]["resolution"]
+            m = map(tuple(resolution), os.path.join(root, "maps", configs["session"]["map"], mapdata["texture"]), mapdata["size"], mapdata["chunksize"])
+            header["map"] = {"resolution": resolution, "size": mapdata["size"], "chunksize": mapdata["chunksize"], "levels": []}
+            for level in m.levels:
+                header["map"]["levels"].append({
+                    "pixels": list(level[0][0].get_size()),
+                    "chunks": [len(level[0]), len(level)],
+                    "offset": add(b"".join(pygame.image.tobytes(c, FORMAT) for row in level for c in row)),
+                })
+
+        # vehicle textures
+        vehicle = "vehicles/"+configs["session"]["vehicle"]
+        for i in configs["vehicle"]["textures"].values():
+            s = pygame.image.load(os.path.join(root, vehicle, i))
+            header["textures"][vehicle+"/"+i] = {"pixels": list(s.get_size()), "offset": add(pygame.image.tobytes(s, FORMAT))}
+
+        # torque tables of every engine
+        for e in configs["engines"].values():
+            t = torque_table.shared(e["functions"], e["limits"])
+            header["torque"].append({"functions": t.graphs, "limits": t.limits, "step": t.step, "offset": add(array("d", t.table).tobytes()), "length": len(t.table)})
+
+        encoded = json.dumps(header).encode()
+        start = len(MAGIC)+8+len(encoded)
+        with open(path+".tmp", "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(encoded)))
+            f.write(encoded)
+            f.write(bytes(-start % ALIGN))
+            for i in buffers:
+                f.write(i)
+            f.close()
+        os.replace(path+".tmp", path)
+
+if __name__ == "__main__":
+    # bake the current session and compare opening the bundle with loading everything on its own
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.set_mode((1, 1))
+    t = time.perf_counter()
+    session_bundle.bake("session.bundle")
+    print("baked session.bundle ("+str(round(os.path.getsize("session.bundle")/2**20, 1))+" MiB) in "+str(round((time.perf_counter()-t)*1000))+" ms")
+
+    t = time.perf_counter()
+    b = session_bundle.open("session.bundle")
+    b.map(tuple(b.configs["config"]["resolution"]))
+    print("bundle: "+str(round((time.perf_counter()-t)*1000, 1))+" ms")
+
+    assets.clear()
+    torque_table.compiled.clear()
+    t = time.perf_counter()
+    configs = load_configs()
+    mapdata = configs["map"]
+    if not mapdata.get("streamed"):
+        map(tuple(configs["config"]["resolution"]), "maps/"+configs["session"]["map"]+"/"+mapdata["texture"], mapdata["size"], mapdata["chunksize"])
+    for e in configs["engines"].values():
+        torque_table.shared(e["functions"], e["limits"])
+    print("separate files: "+str(round((time.perf_counter()-t)*1000, 1))+" ms")
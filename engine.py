@@ -1,7 +1,144 @@
-from math import sqrt
+from bisect import bisect_left
+import ast, math, operator
+
+# operators and names a power graph function is allowed to use
+_BINOPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.Mod: operator.mod,
+}
+_UNARYOPS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+_FUNCTIONS = {name: getattr(math, name) for name in ("sqrt", "exp", "log", "sin", "cos", "tan", "atan")}
+_FUNCTIONS["abs"] = abs
+_CONSTANTS = {"pi": math.pi, "e": math.e}
+
+def compile_function(expression: str):
+    """Compiles a graph function string (like ```"(5.25*sqrt(x))-100"```) into a python closure.
+
+    The string is parsed into an AST once and every node is turned into a small closure, so nothing gets evaluated with ```eval()```.
+    Only numbers, the variable ```x```, the basic arithmetic operators and a few math functions (sqrt, exp, log, ...) are allowed.
+    Everything else raises a ```ValueError```.
+
+    Args:
+        expression (str): function with x as the variable
+
+    Returns:
+        callable: function taking x and returning y
+    """
+    def build(node):
+        if isinstance(node, ast.Expression):
+            return build(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            value = node.value
+            return lambda x: value
+        if isinstance(node, ast.Name):
+            if node.id == "x":
+                return lambda x: x
+            if node.id in _CONSTANTS:
+                value = _CONSTANTS[node.id]
+                return lambda x: value
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+            op, left, right = _BINOPS[type(node.op)], build(node.left), build(node.right)
+            return lambda x: op(left(x), right(x))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARYOPS:
+            op, operand = _UNARYOPS[type(node.op)], build(node.operand)
+            return lambda x: op(operand(x))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS and len(node.args) == 1 and not node.keywords:
+            f, arg = _FUNCTIONS[node.func.id], build(node.args[0])
+            return lambda x: f(arg(x))
+        raise ValueError("Unsupported expression in power graph: "+ast.dump(node))
+
+    return build(ast.parse(expression, mode="eval"))
+
+class torque_table:
+    compiled = {} # (functions, limits, step): torque_table, shared by every engine with the same power curve
+
+    def __init__(self, power_graphs: list[str], power_graph_limits: list[float], step = 1, table = None):
+        """Compiled version of a power curve, made out of multiple functions.
+
+        Every function is compiled once with ```compile_function```. On top of that a dense lookup table (LUT) is sampled every ```step``` revs
+        from 0 to the last limit, which is linearly interpolated when reading values out of it.
+        Peak torque and the revs at peak torque are taken from that table.
+
+        Args:
+            power_graphs (list[str]): a collection of functions that create one complex function. function variable is x.
+            power_graph_limits (list[float]): the point where a function i ends.
+            step (int, optional): revs between two samples of the lookup table. Defaults to 1.
+            table (list[float], optional): already sampled lookup table (e.g. out of a session bundle), skips sampling. Defaults to None.
+        """
+        self.graphs = power_graphs
+        self.limits = power_graph_limits
+        self.functions = [compile_function(i) for i in power_graphs]
+        self.max_revs = power_graph_limits[-1]
+
+        # lookup table, sampled with the exact functions
+        self.step = step
+        self._inv_step = 1/step
+        self.size = int(math.ceil(self.max_revs/step))+1
+        self.table = table if table is not None else [self.exact(min(i*step, self.max_revs)) for i in range(self.size)]
+
+        # torque maximum
+        self.peak = max(self.table)
+        self.peak_revs = min(self.table.index(self.peak)*step, self.max_revs)
+
+    @classmethod
+    def shared(cls, power_graphs: list[str], power_graph_limits: list[float], step = 1):
+        """Returns the table of a power curve out of ```compiled```, it is only compiled and sampled the first time.
+
+        Args:
+            power_graphs (list[str]): a collection of functions that create one complex function. function variable is x.
+            power_graph_limits (list[float]): the point where a function i ends.
+            step (int, optional): revs between two samples of the lookup table. Defaults to 1.
+        """
+        key = (tuple(power_graphs), tuple(power_graph_limits), step)
+        t = cls.compiled.get(key)
+        if t is None:
+            t = cls.compiled[key] = cls(list(power_graphs), list(power_graph_limits), step)
+        return t
+
+    def exact(self, x: float) -> float:
+        """Calculates the point x on the function whose limits x is in.
+
+        The right function is found with a binary search over the limits (x <= limit means the function of that limit is used).
+
+        Args:
+            x (float): point on graph
+
+        Returns:
+            float: calculated y value
+        """
+        if x > self.max_revs:
+            x = self.max_revs
+        elif x < 0:
+            x = 0
+        return self.functions[bisect_left(self.limits, x)](x)
+
+    def lookup(self, x: float) -> float:
+        """Reads the point x out of the lookup table, linearly interpolated between the two samples next to it.
+
+        Args:
+            x (float): point on graph
+
+        Returns:
+            float: interpolated y value
+        """
+        if x >= self.max_revs:
+            return self.table[-1]
+        elif x <= 0:
+            return self.table[0]
+        p = x*self._inv_step
+        i = int(p)
+        y = self.table[i]
+        return y+(self.table[i+1]-y)*(p-i)
 
 class engine:
-    def __init__(self, power_graphs: list[str], power_graph_limits: list[float], idle_revs, engine_resistance = 0.9):
+    def __init__(self, power_graphs: list[str], power_graph_limits: list[float], idle_revs, engine_resistance = 0.9, exact = False):
         # graph config
         self._revs_idle = idle_revs
         self._res_eng = engine_resistance # in percentage (0-1) of max revs
@@ -10,11 +147,12 @@ class engine:
         self._graphs_limits = power_graph_limits # the point where a function i ends.
         # the start x value for the next function starts at x > e, e standing for the end of the last function.
         # being in under the limit means x <= e.
+        # compiled functions and lookup table
+        self.curve = torque_table.shared(power_graphs, power_graph_limits)
+        self.exact = exact # True = calculate every point with the compiled functions, False = read from the lookup table
         # torque maximum
-        self._vmax = 0
-        for i in range(self._graphs_limits[-1]):
-            y = self._point_at_graph(i)
-            self._vmax = y if y > self._vmax else self._vmax
+        self._vmax = self.curve.peak
+        self._vmax_revs = self.curve.peak_revs
         
         # real-time values
         self.revs = self._revs_idle
@@ -28,6 +166,7 @@ class engine:
         The power curve is realized as multiple functions that create one big function.
         The functions are seperated (when one function begins and where it ends) by using maximum values.
         This method automatically decided which function to choose to calculate the value.
+        Depending on ```self.exact``` the value is either calculated with the compiled function or read out of the lookup table.
 
         Args:
             x (float): point on graph
@@ -35,13 +174,9 @@ class engine:
         Returns:
             float: calculated y value of one of the functions, where x is in
         """
-        if x > self._graphs_limits[-1]:
-            x = self._graphs_limits[-1]
-        elif x < 0:
-            x = 0
-        # get the function where x is part of the limits
-        f = [i for i in range(len(self._graphs_limits)+1) if x > ([-1]+self._graphs_limits)[i]][-1]
-        return eval(self._graphs[f].replace("x", str(x)))
+        if self.exact:
+            return self.curve.exact(x)
+        return self.curve.lookup(x)
     
     # depricated, this is for rising or falling revs
     def update_revs(self, resistance: int):
@@ -0,0 +1,91 @@
+from engine import torque_table
+import numpy as np
+
+class engine_bank:
+    def __init__(self, engines: list[dict]):
+        """**Array backed collection of many engines that are updated at once.**\n
+
+        Holds the same values as the ```engine``` class (revs, throttle, torque), but for N engines in numpy arrays.
+        Every engine is described by an entry of ```vehicles/engines.json```. Engines with the same power curve share one lookup table,
+        all tables are packed into one flat array so the torque of every engine can be read out with a single indexing operation.
+
+        Args:
+            engines (list[dict]): one entry of engines.json per engine, ```{"idle_revs": ..., "resistance": ..., "functions": [...], "limits": [...]}```
+        """
+        self.count = len(engines)
+
+        # compile every distinct power curve once
+        curves = {}
+        curve_index = []
+        for i in engines:
+            key = (tuple(i["functions"]), tuple(i["limits"]))
+            if key not in curves:
+                curves[key] = len(curves)
+            curve_index.append(curves[key])
+        self.curves = [torque_table.shared(i[0], i[1]) for i in curves.keys()]
+
+        # all lookup tables in one flat array, every table gets its last value repeated once
+        # so reading the sample after the last one (x = max revs) stays inside of its own table
+        offsets = np.cumsum([0]+[len(i.table)+1 for i in self.curves])
+        self._tables = np.concatenate([i.table+[i.table[-1]] for i in self.curves])
+        self._offset = offsets[curve_index]
+        self._inv_step = np.array([1/self.curves[i].step for i in curve_index])
+
+        # engine config
+        self._revs_idle = np.array([i["idle_revs"] for i in engines], dtype=float)
+        self._res_eng = np.array([i["resistance"] for i in engines], dtype=float)
+        self._max_revs = np.array([i["limits"][-1] for i in engines], dtype=float)
+        self._vmax = np.array([self.curves[i].peak for i in curve_index])
+
+        # real-time values
+        self.revs = self._revs_idle.copy()
+        self.torque = np.zeros(self.count)
+        self.throttle = np.zeros(self.count)
+
+    @classmethod
+    def from_config(cls, engines_config: dict, names: list[str]):
+        """Creates a bank out of the loaded ```engines.json```.
+
+        Args:
+            engines_config (dict): content of engines.json
+            names (list[str]): name of the engine for every slot of the bank, names can repeat
+
+        Returns:
+            engine_bank: bank with one engine per name
+        """
+        return cls([engines_config[i] for i in names])
+
+    def _point_at_graph(self, x: np.ndarray) -> np.ndarray:
+        """Reads the torque of every engine at revs x out of its lookup table, linearly interpolated.
+
+        Args:
+            x (np.ndarray): revs, one value per engine
+
+        Returns:
+            np.ndarray: torque, one value per engine
+        """
+        p = np.clip(x, 0, self._max_revs)*self._inv_step
+        i = p.astype(np.intp)
+        y0 = self._tables[self._offset+i]
+        y1 = self._tables[self._offset+i+1]
+        return y0+(y1-y0)*(p-i)
+
+    def update_revs(self, resistance):
+        """Same as ```engine.update_revs```, but for all engines at once.
+
+        Args:
+            resistance (float | np.ndarray): Environmental resistance, one value for all or one value per engine.
+        """
+        throttle = self.throttle
+
+        # the revs we wanna get to, minus the current revs
+        revs = self._revs_idle+((self._max_revs-self._revs_idle)*throttle)-self.revs
+        # engine resistance
+        revs -= revs*(1-self._res_eng)
+        # environmental resistance, keeping revs up when they fall
+        env_res = 1-np.asarray(resistance, dtype=float)
+        revs *= np.where(revs < 0, env_res*(env_res*3), env_res)
+
+        self.revs += revs
+        np.clip(self.revs, 0, self._max_revs, out=self.revs)
+        self.torque = self._point_at_graph(self.revs)*throttle
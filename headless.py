@@ -0,0 +1,143 @@
+from simulation import simulation, load_configs
+from recorder import recording
+from timing import frame_timer
+from telemetry import telemetry_recorder, decimation_arg
+from surface import surface_map
+import argparse, time
+
+def _step(sim: simulation, events: dict, n: int, telemetry = None):
+    """Calculates n ticks, one by one when every tick has to be sampled by the telemetry."""
+    if telemetry is None:
+        sim.step(events, n)
+    else:
+        for i in range(n):
+            sim.step(events)
+            telemetry.sample(sim)
+
+def _simulation(configs: dict, surface, root: str) -> simulation:
+    """Simulation with the surface map attached like in ```main.py```, so headless runs give the same results."""
+    sim = simulation(configs)
+    sim.surface = surface_map.of_session(configs, root) if surface == "session" else surface
+    return sim
+
+def run(configs: dict, ticks: int, hold = [], timer = None, frame_ticks = 1, telemetry = None, surface = "session", root = ".") -> dict:
+    """Runs the physics loop without a window, as fast as possible.
+
+    Args:
+        configs (dict): configs from ```load_configs```
+        ticks (int): amount of physics ticks to calculate
+        hold (list, optional): names of binds that are held down the whole run, e.g. ```["throttle_100"]```. Defaults to [].
+        timer (frame_timer, optional): when given, the ticks are calculated in frames of ```frame_ticks``` ticks and every frame is timed. Defaults to None.
+        frame_ticks (int, optional): physics ticks per timed frame. Defaults to 1.
+        telemetry (telemetry_recorder, optional): records the state after every tick. Defaults to None.
+        surface (surface_map, optional): surface map the vehicle drives on, None to drive without one. Defaults to "session", the one of the session map.
+        root (str, optional): folder the configs were loaded from, the session map is loaded from there. Defaults to ".".
+
+    Returns:
+        dict: ticks, simulated seconds, wall time, ticks per second and the final state
+    """
+    sim = _simulation(configs, surface, root)
+    events = {i: i in hold for i in configs["config"]["binds"].keys()}
+
+    start = time.perf_counter()
+    if timer is None:
+        _step(sim, events, ticks, telemetry)
+    else:
+        timer.frame()
+        for i in range(0, ticks, frame_ticks):
+            n = min(frame_ticks, ticks-i)
+            _step(sim, events, n, telemetry)
+            timer.frame(n)
+    elapsed = time.perf_counter()-start
+
+    return {
+        "ticks": ticks,
+        "simulated": ticks*sim.dt,
+        "elapsed": elapsed,
+        "ticks_per_second": ticks/elapsed if elapsed > 0 else float("inf"),
+        "pos": sim.pos,
+        "rotation": sim.rotation,
+        "speed": sim.speed,
+    }
+
+def replay(configs: dict, rec: recording, timer = None, telemetry = None, surface = "session", root = ".") -> dict:
+    """Feeds a recording back through the physics loop without a window, as fast as possible.
+
+    Args:
+        configs (dict): configs from ```load_configs```, the hertz of the recording overrides the one from config.json
+        rec (recording): loaded input recording
+        timer (frame_timer, optional): when given, every run of the recording (ticks with the same inputs) is timed as one frame. Defaults to None.
+        telemetry (telemetry_recorder, optional): records the state after every tick. Defaults to None.
+        surface (surface_map, optional): surface map the vehicle drives on, None to drive without one. Defaults to "session", the one of the session map.
+        root (str, optional): folder the configs were loaded from, the session map is loaded from there. Defaults to ".".
+
+    Returns:
+        dict: ticks, simulated seconds, wall time, ticks per second and the final state
+    """
+    configs = dict(configs, config=dict(configs["config"], hertz=rec.hertz))
+    sim = _simulation(configs, surface, root)
+    # binds missing in the recording stay released
+    released = {i: False for i in configs["config"]["binds"].keys()}
+
+    start = time.perf_counter()
+    if timer: timer.frame()
+    for events, ticks in rec:
+        _step(sim, dict(released, **events), ticks, telemetry)
+        if timer: timer.frame(ticks)
+    elapsed = time.perf_counter()-start
+
+    return {
+        "ticks": rec.ticks,
+        "simulated": rec.ticks*sim.dt,
+        "elapsed": elapsed,
+        "ticks_per_second": rec.ticks/elapsed if elapsed > 0 else float("inf"),
+        "pos": sim.pos,
+        "rotation": sim.rotation,
+        "speed": sim.speed,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the simulation without a window, as fast as the cpu allows.")
+    parser.add_argument("--ticks", type=int, help="amount of physics ticks to run")
+    parser.add_argument("--seconds", type=float, help="simulated seconds to run (converted to ticks with the hertz from config.json)")
+    parser.add_argument("--hold", default="", help="comma seperated binds held down the whole run, e.g. throttle_100,left_50")
+    parser.add_argument("--replay", help="input recording to replay (made with main.py --record)")
+    parser.add_argument("--frame-ticks", type=int, default=0, help="time the run in frames of this many ticks and print frame time statistics")
+    parser.add_argument("--timing", help="save the frame time statistics to this json file (frames of --frame-ticks ticks, or runs of the recording)")
+    parser.add_argument("--telemetry", help="folder to record the state of every tick to, load it with telemetry.load")
+    parser.add_argument("--telemetry-every", type=decimation_arg, default=1, help="only record every n-th tick. Defaults to 1.")
+    parser.add_argument("--root", default=".", help="folder with the config files. Defaults to the current folder.")
+    parser.add_argument("--no-surface", action="store_true", help="drive without the surface map of the session map (grip, rolling resistance and walls)")
+    args = parser.parse_args()
+
+    configs = load_configs(args.root)
+    timer = frame_timer() if args.frame_ticks or args.timing else None
+    telemetry = None
+    surface = None if args.no_surface else "session"
+    if args.replay:
+        rec = recording.load(args.replay)
+        if args.telemetry: telemetry = telemetry_recorder(args.telemetry, rec.hertz, args.telemetry_every)
+        result = replay(configs, rec, timer, telemetry, surface, args.root)
+    else:
+        hz = configs["config"]["hertz"]
+        if args.ticks is not None:
+            ticks = args.ticks
+        elif args.seconds is not None:
+            ticks = round(args.seconds*hz)
+        else:
+            ticks = 60*hz # one simulated minute
+        hold = [i for i in args.hold.split(",") if i]
+        for i in hold:
+            if i not in configs["config"]["binds"]:
+                parser.error("unknown bind: "+i)
+        if args.telemetry: telemetry = telemetry_recorder(args.telemetry, hz, args.telemetry_every)
+        result = run(configs, ticks, hold, timer, max(args.frame_ticks, 1), telemetry, surface, args.root)
+
+    print(str(result["ticks"])+" ticks ("+str(round(result["simulated"], 2))+" s simulated) in "+str(round(result["elapsed"], 3))+" s")
+    print(str(round(result["ticks_per_second"]))+" ticks/s, "+str(round(result["simulated"]/result["elapsed"], 1))+"x realtime")
+    if timer:
+        print(timer.report())
+        if args.timing: timer.export(args.timing)
+    if telemetry:
+        telemetry.close()
+        print(str(telemetry.count)+" telemetry samples in "+args.telemetry)
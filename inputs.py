@@ -0,0 +1,134 @@
+from collections import namedtuple
+from types import MappingProxyType
+import threading, queue, time, pygame
+
+# immutable state of all binds, published by the input thread
+# seq: counts up with every change, events: read-only {bind: bool}, running: False after the window was closed,
+# stamp: perf_counter_ns of the oldest key event in this snapshot that no physics tick has seen yet (None if nothing changed)
+input_snapshot = namedtuple("input_snapshot", ["seq", "events", "running", "stamp"])
+
+class input_handler:
+    def __init__(self, binds: dict, latency_samples = 1000):
+        """**One long-lived input thread that turns pygame events into snapshots of the bind states.**\n
+
+        pygame events can only be fetched on the main thread, so the main loop hands them over with ```feed```, which just puts them in a queue.
+        The input thread sorts out the keys that are bound to an event and publishes a new, immutable ```input_snapshot``` whenever a bind changes.
+        Replacing the snapshot is a single assignment, so the physics tick always reads a complete and consistent state with ```consume```.
+
+        The time between handing over a key event and the physics tick that first sees it is saved as input latency.
+        Hotkeys are only queued by the input thread, their functions are called by the next ```snapshot``` or ```consume``` on the main thread.
+
+        Args:
+            binds (dict): bind names as keys and pygame key codes as values, like ```config["binds"]```
+            latency_samples (int, optional): amount of latest latency samples kept for statistics. Defaults to 1000.
+        """
+        # flip binds, so you can find the event by the key pressed
+        self.binds = {}
+        for i in binds.keys():
+            self.binds[binds[i]] = str(i)
+        self.hotkeys = {} # key: function, called on the main thread after the key was pressed
+        self._pressed_hotkeys = queue.SimpleQueue() # functions of pressed hotkeys, not called yet
+
+        self._state = {i: False for i in binds.keys()}
+        self._snapshot = input_snapshot(0, MappingProxyType(dict(self._state)), True, None)
+        self._consumed = 0 # seq of the last snapshot a physics tick has seen
+
+        # input latency, in nanoseconds
+        self._latencies = [0]*latency_samples
+        self._latency_count = 0
+        self.latency_max = 0
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def feed(self, events_list: list):
+        """Hands over a list of pygame events to the input thread. Doesnt wait for them to be handled.
+
+        Args:
+            events_list (list): List of pygame events
+        """
+        if events_list:
+            self._queue.put((time.perf_counter_ns(), events_list))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None: break
+            stamp, events_list = item
+
+            changed = False
+            running = self._snapshot.running
+            for i in events_list:
+                # when closing window/ quitting, throw this to end mainloop
+                if i.type == pygame.QUIT:
+                    running = False
+                    changed = True
+
+                # if key was down or up <=> if key was pressed
+                if i.type == pygame.KEYDOWN or i.type == pygame.KEYUP:
+                    key = i.__dict__["key"]
+                    if i.type == pygame.KEYDOWN and key in self.hotkeys:
+                        self._pressed_hotkeys.put(self.hotkeys[key])
+                    if key in self.binds:
+                        # get the event you bound the key to, then set the state of event
+                        state = i.type == pygame.KEYDOWN
+                        if self._state[self.binds[key]] != state:
+                            self._state[self.binds[key]] = state
+                            changed = True
+
+            if changed:
+                prev = self._snapshot
+                # keep the stamp of the oldest change no tick has seen yet
+                if prev.seq != self._consumed and prev.stamp is not None:
+                    stamp = prev.stamp
+                self._snapshot = input_snapshot(prev.seq+1, MappingProxyType(dict(self._state)), running, stamp)
+
+    def _call_hotkeys(self):
+        while not self._pressed_hotkeys.empty():
+            self._pressed_hotkeys.get()()
+
+    def snapshot(self) -> input_snapshot:
+        """Latest snapshot, without counting it as seen by a physics tick. Calls the functions of hotkeys pressed since."""
+        self._call_hotkeys()
+        return self._snapshot
+
+    def consume(self) -> input_snapshot:
+        """Latest snapshot for a physics tick. The first tick that sees a new snapshot records the input latency.
+        Calls the functions of hotkeys pressed since.
+
+        Returns:
+            input_snapshot: current states of all binds
+        """
+        if not self._pressed_hotkeys.empty(): self._call_hotkeys()
+        s = self._snapshot
+        if s.seq != self._consumed:
+            self._consumed = s.seq
+            if s.stamp is not None:
+                latency = time.perf_counter_ns()-s.stamp
+                self._latencies[self._latency_count % len(self._latencies)] = latency
+                self._latency_count += 1
+                if latency > self.latency_max: self.latency_max = latency
+        return s
+
+    def latency(self) -> dict:
+        """Input latency statistics of the latest samples, in milliseconds.
+
+        Returns:
+            dict: ```{"samples", "mean", "p95", "max"}```
+        """
+        n = min(self._latency_count, len(self._latencies))
+        if not n:
+            return {"samples": 0, "mean": 0, "p95": 0, "max": 0}
+        samples = sorted(self._latencies[:n])
+        return {
+            "samples": self._latency_count,
+            "mean": sum(samples)/n/1e6,
+            "p95": samples[min(n-1, int(n*0.95))]/1e6,
+            "max": self.latency_max/1e6,
+        }
+
+    def close(self):
+        """Stops the input thread and waits for the events handed over before."""
+        self._queue.put(None)
+        self._thread.join()
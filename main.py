@@ -1,206 +1,174 @@
-from physics import physics
-from engine import engine
-from render import render, vehicle, map
+from time import perf_counter
+started = perf_counter() # startup is measured from here to the first frame
+from simulation import simulation, load_configs
+from recorder import input_recorder
+from inputs import input_handler
+from profiler import frame_profiler, EVENTS, PHYSICS, HANDOFF
+from telemetry import telemetry_recorder, decimation_arg
+from render import render, vehicle, map, streamed_map, fleet
+from world import world
+from surface import surface_map
+from assets import assets
+from scheduler import scheduler
+from bundle import session_bundle
 from datetime import datetime
-from typing import final
 from objects import *
-import threading, pygame, json, os
-
-# load configs
-configs = {}
-with open("config.json", "r") as f:
-    config = json.load(f)
-    f.close()
-
-with open("session.json", "r") as f:
-    configs["session"] = json.load(f)
-    f.close()
-
-with open("vehicles/engines.json", "r") as f:
-    configs["engines"] = json.load(f)
-    f.close()
-    
-with open("vehicles/transmissions.json", "r") as f:
-    configs["transmissions"] = json.load(f)
-    f.close()
-
-# setup physics simulation
-sim = physics()
-
-# load engine
-# load car
-with open("vehicles/"+configs["session"]["vehicle"]+"/vehicle.json", "r") as f:
-    vehicledata = json.load(f)
-    f.close()
-
-cur_engine = configs["engines"][vehicledata["engine"]]
-cur_trans = configs["transmissions"][vehicledata["transmission"]]
-motor = engine(cur_engine["functions"], cur_engine["limits"], cur_engine["idle_revs"], cur_engine["resistance"])
-
-# load map
-with open("maps/"+configs["session"]["map"]+"/map.json", "r") as f:
-    mapdata = json.load(f)
-    f.close()
+import numpy as np
+import threading, argparse, pygame, json, os
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--record", help="save the inputs of every physics tick to this file, replay with headless.py --replay")
+parser.add_argument("--telemetry", help="folder to record the state of every physics tick to, load it with telemetry.load")
+parser.add_argument("--telemetry-every", type=decimation_arg, default=1, help="only record every n-th physics tick. Defaults to 1.")
+parser.add_argument("--cars", type=int, default=0, help="amount of other cars driving around, simulated all at once")
+parser.add_argument("--timing", help="save frame time statistics (percentiles and histogram) to this json file when closing")
+parser.add_argument("--bundle", default="session.bundle", help="session bundle to start from, it is baked again when a config or texture changed. Defaults to session.bundle.")
+parser.add_argument("--no-bundle", action="store_true", help="load every config and texture file on its own instead of using the bundle")
+parser.add_argument("--dirty-rects", action="store_true", help="only update the changed parts of the window while the camera stands still (also \"dirty_rects\" in config.json)")
+parser.add_argument("--profile", action="store_true", help="measure every phase of the frames, F3 toggles the overlay, F4 saves the latest frames as csv")
+args = parser.parse_args()
+
+# load configs, textures and torque tables out of the bundle (or each file on its own)
+bundle = None if args.no_bundle else session_bundle.open(args.bundle)
+configs = bundle.configs if bundle else load_configs()
+config = configs["config"]
+mapdata = configs["map"]
+
+# setup simulation (physics, engine and vehicle state)
+sim = simulation(configs)
+recorder = input_recorder(config["binds"].keys(), config["hertz"]) if args.record else None
+telemetry = telemetry_recorder(args.telemetry, config["hertz"], args.telemetry_every) if args.telemetry else None
+
+# surface classes of the map (asphalt, kerb, grass, wall), cached next to the texture
+sim.surface = surface_map.of_session(configs)
 
 # setup renderer
-display = render(tuple(config["resolution"]))
-display.add_object("map", map(display.size, "maps/"+configs["session"]["map"]+"/"+mapdata["texture"], mapdata["size"], mapdata["chunksize"])) # map object
-display.add_object("main", vehicle(display.size, os.getcwd()+"/vehicles/"+configs["session"]["vehicle"], [0, 0], 0)) # "main", vehicle object
+display = render(tuple(config["resolution"]), dirty_rects = args.dirty_rects or config.get("dirty_rects", False))
+streamed = None
+if mapdata.get("streamed"):
+    # big maps are cut into tiles once, then only the chunks near the camera are loaded
+    tiles = "maps/"+configs["session"]["map"]+"/tiles"
+    if not os.path.exists(tiles+"/index.json"):
+        streamed_map.bake_tiles(display.size, "maps/"+configs["session"]["map"]+"/"+mapdata["texture"], mapdata["size"], mapdata["chunksize"], tiles)
+    streamed = streamed_map(display.size, tiles, mapdata["size"], mapdata["chunksize"])
+    display.add_object("map", streamed) # map object
+else:
+    m = bundle.map(display.size) if bundle else None # chunks straight out of the bundle
+    if m is None:
+        m = map(display.size, "maps/"+configs["session"]["map"]+"/"+mapdata["texture"], mapdata["size"], mapdata["chunksize"])
+    display.add_object("map", m) # map object
+display.add_object("main", vehicle(display.size, os.getcwd()+"/vehicles/"+configs["session"]["vehicle"], [0, 0], 0, rotation_sheet = 360)) # "main", vehicle object
+
+# other cars, in rows behind the start, driving circles of different size
+cars = None
+if args.cars:
+    rows = np.arange(args.cars)
+    cars = world(configs, args.cars, pos = np.column_stack(((rows % 10-4.5)*5, (rows//10+1)*10)))
+    cars.throttle[:] = 0.5
+    cars.steer[:] = np.linspace(-1, 1, args.cars)
+    cars.surface = sim.surface
+    display.add_fleet("cars", fleet(cars, display.get_object("main")))
 
 # mainloop handler values
-acc = 0
 hz = config["hertz"]
-dt = 1/hz #100hz
 actions = 0
+shown = None # vehicle and camera state of the last rendered frame
 # "run_thread" is for terminating loops in threads
 run_thread = threading.Event()
 run_thread.set()
 
 
 # events
-running = True
-events = {}
-binds: final = {}
-# events is the thing you should use. it saves the states of the binds, example: throttle = True. Its a simple way of seeing if your event is fulfilled
-# setup binds (flip all keys with elements, so you can find event by giving the key pressed)
-for i in config["binds"].keys():
-    binds[config["binds"][i]] = str(i)
-# setup events dict where you can read out, if an event is fulfilled (if button bound to it is pressed)
-for i in config["binds"].keys():
-    events[i] = False
-
-def run_eventhandler(events_list: list, in_async = False):
-    """**Takes a list of pygame events and sorts out the keys pressed, where the key is bound to an event and organizes them into a dictionary.**\n
-    
-    The dictionary ```binds``` holds bindings between a keyboard key and a specific event. For example the W key bound to the event of moving forward.
-    Once a key, where an event is bound to it, is pressed, the event in the "events" dictionary turns True.
-    The other way around, when you release that key, the event turns to False.\n
-    
-    **In short:** after running this method and giving it the list of pygame events, it neatly organizes the events
-    that are actually triggered in the ```events``` dictionary, where they can be easily checked by using ```events[<event>]```
-
-    Args:
-        events_list (list): List of pygame events
-        in_async (bool, optional): This is for recursion purposes only. Defaults to False.
-    """
-    global events, running
-    
-    if not in_async:
-        # restart yourself as async, so you dont hold up the rest
-        threading.Thread(target=run_eventhandler, args=(events_list, True)).start()
-    else:
-        for i in events_list:
-            # when closing window/ quitting, throw this to end mainloop
-            if i.type == pygame.QUIT: running = False
-            
-            # if key was down or up <=> if key was pressed
-            if i.type == pygame.KEYDOWN or i.type == pygame.KEYUP:
-                if i.__dict__["key"] in binds:
-                    # get the event you bound the key to, then set the state of event
-                    events[binds[i.__dict__["key"]]] = i.type == pygame.KEYDOWN
-
-### start of testing values ###
-steer = 0
-speed = 0
-brake = 0
-reverse = 0
-
-pos = (0, 0)
-rotation = 0
+# one input thread turns key presses into snapshots of the bind states, example: throttle_100 = True.
+# the physics tick reads the latest snapshot with inputs.consume()
+inputs = input_handler(config["binds"])
+
+# frame profiler, off unless started with --profile
+profiler = frame_profiler() if args.profile else None
+sim.profiler = display.profiler = profiler
+if profiler:
+    def toggle_hud():
+        profiler.show_hud = not profiler.show_hud
+    def dump_profile():
+        print("profile saved to "+profiler.dump_csv("profile_"+datetime.now().strftime("%Y%m%d_%H%M%S")+".csv"))
+    inputs.hotkeys[pygame.K_F3] = toggle_hud
+    inputs.hotkeys[pygame.K_F4] = dump_profile
 
 # setup
-defaultzoom = 40
-display.cam_pos = [0, 0]
+display.cam_pos = sim.cam_pos
+display.cam_zoom = sim.cam_zoom
 
-# config
-topspeed = 0.48
-reversespeed = 0.05
-turnspeed = 0.5
-accel = 0.0015
-decel = 0.0003
-brakeforce = 0.27
-### end of testing values ###
+# frame pacing, sleeps in between physics ticks and frames instead of spinning
+pacer = scheduler(hz, config.get("max_fps", 60), config.get("max_ticks_per_frame", 5), config.get("max_catch_up", 0.25), timer = display.timing)
 
-now = now_second = datetime.now()
+loaded = perf_counter()-started
+pacer.start()
+second = perf_counter()
 try:
     while True:
+        if profiler: profiler.begin_frame()
         # if pygame window is closed, exit by using an exception, which is catched
-        if not running: raise KeyboardInterrupt
-        
-        # get elapsed time and add to accumulator
-        elapsed = (datetime.now()-now).total_seconds()
-        acc += elapsed
+        if not inputs.snapshot().running: raise KeyboardInterrupt
+        if profiler: profiler.mark(EVENTS)
         
-        # calculate physics that happened in accumulated time
-        while acc >= dt:
-            # controls module
-            if events["throttle_100"]:
-                motor.throttle = 1
-            elif events["throttle_50"]:
-                motor.throttle = 0.5
-            else:
-                motor.throttle = 0
-            
-            if events["brake_100"]:
-                brake = 1
-            elif events["brake_50"]:
-                brake = 0.5
-            else:
-                brake = 0
-                
-            if events["left_100"]:
-                steer = -1
-            elif events["left_50"]:
-                steer = -0.5
-            elif events["right_50"]:
-                steer = 0.5
-            elif events["right_100"]:
-                steer = 1
-            else:
-                steer = 0
-            
-            # engine calculations
-            ## calculate resistence with physics module (breaking, environmental factors)
-            ## when braking: motor.update_revs(1, x), x is resistance coming from braking
-            # calculate engine revs
-            motor.update_revs(0.9+brakeforce*brake) # FIX BREAKING (engine class)
-            speed = motor.revs/13542 # high resistance for one big gear with high ratio = higher topspeeds & realistic acceleration
-            # calculate actual output (through transmission, with all resistences)
-            ## motor.transmission method to be implemented
-            
-            # physics calculations
-            ## calculate next state
-            ## state = sim.next(motor)
-            if motor.throttle:
-                speed += accel*motor.throttle
-            if not speed > 0 and not motor.throttle:
-                if brake:
-                    speed = -reversespeed*brake
-                else:
-                    speed = 0
-            if speed > topspeed:
-                speed = topspeed
-            
-            pos, rotation = display.move_object_straight("main", speed), display.rotate_object("main", turnspeed*steer)
-            display.cam_zoom = defaultzoom+speed*200
-            display.cam_pos = pos
+        # calculate physics ticks that are due, after a stall only as many as the catch-up budget allows
+        for i in range(pacer.due()):
+            # controls, engine and movement
+            events = inputs.consume().events
+            if recorder: recorder.record(events)
+            if profiler: profiler.mark(EVENTS)
+            sim.step(events)
+            if cars: cars.step()
+            if telemetry: telemetry.sample(sim)
+            display.timing.tick()
             
             actions += 1
-            acc -= dt
-            acc += ((datetime.now()-now).total_seconds()) - elapsed
+            # the rest of every tick, otherwise it would count as controls of the next one
+            if profiler: profiler.mark(PHYSICS)
+        if profiler: profiler.mark(PHYSICS)
         
-        # reset elapsed time
-        if not elapsed == 0: now = datetime.now()
-        if (datetime.now()-now_second).total_seconds() > 1: # this if for debugging
-            print(str(actions)+" "+str(display.fps)+" fps ")
+        if perf_counter()-second > 1: # this if for debugging
+            frames = display.timing.interval()
+            # standing still no frame is drawn, there is no frame time to show
+            frame_time = str(round(frames["p99"], 2))+" ms p99 frame time " if frames["frames"] else str(frames["skipped_frames"])+" frames not drawn "
+            print(str(actions)+" "+str(display.fps)+" fps "+frame_time+str(round(inputs.latency()["mean"], 2))+" ms input lag "
+                  +str(round(pacer.stats()["busy"]*100))+"% busy "+str(pacer.skipped)+" skipped")
             actions = 0
-            now_second = datetime.now()
+            second = perf_counter()
+        
+        # hand over simulation state (previous and current tick) to renderer
+        o = display.get_object("main")
+        o.prev_pos, o.prev_rotation = sim.prev_pos, sim.prev_rotation
+        o.pos, o.rotation = sim.pos, sim.rotation
+        display.prev_cam_zoom, display.prev_cam_pos = sim.prev_cam_zoom, sim.prev_cam_pos
+        display.cam_zoom, display.cam_pos = sim.cam_zoom, sim.cam_pos
+        if profiler: profiler.mark(HANDOFF)
+        
+        # render frames, in between the last two physics states
+        # standing still (and nothing else that moves on screen) the last frame still shows the same, so it isnt drawn again
+        state = (sim.pos, sim.rotation, sim.cam_zoom)
+        if (cars or (profiler and profiler.show_hud) or state != shown
+                or sim.prev_pos != sim.pos or sim.prev_rotation != sim.rotation or sim.prev_cam_zoom != sim.cam_zoom):
+            display.render(pacer.alpha())
+            shown = state
+        else:
+            display.timing.skip()
+        if started:
+            print("first frame after "+str(round((perf_counter()-started)*1000))+" ms ("+str(round(loaded*1000))+" ms loading)")
+            started = 0
+        inputs.feed(display.get_events()) # hand over events to input thread
+        if profiler: profiler.mark(EVENTS)
         
-        # render frames (async)
-        ## render inbetween states, async: render(interpol(acc / dt))
-        display.render()
-        run_eventhandler(display.get_events()) # hand over events to eventhandler
+        # sleep until the next physics tick or frame is due
+        pacer.wait()
 except KeyboardInterrupt:
     # termination
     run_thread.clear()
+    inputs.close()
+    if streamed: streamed.close()
+    if recorder: recorder.save(args.record)
+    if telemetry: telemetry.close()
+    print(display.timing.report())
+    print("assets: "+assets.report())
+    if args.timing: display.timing.export(args.timing)
     pass
\ No newline at end of file
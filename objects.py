@@ -1,5 +1,105 @@
+from collections import OrderedDict
+from assets import assets, surface_bytes
 import pygame, json, os
 
+class texture:
+    def __init__(self, textures: dict, size_quantum = 2, angle_quantum = 1, max_entries = 64):
+        """**Holds the textures of an object and caches their scaled and rotated versions.**\n
+
+        Scaling and rotating a texture every frame is the expensive part of rendering a sprite, even though size and rotation barely change from frame to frame.
+        Every version is saved by (state, size, angle), where size is rounded to ```size_quantum``` pixels and the angle to ```angle_quantum``` degrees.
+        Only the ```max_entries``` most recently used versions are kept.
+
+        Optionally a rotation sheet can be baked with ```bake_rotations```, then a missing version only needs one scale instead of a scale and a rotation.
+
+        Args:
+            textures (dict): state names as keys and loaded surfaces as values
+            size_quantum (int, optional): size steps in pixels. Defaults to 2.
+            angle_quantum (float, optional): angle steps in degrees. Defaults to 1.
+            max_entries (int, optional): maximum amount of cached versions. Defaults to 64.
+        """
+        self.textures = textures
+        self.size_quantum = size_quantum
+        self.angle_quantum = angle_quantum
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._sheets = {} # state: (reference size, list of rotated surfaces)
+
+        # debug values
+        self.hits = 0
+        self.misses = 0
+
+    def bake_rotations(self, state: str, size: tuple, steps = 360):
+        """Pre-rotates a texture into ```steps``` angles, so later only scaling is left to do.
+
+        The texture is first scaled to ```size``` (which should have the aspect ratio of the object on screen), then rotated.
+        Rotated versions are scaled evenly on both axes later, that way they look the same as scaling first and rotating after.
+        The angle quantum of this texture becomes ```360/steps```.
+
+        Args:
+            state (str): texture state to bake
+            size (tuple): reference width and height in pixels
+            steps (int, optional): amount of angles. Defaults to 360.
+        """
+        base = pygame.transform.smoothscale(self.textures[state], (int(size[0]), int(size[1])))
+        self._sheets[state] = ((int(size[0]), int(size[1])), [pygame.transform.rotate(base, 360-i*360/steps) for i in range(steps)])
+        self.angle_quantum = 360/steps
+        self._cache.clear()
+
+    def copy(self, max_entries: int):
+        """A cache of its own over the same textures and baked rotations (nothing is loaded or baked again), for users that need a different capacity.
+
+        Args:
+            max_entries (int): maximum amount of cached versions of the copy
+
+        Returns:
+            texture: the new cache, empty
+        """
+        t = texture(self.textures, self.size_quantum, self.angle_quantum, max_entries)
+        t._sheets = self._sheets
+        return t
+
+    def memory(self) -> int:
+        """Bytes of the baked rotations and cached versions, not counting the original textures."""
+        sheets = sum(surface_bytes(s) for ref, sheet in self._sheets.values() for s in sheet)
+        return sheets+sum(surface_bytes(s) for s in self._cache.values())
+
+    def get(self, state: str, size: tuple, rotation: float) -> pygame.Surface:
+        """Returns the texture of a state scaled to size and rotated clockwise.
+
+        Args:
+            state (str): texture state
+            size (tuple): width and height in pixels
+            rotation (float): rotation in degrees, clockwise
+
+        Returns:
+            pygame.Surface: scaled and rotated texture
+        """
+        q = self.size_quantum
+        w, h = round(size[0]/q)*q or q, round(size[1]/q)*q or q
+        angle = round(rotation/self.angle_quantum) % round(360/self.angle_quantum)
+        key = (state, w, h, angle)
+
+        s = self._cache.get(key)
+        if s is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return s
+
+        self.misses += 1
+        if state in self._sheets:
+            ref, sheet = self._sheets[state]
+            rotated = sheet[angle]
+            factor = h/ref[1]
+            s = pygame.transform.scale(rotated, (max(1, round(rotated.get_width()*factor)), max(1, round(rotated.get_height()*factor))))
+        else:
+            s = pygame.transform.rotate(pygame.transform.scale(self.textures[state], (w, h)), 360-angle*self.angle_quantum)
+
+        self._cache[key] = s
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return s
+
 class obj(pygame.sprite.Sprite):
     """**Represents an object in pygame.**\n
     
@@ -9,14 +109,19 @@ class obj(pygame.sprite.Sprite):
     Scaling and position of an object on screen is determined by the renderer, but the update method provided here ultimately clears the last sprite
     and render the new sprite with its current texture and rotation on the screen.
     """
-    def __init__(self, win_resolution: tuple, textures: dict, pos = [0, 0], size = [1, 1], rotation = 0):
+    grid = None # spatial_hash the object is in, updated whenever pos is set
+    _canvas = True # start with a window sized image to draw on (the map draws its chunks into it)
+    
+    def __init__(self, win_resolution: tuple, textures: dict, pos = [0, 0], size = [1, 1], rotation = 0, texture_cache = None):
         """
         Args:
             win_resolution (tuple): resolution of the whole window ```(width, height)```
-            textures (dict): dictionary of texture names as keys and values as location of the texture file, (default has to be always included) ```{"default": "default.png"}```
+            textures (dict): dictionary of texture names as keys and values as location of the texture file, (default has to be always included) ```{"default": "default.png"}```.
+                Files are loaded through ```assets```, so objects with the same files share their surfaces. Empty for objects that draw their image themselves.
             pos (list, optional): x and y position in world, in units. Defaults to [0, 0].
             size (list, optional): width and height of object in world, in units. Defaults to [1, 1].
             rotation (int, optional): rotation of object in dregrees. Defaults to 0.
+            texture_cache (texture, optional): texture cache of the textures, to share one between objects. Defaults to a new one.
         """
         # super class constructor
         pygame.sprite.Sprite.__init__(self)
@@ -27,23 +132,57 @@ class obj(pygame.sprite.Sprite):
         self.pos = pos
         self.size = size
         self.rotation = rotation
+        # position and rotation of the previous physics tick, for interpolation. None = no interpolation
+        self.prev_pos = None
+        self.prev_rotation = None
         self.state = "default" # states = current texture
         # this is a universal default state which has to be included in any list of textures
         
-        self._textures = {}
-        for i in textures.keys():
-            self._textures[i] = pygame.image.load(textures[i])
+        self._textures = assets.images(textures)
+        self.texture = texture_cache if texture_cache is not None else texture(self._textures)
+        self._empty = pygame.Surface((0, 0), pygame.SRCALPHA)
         
         # pygame sprite variables
-        self.image = pygame.Surface(self.res, pygame.SRCALPHA)
-        self.image.blit(self._textures[self.state], pos)
+        if self._canvas:
+            self.image = pygame.Surface(self.res, pygame.SRCALPHA)
+            if self.state in self._textures:
+                self.image.blit(self._textures[self.state], pos)
+        else:
+            self.image = self._empty
         
         self.rect = self.image.get_rect()
         
+    @property
+    def pos(self) -> list:
+        """x and y position in world, in units. Setting it moves the object in its spatial hash."""
+        return self._pos
+    
+    @pos.setter
+    def pos(self, pos: list):
+        self._pos = pos
+        if self.grid is not None:
+            self.grid.move(self, pos)
+    
     def _scaled(self, tuple: tuple, scale: tuple):
         return (tuple[0]*scale[0], tuple[1]*scale[1])
     
-    def update(self, pos: tuple, size: tuple, empty = False):
+    def interpolated(self, alpha: float) -> tuple:
+        """Position and rotation in between the previous and current physics tick.
+
+        Args:
+            alpha (float): 0 = previous state, 1 = current state
+
+        Returns:
+            tuple: position and rotation
+        """
+        if alpha == 1 or self.prev_pos is None:
+            return self.pos, self.rotation
+        pos = (self.prev_pos[0]+(self.pos[0]-self.prev_pos[0])*alpha, self.prev_pos[1]+(self.pos[1]-self.prev_pos[1])*alpha)
+        # rotate the short way around, 359 -> 1 goes over 0
+        turn = (self.rotation-self.prev_rotation+180) % 360 - 180
+        return pos, (self.prev_rotation+turn*alpha) % 360
+
+    def update(self, pos: tuple, size: tuple, empty = False, rotation = None):
         """Render sprite on screen.\n
         
         Parameter values usually provided be the renderer, which converts objects size and position from units to pixels to be printed on screen.
@@ -52,29 +191,50 @@ class obj(pygame.sprite.Sprite):
             pos (tuple): x and y position on screen (center origin), in pixels
             size (tuple): width and height on screen, in pixels
             empty (bool, optional): if object is visible on screen, decides if worth rendering. Defaults to False.
+            rotation (float, optional): rotation to render with, instead of ```self.rotation```. Defaults to None.
         """
-        self.image = pygame.Surface(self.res, pygame.SRCALPHA)
         if not empty:
-            rotated = pygame.transform.rotate(pygame.transform.scale(self._textures[self.state], size), 360-self.rotation)
+            rotated = self.texture.get(self.state, size, self.rotation if rotation is None else rotation)
             frame = max(size[0], size[1])
             tpos = (pos[0]+(frame-rotated.get_width())/2, pos[1]+(frame-rotated.get_height())/2)
-            self.image.blit(rotated, tpos)
-            self.rect = self.image.get_rect()
+            # the sprite is just the rotated texture, placed with its rect. no full screen surface needed
+            self.image = rotated
+            self.rect = rotated.get_rect(topleft = tpos)
+        else:
+            self.image = self._empty
+            self.rect = self._empty.get_rect()
 
 class vehicle(obj):
-    def __init__(self, win_resolution: tuple, working_directory: str, pos = [0, 0], rotation = 0):
+    _canvas = False # the image is always just the rotated texture
+    
+    def __init__(self, win_resolution: tuple, working_directory: str, pos = [0, 0], rotation = 0, rotation_sheet = 0, sheet_height = 128):
         """Child-class of obj specifically for displaying vehicles.
 
+        Vehicles of the same folder share their textures and the texture cache (with the baked rotations), so spawning more copies of a car costs no loading or baking.
+
         Args:
             win_resolution (tuple): resolution of the whole window ```(width, height)```
             working_directory (str): path to vehicle folder that holds textures and vehicle.json
             pos (list, optional): x and y position in world, in units. Defaults to [0, 0].
             rotation (int, optional): rotation of object in dregrees. Defaults to 0.
+            rotation_sheet (int, optional): amount of angles to pre-rotate every texture into at load time, 0 = no rotation sheet. Defaults to 0.
+            sheet_height (int, optional): height in pixels of the pre-rotated textures. Defaults to 128.
         """
         # super class constructor
         with open(working_directory+"/vehicle.json") as f:
             self.data = json.load(f)
             f.close()
         
-        os.chdir(working_directory)
-        obj.__init__(self, win_resolution, self.data["textures"], pos, (self.data["width"], self.data["length"]), rotation)
\ No newline at end of file
+        textures = {i: os.path.join(working_directory, j) for i, j in self.data["textures"].items()}
+        size = (self.data["width"], self.data["length"])
+        
+        def make_texture() -> texture:
+            t = texture(assets.images(textures))
+            if rotation_sheet:
+                t.max_entries = max(t.max_entries, 2*rotation_sheet) # shared by many vehicles looking in different directions
+                # bake with the aspect ratio of the vehicle, not of the texture file
+                for i in textures.keys():
+                    t.bake_rotations(i, (sheet_height*size[0]/size[1], sheet_height), rotation_sheet)
+            return t
+        shared = assets.shared(("vehicle", assets.path(working_directory), rotation_sheet, sheet_height), make_texture)
+        obj.__init__(self, win_resolution, textures, pos, size, rotation, shared)
\ No newline at end of file
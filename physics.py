@@ -1,3 +1,147 @@
+import math
+
+def move_direction(pos, direction_deg, distance) -> list:
+    """
+    Move from an initial position (x, y) by a certain distance in a specified direction.
+    
+    :param x: Initial x-coordinate.
+    :param y: Initial y-coordinate.
+    :param direction_deg: Direction in degrees (0° is along the positive x-axis, increasing clockwise).
+    :param distance: Distance to move.
+    :return: Tuple (new_x, new_y) representing the new position.
+    """
+    # Convert direction from degrees to radians
+    direction_rad = math.radians(direction_deg-90)
+    
+    x, y = pos
+    # Calculate new coordinates
+    new_x = x + distance * math.cos(direction_rad)
+    new_y = y + distance * math.sin(direction_rad)
+    
+    return [new_x, new_y]
+
+GRAVITY = 9.81
+
 class physics:
-    def __init__(self):
-        pass
\ No newline at end of file
+    def __init__(self, vehicle: dict, tires = None, substeps = 4):
+        """**Moves one vehicle: forces along its heading, integrated with semi-implicit (symplectic) Euler in sub-steps.**\n
+
+        Every sub-step the speed is updated first (drive, brake, drag and rolling resistance over the mass of the vehicle),
+        then heading and position are moved with the new speed. Steering is kinematic (bicycle model): the yaw rate is
+        ```speed/wheelbase*tan(steering angle)```, capped at the rate the grip of the tires can hold.
+        More sub-steps per tick are more accurate, less are faster, see ```substeps```.
+        On grass or kerbs ```surface_grip``` and ```surface_rolling``` scale the grip and the rolling resistance (set by the caller every tick).
+
+        Units are meters, kilograms and seconds (world units are meters). Rotation is in degrees, 0 = up, clockwise like the renderer.
+        ```step``` only works on floats saved in the object, it needs no pygame objects and creates no lists or tuples.
+
+        Values from vehicle.json: ```weight``` (kg), ```wheelbase``` (m), optionally ```drive_ratio``` (engine revs per wheel turn),
+        ```drag``` (0.5*air density*cd*area, kg/m), ```rolling_resistance``` (coefficient), ```steering_lock``` (degrees),
+        ```brake``` (deceleration in g), ```reverse_speed``` (m/s).
+        From the tires: ```diameter``` (inch) and optionally ```grip``` (friction coefficient).
+
+        Args:
+            vehicle (dict): content of vehicle.json
+            tires (dict, optional): entry of tires.json. Defaults to a 26 inch tire with a grip of 1.
+            substeps (int, optional): sub-steps per call of ```step```. Defaults to 4.
+        """
+        tires = tires or {}
+        self.substeps = substeps
+
+        # vehicle values
+        self.mass = vehicle["weight"]
+        self.wheelbase = vehicle["wheelbase"]
+        self.drive_ratio = vehicle.get("drive_ratio", 4.8)
+        self.drag = vehicle.get("drag", 0.43)
+        self.rolling_resistance = vehicle.get("rolling_resistance", 0.015)
+        self.steering_lock = math.radians(vehicle.get("steering_lock", 30))
+        self.brake_force = vehicle.get("brake", 1.2)*GRAVITY*self.mass
+        self.reverse_speed = vehicle.get("reverse_speed", 5)
+        self.reverse_force = 0.3*GRAVITY*self.mass
+        self.wheel_radius = tires.get("diameter", 26)*0.0254/2
+        self.grip = tires.get("grip", 1)
+
+        # derived values
+        self.rolling_force = self.rolling_resistance*GRAVITY*self.mass
+        self.max_lateral = self.grip*GRAVITY # highest sideways acceleration, in m/s^2
+        self.revs_to_speed = 2*math.pi*self.wheel_radius/(60*self.drive_ratio) # speed in m/s of one rpm
+        self.torque_to_force = self.drive_ratio/self.wheel_radius
+
+        # state
+        self.x = 0.0
+        self.y = 0.0
+        self.rotation = 0.0
+        self.speed = 0.0 # m/s along the heading, negative = reversing
+        self.yaw_rate = 0.0 # degrees per second
+        # surface under the wheels, relative to asphalt (see surface.GRIP and surface.ROLLING), set before every step
+        self.surface_grip = 1.0 # scales the sideways grip and the brakes
+        self.surface_rolling = 1.0 # scales the rolling resistance
+
+    def top_speed(self, max_revs: float) -> float:
+        """Speed in m/s at which the engine reaches ```max_revs```, as far as the drive can push the vehicle."""
+        return max_revs*self.revs_to_speed
+
+    def step(self, dt: float, torque: float, revs: float, throttle: float, brake: float, steer: float):
+        """Moves the vehicle by dt seconds, in ```substeps``` sub-steps.
+
+        The engine pushes with ```torque``` through the drive ratio, as long as the vehicle is slower than the speed its revs turn the wheels at.
+        Braking while standing or rolling backwards (without throttle) drives backwards, up to ```reverse_speed*brake```.
+
+        Args:
+            dt (float): time in seconds
+            torque (float): engine torque, already scaled by the throttle
+            revs (float): engine revs
+            throttle (float): 0-1
+            brake (float): 0-1
+            steer (float): -1 = full left, 1 = full right
+        """
+        h = dt/self.substeps
+        mass = self.mass
+        drag = self.drag
+        rolling = self.rolling_force*self.surface_rolling
+        max_lateral = self.max_lateral*self.surface_grip
+        wheelbase = self.wheelbase
+        x, y, rotation, v = self.x, self.y, self.rotation, self.speed
+        yaw = 0.0
+
+        # forces that stay the same during the sub-steps
+        drive = torque*self.torque_to_force if throttle else 0.0
+        limit = revs*self.revs_to_speed
+        braking = self.brake_force*brake*self.surface_grip
+        reverse = -self.reverse_force*brake if brake and not throttle else 0.0
+        reverse_limit = -self.reverse_speed*brake
+        curvature = math.tan(steer*self.steering_lock)/wheelbase
+
+        for i in range(self.substeps):
+            # forces along the heading, positive = forwards
+            force = 0.0
+            if drive and v < limit:
+                force = drive
+            elif reverse and v <= 0 and v > reverse_limit:
+                force = reverse
+            if v > 0:
+                resist = drag*v*v+rolling+braking
+            elif v < 0:
+                resist = -drag*v*v-rolling
+            else:
+                resist = 0.0
+
+            # semi-implicit euler: speed first, then heading and position with the new speed
+            nv = v+(force-resist)*h/mass
+            # resistance can stop the vehicle, but not push it the other way
+            if (v > 0 and nv < 0 and force >= 0) or (v < 0 and nv > 0 and force <= 0):
+                nv = 0.0
+            v = nv
+
+            # kinematic steering, turning only as fast as the grip allows
+            yaw = v*curvature
+            if v and abs(yaw*v) > max_lateral:
+                yaw = max_lateral/abs(v) if yaw > 0 else -max_lateral/abs(v)
+            rotation += math.degrees(yaw*h)
+            direction = math.radians(rotation-90)
+            x += v*h*math.cos(direction)
+            y += v*h*math.sin(direction)
+
+        self.x, self.y, self.speed = x, y, v
+        self.rotation = rotation % 360
+        self.yaw_rate = math.degrees(yaw)
\ No newline at end of file
@@ -0,0 +1,84 @@
+from array import array
+import time
+
+# phases of one frame of the main loop, in the order they happen
+# physics = the rest of the ticks after the movement (other vehicles, telemetry), handoff = passing the state to the renderer
+PHASES = ("events", "controls", "update_revs", "movement", "physics", "handoff", "map.update", "sprites", "draw", "display.update")
+EVENTS, CONTROLS, UPDATE_REVS, MOVEMENT, PHYSICS, HANDOFF, MAP_UPDATE, SPRITES, DRAW, DISPLAY_UPDATE = range(len(PHASES))
+
+class frame_profiler:
+    def __init__(self, phases = PHASES, frames = 600):
+        """**Measures how long every phase of a frame takes, for the latest frames.**\n
+
+        Timings are written into one preallocated array of ```frames``` rows with one column per phase (a ring buffer),
+        so profiling a frame doesnt allocate anything. ```mark``` adds the time since the previous mark to a phase,
+        phases that run more than once per frame (like the physics ticks) add up.
+
+        Code that can be profiled keeps a ```profiler``` attribute that is None when profiling is off, so the only cost then is one check.
+
+        Args:
+            phases (tuple, optional): names of the phases. Defaults to PHASES.
+            frames (int, optional): amount of latest frames kept. Defaults to 600.
+        """
+        self.phases = tuple(phases)
+        self.index = {name: n for n, name in enumerate(self.phases)}
+        self.frames = frames
+        self.show_hud = True
+
+        n = len(self.phases)
+        self._buffer = array("q", bytes(8*n*frames)) # nanoseconds, row = frame, column = phase
+        self._zero = array("q", bytes(8*n))
+        self._row = 0 # start of the row of the current frame
+        self._last = 0 # perf_counter_ns of the last mark
+        self.count = 0 # frames begun
+
+    def begin_frame(self):
+        """Starts a new row. Times before the first mark of a frame count to that phase."""
+        n = len(self.phases)
+        self._row = (self.count % self.frames)*n
+        self._buffer[self._row:self._row+n] = self._zero
+        self.count += 1
+        self._last = time.perf_counter_ns()
+
+    def mark(self, phase: int):
+        """Adds the time since the last mark to a phase of the current frame.
+
+        Args:
+            phase (int): index of the phase, see ```index```
+        """
+        now = time.perf_counter_ns()
+        self._buffer[self._row+phase] += now-self._last
+        self._last = now
+
+    def rows(self, last = None) -> list[list[int]]:
+        """Finished frames, oldest first, as lists of nanoseconds per phase.
+
+        Args:
+            last (int, optional): only the latest frames. Defaults to all that are kept.
+        """
+        n = len(self.phases)
+        done = self.count-1 # the current frame isnt finished
+        amount = min(done, self.frames-1, last if last is not None else self.frames)
+        rows = []
+        for f in range(done-amount, done):
+            start = (f % self.frames)*n
+            rows.append(self._buffer[start:start+n].tolist())
+        return rows
+
+    def average(self, last = 30) -> list[float]:
+        """Milliseconds per phase, averaged over the latest frames."""
+        rows = self.rows(last)
+        if not rows:
+            return [0.0]*len(self.phases)
+        return [sum(r[n] for r in rows)/len(rows)/1e6 for n in range(len(self.phases))]
+
+    def dump_csv(self, path: str) -> str:
+        """Writes all kept frames to a csv file, one row per frame, phase times in nanoseconds."""
+        rows = self.rows()
+        first = self.count-1-len(rows)
+        with open(path, "w") as f:
+            f.write("frame,"+",".join(self.phases)+"\n")
+            for n, r in enumerate(rows):
+                f.write(str(first+n)+","+",".join(str(i) for i in r)+"\n")
+            f.close()
+        return path
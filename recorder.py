@@ -0,0 +1,133 @@
+import struct
+
+# file layout:
+#   magic, version, hertz, amount of binds, bind names (length + utf-8)
+#   then runs until the end of the file: bind flags as varint, ticks the flags were held as varint
+_MAGIC = b"VSIR"
+_VERSION = 1
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data: bytes, i: int) -> tuple:
+    value = shift = 0
+    while True:
+        b = data[i]
+        i += 1
+        value |= (b & 0x7f) << shift
+        if not b & 0x80:
+            return value, i
+        shift += 7
+
+class input_recorder:
+    def __init__(self, binds: list[str], hertz: int):
+        """**Records the state of the binds every physics tick.**\n
+
+        Every bind is one bit of a number (the flags), in the order of ```binds```. Ticks with the same flags in a row are stored as one run
+        (run-length encoding), so holding a key for a minute costs a few bytes, not 6000 entries.
+
+        Args:
+            binds (list[str]): names of the binds, usually the keys of ```config["binds"]```
+            hertz (int): physics ticks per second, saved so the replay runs at the same rate
+        """
+        self.binds = list(binds)
+        self.hertz = hertz
+        self.runs = [] # finished runs as (flags, ticks)
+        self.ticks = 0
+        self._flags = -1
+        self._count = 0
+
+    def record(self, events: dict):
+        """Adds one physics tick with the current bind states.
+
+        Args:
+            events (dict): states of the binds, ```{"throttle_100": True, ...}```
+        """
+        flags = 0
+        bit = 1
+        for i in self.binds:
+            if events[i]:
+                flags |= bit
+            bit <<= 1
+
+        if flags == self._flags:
+            self._count += 1
+        else:
+            if self._count:
+                self.runs.append((self._flags, self._count))
+            self._flags = flags
+            self._count = 1
+        self.ticks += 1
+
+    def to_bytes(self) -> bytes:
+        out = bytearray(_MAGIC)
+        out += struct.pack("<BHB", _VERSION, self.hertz, len(self.binds))
+        for i in self.binds:
+            name = i.encode("utf-8")
+            out += struct.pack("<B", len(name))+name
+
+        runs = self.runs+[(self._flags, self._count)] if self._count else self.runs
+        for flags, count in runs:
+            _write_varint(out, flags)
+            _write_varint(out, count)
+        return bytes(out)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+            f.close()
+
+class recording:
+    def __init__(self, binds: list[str], hertz: int, runs: list[tuple]):
+        """A loaded input recording. Iterating over it gives ```(events, ticks)``` for every run,
+        which fits right into ```simulation.step(events, ticks)```.
+
+        Args:
+            binds (list[str]): names of the binds, in bit order
+            hertz (int): physics ticks per second of the recording
+            runs (list[tuple]): runs as (flags, ticks)
+        """
+        self.binds = binds
+        self.hertz = hertz
+        self.runs = runs
+        self.ticks = sum(i[1] for i in runs)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        if data[:4] != _MAGIC:
+            raise ValueError("Not an input recording.")
+        version, hertz, amount = struct.unpack_from("<BHB", data, 4)
+        if version != _VERSION:
+            raise ValueError("Unsupported input recording version: "+str(version))
+
+        i = 8
+        binds = []
+        for n in range(amount):
+            length = data[i]
+            binds.append(data[i+1:i+1+length].decode("utf-8"))
+            i += 1+length
+
+        runs = []
+        while i < len(data):
+            flags, i = _read_varint(data, i)
+            count, i = _read_varint(data, i)
+            runs.append((flags, count))
+        return cls(binds, hertz, runs)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+            f.close()
+        return cls.from_bytes(data)
+
+    def events(self, flags: int) -> dict:
+        """Turns bind flags back into an events dict."""
+        return {name: bool(flags >> n & 1) for n, name in enumerate(self.binds)}
+
+    def __iter__(self):
+        for flags, count in self.runs:
+            yield self.events(flags), count
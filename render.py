@@ -1,9 +1,81 @@
-from datetime import datetime
+from collections import OrderedDict
+from physics import move_direction
+from timing import frame_timer
+from profiler import MAP_UPDATE, SPRITES, DRAW, DISPLAY_UPDATE
+from spatial import spatial_hash
 from objects import *
-import pygame, engine, json, math, os
+import pygame, engine, json, math, os, queue, threading
+import numpy as np
+
+class chunk_cache:
+    def __init__(self, max_bytes = 128*1024*1024, zoom_quantum = 4):
+        """**LRU cache for scaled map chunks.**\n
+
+        Scaling every visible chunk every frame is expensive, but the zoom only changes slowly (it follows the speed).
+        Scaled chunks are saved by mipmap level, chunk index and size on screen, where the size is rounded up to a multiple of ```zoom_quantum``` pixels (the zoom bucket).
+        Rounding up means neighbouring chunks overlap by a few pixels instead of leaving gaps.
+        When the surfaces in the cache take more than ```max_bytes```, the least recently used ones are thrown out.
+
+        Args:
+            max_bytes (int, optional): memory cap of all cached surfaces, in bytes. Defaults to 128 MiB.
+            zoom_quantum (int, optional): size of a zoom bucket, in pixels. Defaults to 4.
+        """
+        self.max_bytes = max_bytes
+        self.zoom_quantum = zoom_quantum
+        self._surfaces = OrderedDict()
+        self.bytes = 0
+
+        # debug values
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def bucket(self, size: tuple) -> tuple:
+        """Size on screen rounded up to the zoom bucket, the size chunks are scaled to."""
+        q = self.zoom_quantum
+        return (-(-int(size[0])//q)*q, -(-int(size[1])//q)*q)
+
+    def get(self, index: tuple, chunk: pygame.Surface, size: tuple, level = 0) -> pygame.Surface:
+        """Returns the chunk scaled to size, from the cache if possible.
+
+        Args:
+            index (tuple): x and y index of the chunk
+            chunk (pygame.Surface): unscaled chunk surface
+            size (tuple): width and height on screen, in pixels
+            level (int, optional): mipmap level the chunk is from. Defaults to 0.
+
+        Returns:
+            pygame.Surface: scaled chunk
+        """
+        w, h = self.bucket(size)
+        key = (level, index[0], index[1], w, h)
+        s = self._surfaces.get(key)
+        if s is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return s
+
+        self.misses += 1
+        s = pygame.transform.scale(chunk, (w, h))
+        self._surfaces[key] = s
+        self.bytes += w*h*s.get_bytesize()
+        # throw out least recently used chunks, but always keep the one just scaled
+        while self.bytes > self.max_bytes and len(self._surfaces) > 1:
+            k, old = self._surfaces.popitem(last=False)
+            self.bytes -= k[3]*k[4]*old.get_bytesize()
+            self.evictions += 1
+        return s
+
+    def clear(self):
+        self._surfaces.clear()
+        self.bytes = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits+self.misses
+        return self.hits/total if total else 0
 
 class map(obj):
-    def __init__(self, win_resolution: tuple, maptexture: str, size: list, chunksize: int, tolerance = 5):
+    def __init__(self, win_resolution: tuple, maptexture: str, size: list, chunksize: int, tolerance = 5, cache = None, mipmaps = True, min_mipmap = 16):
         """Child-class of obj specifically for displaying a map.
         
         The center of the map is the origin, meaning x,y = 0.\n
@@ -15,14 +87,15 @@ class map(obj):
             size (list): size of map, in units
             chunksize (int): width and height of a chunk in units
             tolerance (int, optional): tolerance at topleft and bottomright corner of camera when calculating visible chunks. Defaults to 0.
+            cache (chunk_cache, optional): cache for scaled chunks. Defaults to a new ```chunk_cache()```.
+            mipmaps (bool, optional): build a mipmap pyramid of the chunks (1/2, 1/4, ...), saved in a "mipmaps" folder next to the texture. Defaults to True.
+            min_mipmap (int, optional): smallest chunk size in pixels of the last mipmap level. Defaults to 16.
         """
         # super class constructor
         obj.__init__(self, win_resolution, {"default": maptexture}, [0, 0], size, 0)
-        t = self._textures["default"]
+        self._setup(chunksize, tolerance, cache)
         
         # split into chunks
-        self.chunksize = chunksize
-        self.tolerance = tolerance
         chunksize_in_pixels = (win_resolution[0]/(size[0]/chunksize), win_resolution[1]/(size[1]/chunksize))
         chunkamount = (round(size[0]/chunksize), round(size[1]/chunksize)) # amount fitting into width and height
         self.chunks = []
@@ -33,6 +106,121 @@ class map(obj):
                 # crop track to fit chunk
                 self.chunks[-1].append(pygame.Surface(chunksize_in_pixels, pygame.SRCALPHA))
                 self.chunks[-1][-1].blit(self._textures["default"], (-(chunksize_in_pixels[0]*x), -(chunksize_in_pixels[1]*y)))
+        
+        # mipmap levels, level 0 are the chunks themselves, every next level is half the size
+        self.levels = [self.chunks]
+        if mipmaps:
+            self._mipmap_dir = os.path.join(os.path.dirname(os.path.abspath(maptexture)), "mipmaps")
+            self._mipmap_key = {
+                "texture": os.path.basename(maptexture),
+                "mtime": os.path.getmtime(maptexture),
+                "chunk_pixels": list(self.chunks[0][0].get_size()),
+                "chunks": [len(self.chunks[0]), len(self.chunks)],
+            }
+            if not self._load_mipmaps():
+                self._build_mipmaps(min_mipmap)
+                self._save_mipmaps()
+        self._set_levels(self.levels)
+    
+    @classmethod
+    def from_levels(cls, win_resolution: tuple, levels: list, size: list, chunksize: int, tolerance = 5, cache = None):
+        """Creates a map out of chunks that are already cut, without loading a texture (used by ```session_bundle```).
+
+        Args:
+            win_resolution (tuple): resolution of the whole window ```(width, height)```
+            levels (list): mipmap levels, every level is a list of rows of chunk surfaces. Level 0 are the chunks themselves.
+            size (list): size of map, in units
+            chunksize (int): width and height of a chunk in units
+            tolerance (int, optional): tolerance at topleft and bottomright corner of camera when calculating visible chunks. Defaults to 5.
+            cache (chunk_cache, optional): cache for scaled chunks. Defaults to a new ```chunk_cache()```.
+        """
+        self = cls.__new__(cls)
+        obj.__init__(self, win_resolution, {}, [0, 0], size, 0)
+        self._setup(chunksize, tolerance, cache)
+        self._set_levels(levels)
+        return self
+    
+    def _setup(self, chunksize: int, tolerance: int, cache):
+        """Chunk values every kind of map has, no matter where its chunks come from."""
+        self.cache = cache if cache is not None else chunk_cache()
+        self.placeholder = (60, 60, 60) # color of chunks that arent loaded yet
+        self.chunksize = chunksize
+        self.tolerance = tolerance
+    
+    def _set_levels(self, levels: list):
+        """Takes the chunks of every mipmap level, level 0 are the chunks themselves."""
+        self.levels = levels
+        self.chunks = levels[0]
+        self._chunk_pixels = self.chunks[0][0].get_size()
+        self._level_amount = len(levels)
+    
+    def _build_mipmaps(self, min_size: int):
+        w, h = self.chunks[0][0].get_size()
+        while min(w, h)//2 >= min_size:
+            w, h = w//2, h//2
+            self.levels.append([[pygame.transform.smoothscale(c, (w, h)) for c in row] for row in self.levels[-1]])
+    
+    def _save_mipmaps(self):
+        """Saves every mipmap level (except level 0) as one image with all chunks next to each other, plus an index.json
+        that tells which texture and chunk layout they were made of."""
+        try:
+            os.makedirs(self._mipmap_dir, exist_ok=True)
+            for n, level in enumerate(self.levels[1:], 1):
+                w, h = level[0][0].get_size()
+                atlas = pygame.Surface((w*len(level[0]), h*len(level)), pygame.SRCALPHA)
+                for y, row in enumerate(level):
+                    for x, c in enumerate(row):
+                        atlas.blit(c, (x*w, y*h))
+                pygame.image.save(atlas, os.path.join(self._mipmap_dir, "level"+str(n)+".png"))
+            with open(os.path.join(self._mipmap_dir, "index.json"), "w") as f:
+                json.dump(dict(self._mipmap_key, levels=len(self.levels)-1), f)
+                f.close()
+        except OSError:
+            print("could not save mipmaps to "+self._mipmap_dir)
+    
+    def _load_mipmaps(self) -> bool:
+        """Loads the mipmap levels saved by ```_save_mipmaps```, if they were made of the same texture and chunk layout.
+        
+        Returns:
+            bool: True if the mipmaps were loaded
+        """
+        try:
+            with open(os.path.join(self._mipmap_dir, "index.json"), "r") as f:
+                index = json.load(f)
+                f.close()
+        except (OSError, ValueError):
+            return False
+        if {i: index.get(i) for i in self._mipmap_key.keys()} != self._mipmap_key:
+            return False
+        
+        w, h = self.chunks[0][0].get_size()
+        levels = []
+        try:
+            for n in range(1, index["levels"]+1):
+                w, h = w//2, h//2
+                atlas = pygame.image.load(os.path.join(self._mipmap_dir, "level"+str(n)+".png"))
+                levels.append([[atlas.subsurface((x*w, y*h, w, h)) for x in range(len(self.chunks[0]))] for y in range(len(self.chunks))])
+        except (OSError, pygame.error, ValueError):
+            return False
+        self.levels += levels
+        return True
+    
+    def _level(self, on_screen: float) -> int:
+        """Mipmap level whose chunks are the smallest ones still bigger than the chunk on screen (scaling down only from the nearest level)."""
+        w = self._chunk_pixels[0]
+        level = 0
+        while level+1 < self._level_amount and w//2 >= on_screen:
+            w //= 2
+            level += 1
+        return level
+    
+    def _chunk(self, level: int, index: tuple) -> pygame.Surface:
+        """Unscaled chunk surface at x, y index of a mipmap level. None means the chunk isnt available (yet)."""
+        return self.levels[level][index[1]][index[0]]
+    
+    def _visible(self, level: int, topleft: tuple, bottomright: tuple):
+        """Called every update with the range of visible chunks, for maps that load chunks on demand."""
+        pass
 
     def update(self, size: tuple, pos: tuple, scale: tuple):
         """Render map pos and size on screen.\n
@@ -61,11 +249,20 @@ class map(obj):
         # blit chunks on surface 
         chunk_on_screen = (self.chunksize*scale[0], self.chunksize*scale[1])
         # print(cam_on_map)
+        # level out of the bucketed size, so every zoom of a bucket scales from the same level
+        level = self._level(self.cache.bucket(chunk_on_screen)[0])
+        self._visible(level, chunk_topleft, chunk_bottomright)
         for x in range(chunk_bottomright[0]-chunk_topleft[0]+1):
             for y in range(chunk_bottomright[1]-chunk_topleft[1]+1):
                 try:
-                    t = self.chunks[chunk_topleft[1]+y][chunk_topleft[0]+x]
-                    self.image.blit(pygame.transform.scale(t, chunk_on_screen), self._scaled((cam_on_map[0]+self.chunksize*(chunk_topleft[0]+x), cam_on_map[1]+self.chunksize*(chunk_topleft[1]+y)), scale))
+                    index = (chunk_topleft[0]+x, chunk_topleft[1]+y)
+                    t = self._chunk(level, index)
+                    topleft = self._scaled((cam_on_map[0]+self.chunksize*(chunk_topleft[0]+x), cam_on_map[1]+self.chunksize*(chunk_topleft[1]+y)), scale)
+                    if t is None:
+                        # not loaded yet, draw a placeholder
+                        self.image.fill(self.placeholder, (topleft, chunk_on_screen))
+                    else:
+                        self.image.blit(self.cache.get(index, t, chunk_on_screen, level), topleft)
                 except:
                     print("out of bounds")
         #         print(str((chunk_topleft[0]+x, chunk_topleft[1]+y)),end=" ")
@@ -78,28 +275,187 @@ class map(obj):
         
         self.rect = self.image.get_rect()
 
-def move_direction(pos, direction_deg, distance) -> list:
-    """
-    Move from an initial position (x, y) by a certain distance in a specified direction.
+class streamed_map(map):
+    def __init__(self, win_resolution: tuple, tiles: str, size: list, chunksize: int, tolerance = 5, cache = None, margin = 1, keep = 3):
+        """Child-class of map that loads its chunks from tiles on disk, only when the camera gets close to them.\n
+
+        Tiles are made once with ```streamed_map.bake_tiles```. A background thread decodes requested tiles,
+        so the render thread never waits for the disk. Chunks that arent loaded yet are drawn as a placeholder.
+        Chunks further than ```keep``` chunks away from the visible ones are thrown out again.
+
+        Args:
+            win_resolution (tuple): resolution of the whole window ```(width, height)```
+            tiles (str): folder with the tiles, made by ```bake_tiles```
+            size (list): size of map, in units
+            chunksize (int): width and height of a chunk in units
+            tolerance (int, optional): tolerance at topleft and bottomright corner of camera when calculating visible chunks. Defaults to 5.
+            cache (chunk_cache, optional): cache for scaled chunks. Defaults to a new ```chunk_cache()```.
+            margin (int, optional): chunks around the visible ones that are loaded in advance. Defaults to 1.
+            keep (int, optional): distance in chunks from the visible ones, after which chunks are thrown out. Defaults to 3.
+        """
+        # no texture to load, the sprite is just the screen sized surface the chunks are drawn on
+        obj.__init__(self, win_resolution, {}, [0, 0], size, 0)
+        self._setup(chunksize, tolerance, cache)
+        self.margin = margin
+        self.keep = keep
+        
+        with open(os.path.join(tiles, "index.json"), "r") as f:
+            index = json.load(f)
+            f.close()
+        self._tiles_dir = tiles
+        self._chunk_pixels = tuple(index["chunk_pixels"])
+        self._chunk_count = tuple(index["chunks"])
+        self._level_amount = index["levels"]
+        
+        # loaded chunks, (level, x, y): surface. only the render thread touches it
+        self._loaded = {}
+        self._decoded = [] # (key, surface) decoded by the loader thread, converted and moved to _loaded by the render thread
+        self._requested = set()
+        self._lock = threading.Lock()
+        self._queue = queue.LifoQueue() # newest requests first, they are the ones closest to the camera
+        self._stop = threading.Event()
+        self._loader = threading.Thread(target=self._load_tiles, daemon=True)
+        self._loader.start()
     
-    :param x: Initial x-coordinate.
-    :param y: Initial y-coordinate.
-    :param direction_deg: Direction in degrees (0° is along the positive x-axis, increasing clockwise).
-    :param distance: Distance to move.
-    :return: Tuple (new_x, new_y) representing the new position.
-    """
-    # Convert direction from degrees to radians
-    direction_rad = math.radians(direction_deg-90)
+    @staticmethod
+    def bake_tiles(win_resolution: tuple, maptexture: str, size: list, chunksize: int, tiles: str, min_mipmap = 16):
+        """Cuts a map texture into one file per chunk and mipmap level, ```<tiles>/<level>/<x>_<y>.png```.
+        
+        This loads the whole texture once, after that the map can be streamed with ```streamed_map```.
+        
+        Args:
+            win_resolution (tuple): resolution of the whole window ```(width, height)```
+            maptexture (str): filepath of texture
+            size (list): size of map, in units
+            chunksize (int): width and height of a chunk in units
+            tiles (str): folder to save the tiles in
+            min_mipmap (int, optional): smallest chunk size in pixels of the last mipmap level. Defaults to 16.
+        """
+        m = map(win_resolution, maptexture, size, chunksize, mipmaps = False)
+        m._build_mipmaps(min_mipmap)
+        for n, level in enumerate(m.levels):
+            os.makedirs(os.path.join(tiles, str(n)), exist_ok=True)
+            for y, row in enumerate(level):
+                for x, c in enumerate(row):
+                    pygame.image.save(c, os.path.join(tiles, str(n), str(x)+"_"+str(y)+".png"))
+        with open(os.path.join(tiles, "index.json"), "w") as f:
+            json.dump({"chunk_pixels": list(m._chunk_pixels), "chunks": [len(m.chunks[0]), len(m.chunks)], "levels": len(m.levels)}, f)
+            f.close()
+    
+    def _load_tiles(self):
+        # loader thread: decode requested tiles until the map is closed
+        while not self._stop.is_set():
+            key = self._queue.get()
+            if key is None: break
+            if key not in self._requested: continue # thrown out before it was loaded
+            try:
+                surface = pygame.image.load(os.path.join(self._tiles_dir, str(key[0]), str(key[1])+"_"+str(key[2])+".png"))
+            except (OSError, pygame.error):
+                print("could not load tile "+str(key))
+                continue
+            with self._lock:
+                self._decoded.append((key, surface))
     
-    x, y = pos
-    # Calculate new coordinates
-    new_x = x + distance * math.cos(direction_rad)
-    new_y = y + distance * math.sin(direction_rad)
+    def _take_decoded(self):
+        # render thread: convert the tiles the loader decoded since the last update to the display format
+        with self._lock:
+            decoded, self._decoded = self._decoded, []
+            # only keep the ones that werent thrown out while loading
+            decoded = [(key, surface) for key, surface in decoded if key in self._requested]
+        converted = pygame.display.get_surface() is not None
+        for key, surface in decoded:
+            self._loaded[key] = surface.convert_alpha() if converted else surface
     
-    return [new_x, new_y]
+    def _chunk(self, level: int, index: tuple) -> pygame.Surface:
+        if not (0 <= index[0] < self._chunk_count[0] and 0 <= index[1] < self._chunk_count[1]):
+            raise IndexError("chunk out of bounds")
+        return self._loaded.get((level, index[0], index[1]))
+    
+    def _visible(self, level: int, topleft: tuple, bottomright: tuple):
+        # request visible chunks plus margin, closest to the middle last (so they are loaded first)
+        x0, y0 = max(0, topleft[0]-self.margin), max(0, topleft[1]-self.margin)
+        x1, y1 = min(self._chunk_count[0]-1, bottomright[0]+self.margin), min(self._chunk_count[1]-1, bottomright[1]+self.margin)
+        mx, my = (topleft[0]+bottomright[0])/2, (topleft[1]+bottomright[1])/2
+        wanted = [(level, x, y) for x in range(x0, x1+1) for y in range(y0, y1+1)]
+        wanted.sort(key=lambda k: -max(abs(k[1]-mx), abs(k[2]-my)))
+        self._take_decoded()
+        with self._lock:
+            for key in wanted:
+                if key not in self._requested:
+                    self._requested.add(key)
+                    self._queue.put(key)
+            
+            # throw out chunks that are far away or not of this or the next level
+            for key in list(self._requested):
+                if abs(key[0]-level) > 1 or key[1] < topleft[0]-self.keep or key[1] > bottomright[0]+self.keep or key[2] < topleft[1]-self.keep or key[2] > bottomright[1]+self.keep:
+                    self._requested.discard(key)
+                    self._loaded.pop(key, None)
+    
+    def close(self):
+        """Stops the loader thread and waits for the tile it is decoding."""
+        self._stop.set()
+        self._queue.put(None)
+        self._loader.join()
+
+class fleet:
+    def __init__(self, cars, template: vehicle):
+        """**Draws the vehicles of a ```world```, only the ones the camera sees.**\n
+
+        Screen positions of all vehicles are calculated at once from the arrays of the world, every vehicle outside of the camera is dropped right there.
+        Only the visible ones get a texture and are blitted in one call. The textures come out of a cache of the fleet's own,
+        over the textures and rotation sheet of the template vehicle.
+
+        Args:
+            cars (world): world with the vehicle arrays
+            template (vehicle): vehicle that gives size, state and texture of all cars, preferably with a rotation sheet
+        """
+        self.cars = cars
+        self.size = template.size
+        self.state = template.state
+        # keep every angle of at least two sizes, the cars all look in different directions
+        # its own cache, the one of the template is shared with every vehicle of its folder through assets.shared
+        t = template.texture
+        self.texture = t.copy(max(t.max_entries, 2*round(360/t.angle_quantum)))
+        self.sprites = [] # (surface, topleft) of the visible cars
+        self.visible = np.zeros(0, dtype=np.intp) # indices of the visible cars
+
+    def update(self, screen_size: tuple, cam_pos: tuple, scale: tuple, alpha = 1):
+        """Finds the visible cars and gets their textures.
+
+        Args:
+            screen_size (tuple): width and height of the screen in pixels
+            cam_pos (tuple): middle of camera, in units
+            scale (tuple): pixels per unit
+            alpha (float, optional): 0 = previous state, 1 = current state. Defaults to 1.
+        """
+        x, y, rotation = self.cars.interpolated(alpha)
+        size = (self.size[0]*scale[0], self.size[1]*scale[1])
+        frame = max(size)
+        sx = (x-cam_pos[0])*scale[0]+screen_size[0]/2
+        sy = (y-cam_pos[1])*scale[1]+screen_size[1]/2
+        self.visible = np.flatnonzero((sx > -frame) & (sx < screen_size[0]) & (sy > -frame) & (sy < screen_size[1]))
+
+        get, state = self.texture.get, self.state
+        sprites = []
+        for i, px, py, r in zip(self.visible.tolist(), sx[self.visible].tolist(), sy[self.visible].tolist(), rotation[self.visible].tolist()):
+            rotated = get(state, size, r)
+            sprites.append((rotated, (px+(frame-rotated.get_width())/2, py+(frame-rotated.get_height())/2)))
+        self.sprites = sprites
+
+    def draw(self, screen: pygame.Surface):
+        screen.blits(self.sprites, False)
 
 class render:
-    def __init__(self, size: tuple, cam_pos = [0, 0], cam_zoom = 10):
+    def __init__(self, size: tuple, cam_pos = [0, 0], cam_zoom = 10, dirty_rects = False, cell_size = 80):
+        """
+        Args:
+            size (tuple): window resolution ```(width, height)```
+            cam_pos (list, optional): middle of camera, in units. Defaults to [0, 0].
+            cam_zoom (int, optional): units in height displayed on screen. Defaults to 10.
+            dirty_rects (bool, optional): only update the parts of the screen that changed, as long as the camera stands still
+                (moves less than a pixel and zooms less than a pixel at the screen edge). Defaults to False.
+            cell_size (int, optional): cell size of the spatial hash in units, until a map is added, then its chunksize is used. Defaults to 80.
+        """
         # setup
         self.size = size
         self.ratio = size[0]/size[1]
@@ -107,21 +463,36 @@ class render:
         
         # power curve rendering
         self.graph_scale = (1, 1)
+        self._curve_cache = {} # rendered power curves
         
         # renderer values
         self.cam_pos = cam_pos # middle of camera
         self.cam_zoom = cam_zoom # units in height displayed on screen. width is calculated automatically
+        # camera of the previous physics tick, for interpolation. None = no interpolation
+        self.prev_cam_pos = None
+        self.prev_cam_zoom = cam_zoom
         # sprite (object) rendering
         self.all_sprites = pygame.sprite.Group()
         self.objects = {}
+        self.fleets = {} # many vehicles of a world, drawn over the objects
+        # every object except the map, by position. only the objects near the camera are visited
+        self.grid = spatial_hash(cell_size)
+        self.cull_margin = 2 # units around the camera, objects are interpolated a bit behind their position in the grid
+        self._visible = [] # objects that were on screen in the last frame
+        
+        # dirty rectangle rendering
+        self.dirty_rects = dirty_rects
+        self.dirty_fraction = 1 # fraction of screen area updated in the last frame
+        self._full_update = False # something was drawn over the whole screen outside of render (power curve), the next update has to be a full one
+        self._last_cam = None # camera in whole pixels, see _camera_key
+        self._prev_fleet_rects = [] # rects of the fleet cars in the last frame
+        self._prev_sprites = {} # name: (image, rect) of the last frame
         
         # performance debugging
-        self._frames = 0 # counted frames in timeframe
-        self._fps_short = 0 # fps counted in 0.2 seconds
-        self._fps_short_counted = 1
-        self._fps_begin = datetime.now() # start time of counting for 0.2 seconds
-        self._fps_prev = 0
+        self.timing = frame_timer() # frame times, ticks per frame and dropped ticks
         self.fps = 0
+        self.profiler = None # frame_profiler, None = not profiled
+        self._hud_font = None
         
         # graph display, temporary values
         self._graph_y_size = 10
@@ -135,6 +506,18 @@ class render:
         else:
             self.objects[name] = obj
             self.all_sprites.add(obj)
+            if name == "map":
+                self.grid.resize(obj.chunksize)
+            else:
+                # nothing is drawn until the object was in view once
+                obj.update(None, None, True)
+                self.grid.insert(obj, obj.pos, math.hypot(obj.size[0], obj.size[1]))
+                obj.grid = self.grid
+    
+    def add_fleet(self, name: str, f: fleet):
+        if name in self.fleets:
+            raise Exception("Fleet with this name already exists.")
+        self.fleets[name] = f
     
     def get_object(self, name: str) -> obj:
         return self.objects[name]
@@ -159,26 +542,44 @@ class render:
         return o.rotation
 
     # debugging: power curves
+    def _sample_curve(self, e: engine, width: float, step = 1):
+        """Samples the power curve of an engine once per pixel column, in one batched array evaluation of its lookup table.
+        
+        Args:
+            e (engine): Reference to engine
+            width (float): pixels per rev (x scale)
+            step (int, optional): pixels between two samples, steps below one pixel are drawn as one pixel. Defaults to 1.
+        
+        Returns:
+            tuple: x positions in pixels and torque values, as numpy arrays
+        """
+        curve = e.curve
+        columns = np.arange(0, int(curve.max_revs*width), max(step, 1))
+        grid = np.minimum(np.arange(curve.size)*curve.step, curve.max_revs)
+        return columns, np.interp(columns/width, grid, curve.table)
+    
     def power_curve(self, e: engine, step = 1):
         """Calculate and render powercurve.
         
-        This method clears the whole screen and calculates and render the powercurve from scratch.
-        Because we are doing everything from scratch, calling this method too often may cause performance issues, depending on the scaling.
+        The curve is sampled once per pixel column and drawn onto a surface, which is cached by engine curve, screen size and graph scale.
+        Drawing the same curve again is just one blit of that surface over the whole screen.
 
         Args:
             e (engine): Reference to engine
         """
-        self.screen.fill((0, 0, 0))
-
         scale = self.graph_scale
-        
-        # scaling
-        # steps
-        prev, now = (0, self.size[1]), (0, 0)
-        for i in range(int(( e._graphs_limits[-1] * scale[0] ) / step)):
-            now = (int(i*step), int(self.size[1] - (e._point_at_graph((i/scale[0])*step) * scale[1])))
-            pygame.draw.line(self.screen, (0, 0, 255), prev, now, 4)
-            prev = now
+        key = (tuple(e._graphs), tuple(e._graphs_limits), tuple(self.size), scale, step)
+        surface = self._curve_cache.get(key)
+        if surface is None:
+            surface = pygame.Surface(self.size)
+            surface.fill((0, 0, 0))
+            columns, torque = self._sample_curve(e, scale[0], step)
+            points = np.column_stack((columns, self.size[1]-torque*scale[1])).astype(int)
+            if len(points) > 1:
+                pygame.draw.lines(surface, (0, 0, 255), False, [(0, self.size[1])]+points.tolist(), 4)
+            self._curve_cache[key] = surface
+        self.screen.blit(surface, (0, 0))
+        self._full_update = True
             
     def set_graph_scale(self, e: engine, size: tuple, step = 1):
         """Set the scale of the graph rendered by giving it width and height in pixels.
@@ -193,45 +594,59 @@ class render:
         # calculate x scale
         w = size[0] / e._graphs_limits[-1]
         
-        # get maximum
-        max = 0
-        for i in range(0, int((e._graphs_limits[-1]*w)/step)):
-            y = e._point_at_graph((i/w)*step)
-            max = y if y > max else max
+        # get maximum of the pixels that are drawn
+        max = float(self._sample_curve(e, w, step)[1].max())
         
         # calculate y scale and save
         self.graph_scale = (w, size[1] / max)
     
     # debug values: fps
     def _update_frames(self):
-        """Updates the framerate value.
-        
-        Framerate is safed in the ```fps``` variable of this class. The fps value is rounded to the first decimal place.
+        """Ends a frame in ```self.timing``` and updates the framerate value.
         
-        There are two types of fps values here:
-        - fps short: quick, but low accuracy value: the frames rendered in 0.2 seconds
-        - fps long: slow, but high accuracy value: the frames rendered in 1 second
-        
-        The fps is a combination of the short and long fps values. Depending on how many short fps youve counted, thats the percentage of whats added from short fps and what from long fps:
-            fps = long_fps*(1-(0.2*short_counted)) + short_fps
-        
-        For example, if the short fps was counted 3 times, that means we have the fps value for 0.6 seconds, we add only 40% of the long fps.
-        This results in a smooth, semi-accurate but quicker fps value.
+        Framerate is safed in the ```fps``` variable of this class: the frames rendered in the last half second, rounded to the first decimal place.
+        For frame time percentiles (stutter) see ```self.timing.stats()```.
+        """
+        self.timing.frame()
+        self.fps = self.timing.fps
+    
+    # debug values: frame profiler hud
+    _hud_colors = ((200, 200, 200), (255, 220, 0), (255, 120, 0), (255, 40, 40), (0, 200, 0), (0, 200, 255), (60, 80, 255), (200, 0, 255))
+    _hud_line = 18
+    _hud_bar_width = 300
+    _hud_bar_ms = 33.3 # frame time the full bar stands for (30 fps)
+    
+    def _hud_rect(self) -> pygame.Rect:
+        return pygame.Rect(10, 10, self._hud_bar_width+20, (len(self.profiler.phases)+2)*self._hud_line+20)
+    
+    def _draw_hud(self) -> pygame.Rect:
+        """Draws the milliseconds of every profiled phase, averaged over the latest frames, and a stacked bar of them in the top left corner.
         
+        Returns:
+            pygame.Rect: area of the screen drawn on
         """
-        self._frames += 1
-        
-        elapsed = (datetime.now()-self._fps_begin).total_seconds()
-        if elapsed > 0.2*self._fps_short_counted:
-            self._fps_short = self._frames
-            self._fps_short_counted += 1
-        if self._fps_short_counted > 5:
-            self._fps_prev = self._frames
-            self._fps_short_counted = 1
-            self._fps_short = self._frames = 0
-            self._fps_begin = datetime.now()
-        
-        self.fps = round(self._fps_prev*(1-(0.2*self._fps_short_counted)) + self._fps_short, 1)    
+        if self._hud_font is None:
+            pygame.font.init()
+            self._hud_font = pygame.font.Font(None, 20)
+        font, line = self._hud_font, self._hud_line
+        rect = self._hud_rect()
+        self.screen.fill((20, 20, 20), rect)
+        
+        times = self.profiler.average()
+        x, y = rect.x+10, rect.y+10
+        total = 0
+        for n, name in enumerate(self.profiler.phases):
+            color = self._hud_colors[n % len(self._hud_colors)]
+            # stacked bar
+            start = int(total/self._hud_bar_ms*self._hud_bar_width)
+            total += times[n]
+            end = min(int(total/self._hud_bar_ms*self._hud_bar_width), self._hud_bar_width)
+            if end > start:
+                self.screen.fill(color, pygame.Rect(x+start, y, end-start, line-4))
+            # milliseconds per phase
+            self.screen.blit(font.render(name+" "+format(times[n], ".2f")+" ms", True, color), (x, y+(n+1)*line))
+        self.screen.blit(font.render("frame "+format(total, ".2f")+" ms", True, (255, 255, 255)), (x, y+(len(times)+1)*line))
+        return rect
     
     # actual renderer shit
     def get_events(self) -> list[pygame.event.EventType]:
@@ -240,27 +655,64 @@ class render:
     def update_graph(self, x=-1, y=-1):
         self._update_frames()
         
+        changed = []
         prev = self._tmp_graph_prev[0]
         if not x == -1:
-            pygame.draw.line(self.screen, (0, 0, 0), (0, 0), (self.size[0], 0), 20)
-            pygame.draw.line(self.screen, (255, 0, 0), (int(x), 0), (int(x), 10), 5)
+            changed.append(pygame.draw.line(self.screen, (0, 0, 0), (0, 0), (self.size[0], 0), 20))
+            changed.append(pygame.draw.line(self.screen, (255, 0, 0), (int(x), 0), (int(x), 10), 5))
         if not y == -1:
             px, py = x-self._graph_y_size/2, self.size[1]-(y-self._graph_y_size/2)*self.graph_scale[1]
-            pygame.draw.rect(self.screen, (255, 0, 0), pygame.Rect(px, py, self._graph_y_size, self._graph_y_size), self._graph_y_size)
+            changed.append(pygame.draw.rect(self.screen, (255, 0, 0), pygame.Rect(px, py, self._graph_y_size, self._graph_y_size), self._graph_y_size))
             
         
         self._tmp_graph_prev.append((x, y))
         if len(self._tmp_graph_prev) > self._graph_trail_length:
             if not prev[1] == -1:
-                pygame.draw.rect(self.screen, (0, 0, 0), pygame.Rect(prev[0]-self._graph_y_size/2, self.size[1]-((prev[1]-self._graph_y_size/2)*self.graph_scale[1]), self._graph_y_size, self._graph_y_size), self._graph_y_size)
+                changed.append(pygame.draw.rect(self.screen, (0, 0, 0), pygame.Rect(prev[0]-self._graph_y_size/2, self.size[1]-((prev[1]-self._graph_y_size/2)*self.graph_scale[1]), self._graph_y_size, self._graph_y_size), self._graph_y_size))
             del prev
         
-        pygame.display.update()
+        if self.dirty_rects and not self._full_update:
+            self._update_rects(changed)
+        else:
+            # the whole curve was drawn again, the changed rects dont cover it
+            self._full_update = False
+            self.dirty_fraction = 1
+            pygame.display.update()
+    
+    def _update_rects(self, rects: list):
+        """Updates only the given rectangles of the screen and saves how much of the screen that was in ```self.dirty_fraction```."""
+        screen = self.screen.get_rect()
+        area = 0
+        for r in rects:
+            c = r.clip(screen)
+            area += c.width*c.height
+        self.dirty_fraction = min(1, area/(screen.width*screen.height))
+        pygame.display.update(rects)
     
-    def render(self):
+    def _camera_key(self, cam_pos: tuple, cam_zoom: float, scale: tuple) -> tuple:
+        """Camera quantized to what can be seen: position in whole pixels, zoom in steps of about a pixel at the screen edge.
+        Two frames with the same key show the map at the same place."""
+        return (round(cam_pos[0]*scale[0]), round(cam_pos[1]*scale[1]), round(math.log(cam_zoom)*self.size[1]/2))
+
+    def render(self, alpha = 1):
+        """Render all objects and the map on screen.
+        
+        With ```alpha``` the state in between the last two physics ticks is rendered: objects and camera are interpolated
+        from their previous (```prev_pos```, ```prev_rotation```, ```prev_cam_pos```, ```prev_cam_zoom```) to their current values.
+        That way the rendering stays smooth even when physics runs at a lower rate than the frames.
+
+        Args:
+            alpha (float, optional): 0 = previous state, 1 = current state. Defaults to 1.
+        """
         self._update_frames()
+        
+        # interpolated camera
+        cam_pos, cam_zoom = self.cam_pos, self.cam_zoom
+        if alpha != 1 and self.prev_cam_pos is not None:
+            cam_pos = (self.prev_cam_pos[0]+(cam_pos[0]-self.prev_cam_pos[0])*alpha, self.prev_cam_pos[1]+(cam_pos[1]-self.prev_cam_pos[1])*alpha)
+            cam_zoom = self.prev_cam_zoom+(cam_zoom-self.prev_cam_zoom)*alpha
 
-        scale = (self.size[0] / (self.cam_zoom*self.ratio), self.size[1] / self.cam_zoom)
+        scale = (self.size[0] / (cam_zoom*self.ratio), self.size[1] / cam_zoom)
         # for i in self.objects.values():
         #     i._img = pygame.Surface((i.size[0]*scale[0], i.size[1]*scale[1]))
         #     i._img.blit(i._textures[i.state], (0, 0))
@@ -270,14 +722,82 @@ class render:
             
             # i._rect.x, i._rect.y = ((i.pos[0]-self.cam_pos[0])*scale[0], (i.pos[1]-self.cam_pos[1])*scale[1])
         
-        for j in self.objects.keys():
-            i = self.objects[j]
-            if j == "map":
-                i.update(((self.cam_zoom*self.ratio), self.cam_zoom), self.cam_pos, scale)
-            else:
-                size = ((i.size[0]*scale[0]), i.size[1]*scale[1])
-                pos = ((i.pos[0]-self.cam_pos[0]+(self.size[0]/scale[0])/2)*scale[0], (i.pos[1]-self.cam_pos[1]+(self.size[1]/scale[1])/2)*scale[1])
-                outside_cam = pos[0] < -size[0] or pos[0]-size[0]/2 > self.size[0] or -size[1] > pos[1] or pos[1]-size[1]/2 > self.size[1]
-                i.update(pos, size, outside_cam)
-        self.all_sprites.draw(self.screen)
-        pygame.display.update()
\ No newline at end of file
+        # when the camera moved or zoomed, everything on screen changed
+        cam = self._camera_key(cam_pos, cam_zoom, scale)
+        full = not self.dirty_rects or cam != self._last_cam
+        self._last_cam = cam
+        
+        prof = self.profiler
+        m = self.objects.get("map")
+        if m is not None:
+            if full:
+                m.update(((cam_zoom*self.ratio), cam_zoom), cam_pos, scale)
+            if prof: prof.mark(MAP_UPDATE)
+        
+        # objects near the camera, plus the ones that were visible before (they have to be hidden when they left)
+        w, h = cam_zoom*self.ratio/2+self.cull_margin, cam_zoom/2+self.cull_margin
+        near = self.grid.query_rect(cam_pos[0]-w, cam_pos[1]-h, cam_pos[0]+w, cam_pos[1]+h)
+        if self._visible:
+            seen = set(near)
+            near += [i for i in self._visible if i not in seen]
+        visible = []
+        for i in near:
+            opos, rotation = i.interpolated(alpha)
+            size = ((i.size[0]*scale[0]), i.size[1]*scale[1])
+            pos = ((opos[0]-cam_pos[0]+(self.size[0]/scale[0])/2)*scale[0], (opos[1]-cam_pos[1]+(self.size[1]/scale[1])/2)*scale[1])
+            outside_cam = pos[0] < -size[0] or pos[0]-size[0]/2 > self.size[0] or -size[1] > pos[1] or pos[1]-size[1]/2 > self.size[1]
+            i.update(pos, size, outside_cam, rotation)
+            if not outside_cam: visible.append(i)
+        self._visible = visible
+        if prof: prof.mark(SPRITES)
+        for i in self.fleets.values():
+            i.update(self.size, cam_pos, scale, alpha)
+        if prof and self.fleets: prof.mark(SPRITES)
+        hud = prof is not None and prof.show_hud
+        # fleet cars on screen, they are dirty at their old and new place
+        fleet_sprites = [i for f in self.fleets.values() for i in f.sprites] if self.dirty_rects else []
+        fleet_rects = [s.get_rect(topleft = pos) for s, pos in fleet_sprites]
+        
+        if full:
+            self.all_sprites.draw(self.screen)
+            for i in self.fleets.values():
+                i.draw(self.screen)
+            if hud: self._draw_hud()
+            if prof: prof.mark(DRAW)
+            self.dirty_fraction = 1
+            pygame.display.update()
+            if prof: prof.mark(DISPLAY_UPDATE)
+        else:
+            # only objects that moved or changed their texture are dirty, at their old and new place
+            dirty = []
+            for j, i in self.objects.items():
+                if j == "map": continue
+                prev = self._prev_sprites.get(j)
+                if prev is None or prev[0] is not i.image or prev[1] != i.rect:
+                    dirty.append(i.rect.copy())
+                    if prev is not None: dirty.append(prev[1])
+            dirty += fleet_rects
+            dirty += self._prev_fleet_rects
+            if hud: dirty.append(self._hud_rect())
+            
+            # restore the background under dirty rects, then draw the objects touching them again
+            background = self.objects.get("map")
+            for r in dirty:
+                if background is not None:
+                    self.screen.blit(background.image, r, r)
+                else:
+                    self.screen.fill((0, 0, 0), r)
+            for j, i in self.objects.items():
+                if j != "map" and i.rect.collidelist(dirty) != -1:
+                    self.screen.blit(i.image, i.rect)
+            self.screen.blits([i for i, r in zip(fleet_sprites, fleet_rects) if r.collidelist(dirty) != -1], False)
+            if hud: self._draw_hud()
+            if prof: prof.mark(DRAW)
+            self._update_rects(dirty)
+            if prof: prof.mark(DISPLAY_UPDATE)
+        
+        # remember where every object was
+        self._prev_fleet_rects = fleet_rects
+        for j, i in self.objects.items():
+            if j != "map":
+                self._prev_sprites[j] = (i.image, i.rect.copy())
@@ -0,0 +1,108 @@
+import time
+
+class scheduler:
+    def __init__(self, hertz: int, max_fps = 0, max_ticks = 5, max_catch_up = 0.25, spin = 0.0002, timer = None):
+        """**Paces the main loop on a monotonic clock: how many physics ticks are due, and sleeping until the next deadline.**\n
+
+        Elapsed time (```perf_counter_ns```) is added to an accumulator, every ```1/hertz``` seconds in it is one physics tick.
+        In between, ```wait``` sleeps until the next deadline instead of spinning: the next physics tick, or with ```max_fps``` the next frame.
+        The OS wakes a sleeping thread a bit late, so the last ```spin``` seconds are waited in a loop to hit the deadline precisely.
+
+        After a stall (window dragged, machine busy) the loop wont try to calculate everything it missed at once (the spiral of death):
+        only ```max_ticks``` ticks run per frame, the rest waits for the next frames (time runs slower for a moment).
+        Time behind by more than ```max_catch_up``` seconds is dropped, those ticks are never calculated and are counted in ```skipped```.
+
+        Args:
+            hertz (int): physics ticks per second
+            max_fps (int, optional): frames per second cap, 0 = one frame per physics tick deadline. Defaults to 0.
+            max_ticks (int, optional): most physics ticks calculated per frame. Defaults to 5.
+            max_catch_up (float, optional): seconds the physics may fall behind before ticks are dropped. Defaults to 0.25.
+            spin (float, optional): seconds before a deadline to stop sleeping and busy wait instead. Defaults to 0.0002.
+            timer (frame_timer, optional): skipped ticks are counted there as dropped too. Defaults to None.
+        """
+        self.dt = round(1e9/hertz) # in ns
+        self.frame_time = round(1e9/max_fps) if max_fps else 0 # in ns, 0 = no cap
+        # a capped frame rate below the tick rate needs more ticks per frame, otherwise the physics could never keep up
+        self.max_ticks = max(max_ticks, -(-hertz//max_fps)+1) if max_fps else max_ticks
+        self.max_catch_up = max(int(max_catch_up*hertz), self.max_ticks) # in ticks
+        self.spin = int(spin*1e9)
+        self.timer = timer
+        self.clock = time.perf_counter_ns
+
+        # counters
+        self.ticks = 0 # physics ticks handed out
+        self.skipped = 0 # ticks dropped because the physics fell behind more than max_catch_up
+        self.deferred = 0 # ticks moved to a later frame because of max_ticks
+        self.idle = 0 # ns spent waiting
+
+        self._acc = 0 # ns not calculated yet
+        self._last = None
+        self._next_frame = 0
+        self._started = 0
+
+    def start(self):
+        """Starts counting time, call right before the loop."""
+        self._last = self._started = self._next_frame = self.clock()
+        self._acc = 0
+
+    def due(self) -> int:
+        """Amount of physics ticks to calculate now, limited by the catch-up budget."""
+        now = self.clock()
+        self._acc += now-self._last
+        self._last = now
+        n = self._acc//self.dt
+        if n > self.max_catch_up:
+            # too far behind, forget about the oldest ticks
+            drop = n-self.max_catch_up
+            self._acc -= drop*self.dt
+            self.skipped += drop
+            if self.timer: self.timer.drop(drop)
+            n = self.max_catch_up
+        if n > self.max_ticks:
+            # catch up over the next frames
+            self.deferred += n-self.max_ticks
+            n = self.max_ticks
+        self._acc -= n*self.dt
+        self.ticks += n
+        return n
+
+    def alpha(self) -> float:
+        """How far the time is in between the last and the next physics tick (0-1), for interpolated rendering."""
+        a = self._acc/self.dt
+        return a if a < 1 else 1
+
+    def deadline(self) -> int:
+        """Time (```clock```, ns) the next frame is due. Asking doesnt change it, ```wait``` moves on to the next frame.
+        With a frame cap it is one ```frame_time``` after the previous frame, but never before the last ```due``` (frames missed
+        in a stall arent rendered late, the next one is right away). Without a cap it is the next physics tick."""
+        if self.frame_time:
+            # dont try to render missed frames
+            return max(self._next_frame+self.frame_time, self._last)
+        return self._last+self.dt-self._acc
+
+    def wait(self):
+        """Sleeps until ```deadline```, the last ```spin``` ns are waited actively."""
+        deadline = self.deadline()
+        if self.frame_time:
+            self._next_frame = deadline
+        begin = self.clock()
+        remaining = deadline-begin
+        if remaining > self.spin:
+            time.sleep((remaining-self.spin)/1e9)
+        while self.clock() < deadline:
+            pass
+        self.idle += self.clock()-begin
+
+    def stats(self) -> dict:
+        """Counters and the share of time spent working (not waiting) since ```start```.
+
+        Returns:
+            dict: ```{"ticks", "skipped", "deferred", "busy"}```
+        """
+        elapsed = self.clock()-self._started
+        return {
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+            "deferred": self.deferred,
+            "busy": 1-self.idle/elapsed if elapsed > 0 else 0,
+        }
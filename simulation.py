@@ -0,0 +1,198 @@
+from physics import physics
+from engine import engine
+from profiler import CONTROLS, UPDATE_REVS, MOVEMENT
+import json
+
+def load_configs(root = ".") -> dict:
+    """Loads every config the simulation needs.
+
+    Args:
+        root (str, optional): folder with config.json, session.json, vehicles/ and maps/. Defaults to ".".
+
+    Returns:
+        dict: ```{"config", "session", "engines", "transmissions", "tires", "vehicle", "map"}```
+    """
+    configs = {}
+    with open(root+"/config.json", "r") as f:
+        configs["config"] = json.load(f)
+        f.close()
+
+    with open(root+"/session.json", "r") as f:
+        configs["session"] = json.load(f)
+        f.close()
+
+    with open(root+"/vehicles/engines.json", "r") as f:
+        configs["engines"] = json.load(f)
+        f.close()
+
+    with open(root+"/vehicles/transmissions.json", "r") as f:
+        configs["transmissions"] = json.load(f)
+        f.close()
+
+    with open(root+"/vehicles/tires.json", "r") as f:
+        configs["tires"] = json.load(f)
+        f.close()
+
+    with open(root+"/vehicles/"+configs["session"]["vehicle"]+"/vehicle.json", "r") as f:
+        configs["vehicle"] = json.load(f)
+        f.close()
+
+    with open(root+"/maps/"+configs["session"]["map"]+"/map.json", "r") as f:
+        configs["map"] = json.load(f)
+        f.close()
+    return configs
+
+def controls(inputs: dict) -> tuple:
+    """Turns the states of the binds into control values.
+
+    Args:
+        inputs (dict): states of the binds, ```{"throttle_100": True, ...}```
+
+    Returns:
+        tuple: throttle (0-1), brake (0-1) and steer (-1 = full left, 1 = full right)
+    """
+    if inputs["throttle_100"]:
+        throttle = 1
+    elif inputs["throttle_50"]:
+        throttle = 0.5
+    else:
+        throttle = 0
+
+    if inputs["brake_100"]:
+        brake = 1
+    elif inputs["brake_50"]:
+        brake = 0.5
+    else:
+        brake = 0
+
+    if inputs["left_100"]:
+        steer = -1
+    elif inputs["left_50"]:
+        steer = -0.5
+    elif inputs["right_50"]:
+        steer = 0.5
+    elif inputs["right_100"]:
+        steer = 1
+    else:
+        steer = 0
+    return throttle, brake, steer
+
+class simulation:
+    def __init__(self, configs: dict, pos = [0, 0], rotation = 0):
+        """**The simulation core: controls, engine and movement of one vehicle, without any rendering.**\n
+
+        Everything that happens in one physics tick lives in ```step```. The renderer only reads the resulting state
+        (```pos```, ```rotation```, ```cam_zoom```, ```cam_pos```), so the same core can be driven by the window, the headless runner or benchmarks.
+        Stepping is deterministic, the same sequence of inputs always results in the exact same state.
+
+        Args:
+            configs (dict): configs from ```load_configs```
+            pos (list, optional): start position in world, in units. Defaults to [0, 0].
+            rotation (int, optional): start rotation in degrees. Defaults to 0.
+        """
+        self.configs = configs
+        self.hz = configs["config"]["hertz"]
+        self.dt = 1/self.hz
+
+        # setup physics simulation, the vehicle state lives in there
+        self.physics = physics(configs["vehicle"], configs["tires"].get(configs["session"].get("tires")), configs["config"].get("substeps", 4))
+        self.physics.x, self.physics.y = pos
+        self.physics.rotation = rotation
+
+        # load engine
+        cur_engine = configs["engines"][configs["vehicle"]["engine"]]
+        self.transmission = configs["transmissions"][configs["vehicle"]["transmission"]]
+        self.motor = engine(cur_engine["functions"], cur_engine["limits"], cur_engine["idle_revs"], cur_engine["resistance"])
+
+        # vehicle state
+        self.pos = list(pos)
+        self.rotation = rotation
+        self.speed = 0 # units per second, negative = reversing
+        self.steer = 0
+        self.brake = 0
+        self.ticks = 0
+
+        # frame_profiler, None = not profiled
+        self.profiler = None
+        # surface_map of the map, when set the surface under the wheels changes grip and rolling resistance every tick and walls stop the vehicle
+        self.surface = None
+        self.wheels = None # surface classes under front left, front right, rear left, rear right wheel
+        self.wall_depth = 0.0 # how deep the deepest wheel is inside of a wall
+        self._contact_at = None # (x, y, rotation) wheels and wall_depth were looked up at
+
+        ### start of testing values ###
+        self.defaultzoom = 40
+        self.zoom_per_speed = 2 # zooms out with the speed, in units per m/s
+        self.brakeforce = 0.27 # engine resistance when braking
+        ### end of testing values ###
+
+        # camera follows the vehicle
+        self.cam_zoom = self.defaultzoom
+        self.cam_pos = self.pos
+
+        # state before the last tick, so the renderer can interpolate in between
+        self.prev_pos = self.pos
+        self.prev_rotation = self.rotation
+        self.prev_cam_zoom = self.cam_zoom
+        self.prev_cam_pos = self.cam_pos
+
+    def step(self, inputs: dict, n = 1):
+        """Calculates the next n physics ticks with the same inputs.
+
+        Args:
+            inputs (dict): states of the binds, like the ```events``` dict in main.py (```{"throttle_100": True, ...}```)
+            n (int, optional): amount of ticks to calculate. Defaults to 1.
+        """
+        # controls module
+        throttle, brake, steer = controls(inputs)
+
+        prof = self.profiler
+        if prof: prof.mark(CONTROLS)
+
+        motor = self.motor
+        motor.throttle = throttle
+        resistance = 0.9+self.brakeforce*brake
+        p = self.physics
+        dt = self.dt
+        surface = self.surface
+        if surface is not None:
+            v = self.configs["vehicle"]
+            width, length = v["axle_width"], v["wheelbase"]
+            if self._contact_at != (p.x, p.y, p.rotation):
+                self.wheels, self.wall_depth = surface.contact(p.x, p.y, p.rotation, width, length)
+
+        for i in range(n):
+            px, py, prot, pspeed = p.x, p.y, p.rotation, p.speed
+            # engine calculations
+            motor.update_revs(resistance) # FIX BREAKING (engine class)
+            if prof: prof.mark(UPDATE_REVS)
+
+            # forces, steering and movement
+            if surface is not None:
+                fl, fr, rl, rr = self.wheels
+                grip, rolling = surface.grip, surface.rolling
+                p.surface_grip = (grip[fl]+grip[fr]+grip[rl]+grip[rr])/4
+                p.surface_rolling = (rolling[fl]+rolling[fr]+rolling[rl]+rolling[rr])/4
+            p.step(dt, motor.torque, motor.revs, throttle, brake, steer)
+            if surface is not None:
+                wheels, depth = surface.contact(p.x, p.y, p.rotation, width, length)
+                if depth > self.wall_depth:
+                    # drove (deeper) into a wall: stays where it was, the speed into the wall is gone
+                    p.x, p.y, p.rotation, p.speed = px, py, prot, 0.0
+                else:
+                    self.wheels, self.wall_depth = wheels, depth
+            if prof: prof.mark(MOVEMENT)
+
+        if n:
+            self.prev_pos = self.prev_cam_pos = [px, py]
+            self.prev_rotation = prot
+            self.prev_cam_zoom = self.defaultzoom+abs(pspeed)*self.zoom_per_speed
+        x, y, rotation = p.x, p.y, p.rotation
+        self.speed, self.brake, self.steer = p.speed, brake, steer
+        self.pos = [x, y]
+        self.rotation = rotation
+        self.cam_zoom = self.defaultzoom+abs(p.speed)*self.zoom_per_speed
+        self.cam_pos = self.pos
+        self.ticks += n
+        if surface is not None:
+            self._contact_at = (x, y, rotation)
@@ -0,0 +1,101 @@
+import math
+
+class spatial_hash:
+    def __init__(self, cell_size: float):
+        """**Uniform grid of cells that knows which objects are in which cell.**\n
+
+        Objects are saved with their position and radius in the cell their position lies in. Moving an object only touches the grid
+        when it changes the cell, so keeping the grid up to date costs next to nothing. Queries only look at the cells around the
+        asked area (grown by the biggest radius) instead of at every object.
+
+        The renderer uses a grid with the ```chunksize``` of the map as cell size.
+
+        Args:
+            cell_size (float): width and height of a cell, in units
+        """
+        self.cell_size = cell_size
+        self._cells = {} # (cell x, cell y): set of objects
+        self._items = {} # object: [x, y, radius, cell]
+        self.max_radius = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item) -> bool:
+        return item in self._items
+
+    def _cell(self, x: float, y: float) -> tuple:
+        return (math.floor(x/self.cell_size), math.floor(y/self.cell_size))
+
+    def insert(self, item, pos: tuple, radius = 0):
+        """Adds an object (any hashable) at a position, with the radius of a circle around it."""
+        if item in self._items:
+            self.remove(item)
+        cell = self._cell(pos[0], pos[1])
+        self._items[item] = [pos[0], pos[1], radius, cell]
+        self._cells.setdefault(cell, set()).add(item)
+        if radius > self.max_radius: self.max_radius = radius
+
+    def move(self, item, pos: tuple):
+        """Updates the position of an object, the grid only changes when it moved into another cell."""
+        entry = self._items[item]
+        entry[0], entry[1] = pos[0], pos[1]
+        cell = self._cell(pos[0], pos[1])
+        if cell != entry[3]:
+            old = self._cells[entry[3]]
+            old.discard(item)
+            if not old: del self._cells[entry[3]]
+            self._cells.setdefault(cell, set()).add(item)
+            entry[3] = cell
+
+    def remove(self, item):
+        x, y, radius, cell = self._items.pop(item)
+        items = self._cells[cell]
+        items.discard(item)
+        if not items: del self._cells[cell]
+
+    def resize(self, cell_size: float):
+        """Sorts every object into cells of a new size."""
+        items = self._items
+        self.cell_size = cell_size
+        self._cells, self._items = {}, {}
+        for item, (x, y, radius, cell) in items.items():
+            self.insert(item, (x, y), radius)
+
+    def _candidates(self, left: float, top: float, right: float, bottom: float):
+        r = self.max_radius
+        x0, y0 = self._cell(left-r, top-r)
+        x1, y1 = self._cell(right+r, bottom+r)
+        cells = self._cells
+        if (x1-x0+1)*(y1-y0+1) > len(cells):
+            # the area covers more cells than there are filled ones
+            for cell, items in cells.items():
+                if x0 <= cell[0] <= x1 and y0 <= cell[1] <= y1:
+                    yield from items
+        else:
+            for cx in range(x0, x1+1):
+                for cy in range(y0, y1+1):
+                    items = cells.get((cx, cy))
+                    if items: yield from items
+
+    def query_rect(self, left: float, top: float, right: float, bottom: float) -> list:
+        """Objects whose circle (as a square around it) overlaps the rectangle, in units with top < bottom."""
+        found = []
+        items = self._items
+        for item in self._candidates(left, top, right, bottom):
+            x, y, radius, cell = items[item]
+            if left-radius <= x <= right+radius and top-radius <= y <= bottom+radius:
+                found.append(item)
+        return found
+
+    def query_radius(self, pos: tuple, r: float) -> list:
+        """Objects whose circle touches the circle with radius r around pos."""
+        px, py = pos
+        found = []
+        items = self._items
+        for item in self._candidates(px-r, py-r, px+r, py+r):
+            x, y, radius, cell = items[item]
+            d = r+radius
+            if (x-px)**2+(y-py)**2 <= d*d:
+                found.append(item)
+        return found
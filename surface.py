@@ -0,0 +1,224 @@
+import numpy as np
+import pygame, math, os
+
+# surface classes, as saved in the grid
+ASPHALT, KERB, GRASS, WALL = range(4)
+SURFACES = ("asphalt", "kerb", "grass", "wall")
+# grip (sideways and braking) and rolling resistance on every surface class, relative to asphalt
+GRIP = (1.0, 0.9, 0.6, 0.6)
+ROLLING = (1.0, 1.5, 8.0, 8.0)
+
+# colours a texture is classified by, every pixel gets the class of the nearest colour
+# can be replaced per map with "surfaces" in map.json, a companion mask image ("surface_mask") should use these exact colours
+PALETTE = {
+    "asphalt": [[0, 0, 0], [90, 90, 90]],
+    "kerb": [[200, 30, 30]],
+    "grass": [[255, 255, 255], [60, 140, 60]],
+    "wall": [[0, 0, 255]],
+}
+
+def classify(image: str, palette = PALETTE) -> np.ndarray:
+    """Turns every pixel of an image into the surface class of the nearest palette colour.
+
+    Args:
+        image (str): filepath of the image
+        palette (dict, optional): surface names and lists of rgb colours. Defaults to PALETTE.
+
+    Returns:
+        np.ndarray: uint8 classes, indexed ```[y, x]``` in pixels
+    """
+    rgb = pygame.surfarray.array3d(pygame.image.load(image)).transpose(1, 0, 2).astype(np.int32)
+    classes = np.full(rgb.shape[:2], GRASS, dtype=np.uint8)
+    nearest = np.full(rgb.shape[:2], np.iinfo(np.int32).max, dtype=np.int32)
+    for name, colours in palette.items():
+        for c in colours:
+            d = ((rgb-np.array(c, dtype=np.int32))**2).sum(axis=2)
+            closer = d < nearest
+            nearest[closer] = d[closer]
+            classes[closer] = SURFACES.index(name)
+    return classes
+
+def _sweep_rows(d: np.ndarray):
+    """Chamfer passes top to bottom and bottom to top: every row takes the distance of the row before plus 1 (straight) or sqrt(2) (diagonal)."""
+    diagonal = math.sqrt(2)
+    for rows in (range(1, len(d)), range(len(d)-2, -1, -1)):
+        step = 1 if rows.start < rows.stop else -1
+        for i in rows:
+            prev = d[i-step]
+            cand = prev+1
+            np.minimum(cand[1:], prev[:-1]+diagonal, out=cand[1:])
+            np.minimum(cand[:-1], prev[1:]+diagonal, out=cand[:-1])
+            np.minimum(d[i], cand, out=d[i])
+
+def chamfer(seeds: np.ndarray) -> np.ndarray:
+    """Distance of every cell to the nearest seed cell, in cells, with a chamfer transform (straight steps 1, diagonal steps sqrt(2)).
+
+    Four sweeps (down, up, right, left) each carry the distances one row or column further, every shortest chamfer path lies in one of their directions.
+
+    Args:
+        seeds (np.ndarray): bool grid, True where the distance is 0
+
+    Returns:
+        np.ndarray: float32 distances, inf when there are no seeds
+    """
+    d = np.where(seeds, 0, np.inf).astype(np.float32)
+    _sweep_rows(d)
+    t = np.ascontiguousarray(d.T) # columns as rows, so every sweep works on contiguous memory
+    _sweep_rows(t)
+    return np.ascontiguousarray(t.T)
+
+class surface_map:
+    def __init__(self, classes: np.ndarray, boundary: np.ndarray, wall: np.ndarray, size: list):
+        """**Surface class and distance to the track edge for every pixel of a map, for lookups with arrays of positions.**\n
+
+        Positions are in world units with the map center as origin, like the ```map``` render object. They are converted to pixels with
+        texture size / map size, so the grid lines up with the texture no matter what resolution it has.
+
+        Args:
+            classes (np.ndarray): uint8 surface classes, indexed ```[y, x]``` (see ```SURFACES```)
+            boundary (np.ndarray): float32 signed distance to the edge of the drivable surface (asphalt and kerb) in units, positive on it, negative off it
+            wall (np.ndarray): float32 distance to the nearest pixel that isnt wall in units, 0 outside of walls
+            size (list): size of the map in units
+        """
+        self.classes = classes
+        self.boundary = boundary
+        self.wall = wall
+        self.size = size
+        self.pixels_per_unit = (classes.shape[1]/size[0], classes.shape[0]/size[1])
+        self.grip = GRIP # per surface class, used by the physics
+        self.rolling = ROLLING
+
+    @classmethod
+    def build(cls, image: str, size: list, palette = PALETTE):
+        """Classifies an image and calculates the distance field. Takes a moment on big textures, see ```load``` for the cached version."""
+        classes = classify(image, palette)
+        drivable = classes <= KERB
+        # distance of the track to the nearest offtrack pixel and the other way around
+        inside = chamfer(~drivable)
+        outside = chamfer(drivable)
+        unit = (classes.shape[1]/size[0]+classes.shape[0]/size[1])/2
+        boundary = (np.where(drivable, inside, -outside)/unit).astype(np.float32)
+        wall = classes == WALL
+        depth = (chamfer(~wall)/unit).astype(np.float32) if wall.any() else np.zeros(classes.shape, dtype=np.float32)
+        return cls(classes, boundary, depth, size)
+
+    @classmethod
+    def load(cls, folder: str, mapdata: dict):
+        """Loads the surface map of a map folder, from ```surface.npy```, ```boundary.npy``` and ```wall.npy``` if they are newer than
+        the texture, the mask and map.json. Otherwise it is built and saved there.
+
+        Args:
+            folder (str): map folder, e.g. "maps/track2"
+            mapdata (dict): content of map.json. Uses ```texture```, ```size``` and optionally ```surface_mask``` and ```surfaces``` (palette).
+
+        Returns:
+            surface_map: surface map of the map
+        """
+        image = os.path.join(folder, mapdata.get("surface_mask", mapdata["texture"]))
+        files = [os.path.join(folder, i) for i in ("surface.npy", "boundary.npy", "wall.npy")]
+        sources = [image, os.path.join(folder, "map.json")]
+        newest = max(os.path.getmtime(i) for i in sources if os.path.exists(i))
+
+        if all(os.path.exists(i) for i in files) and min(os.path.getmtime(i) for i in files) >= newest:
+            return cls(*[np.load(i, mmap_mode="r") for i in files], mapdata["size"])
+
+        s = cls.build(image, mapdata["size"], mapdata.get("surfaces", PALETTE))
+        for f, array in zip(files, (s.classes, s.boundary, s.wall)):
+            np.save(f, array)
+        return s
+
+    @classmethod
+    def of_session(cls, configs: dict, root = "."):
+        """Surface map of the session map, the way ```main.py``` attaches it. None for streamed maps, they have no surface map.
+
+        Args:
+            configs (dict): configs from ```load_configs```
+            root (str, optional): folder the configs were loaded from. Defaults to ".".
+
+        Returns:
+            surface_map: surface map of the session map, or None
+        """
+        mapdata = configs["map"]
+        if mapdata.get("streamed"):
+            return None
+        return cls.load(os.path.join(root, "maps", configs["session"]["map"]), mapdata)
+
+    def _pixels(self, x, y) -> tuple:
+        """Pixel indices of world positions, and which of them are on the map."""
+        px = np.floor((np.asarray(x, dtype=float)+self.size[0]/2)*self.pixels_per_unit[0]).astype(np.intp)
+        py = np.floor((np.asarray(y, dtype=float)+self.size[1]/2)*self.pixels_per_unit[1]).astype(np.intp)
+        h, w = self.classes.shape
+        inside = (px >= 0) & (px < w) & (py >= 0) & (py < h)
+        return np.clip(px, 0, w-1), np.clip(py, 0, h-1), inside
+
+    def lookup(self, x, y) -> np.ndarray:
+        """Surface classes at world positions (numbers or arrays). Everything outside of the map is wall."""
+        px, py, inside = self._pixels(x, y)
+        return np.where(inside, self.classes[py, px], WALL).astype(np.uint8)
+
+    def distance(self, x, y) -> np.ndarray:
+        """Signed distance to the edge of the drivable surface at world positions, in units. Positive on the track, negative off it."""
+        px, py, inside = self._pixels(x, y)
+        return np.where(inside, self.boundary[py, px], -np.inf)
+
+    def penetration(self, x, y) -> np.ndarray:
+        """How deep positions are inside of a wall, in units (0 when not in a wall). Outside of the map counts as infinitely deep."""
+        px, py, inside = self._pixels(x, y)
+        return np.where(inside, self.wall[py, px], np.inf)
+
+    @staticmethod
+    def wheel_positions(x, y, rotation, width: float, length: float) -> tuple:
+        """Positions of the four wheels (front left, front right, rear left, rear right) of vehicles at x, y with a rotation in degrees (0 = up).
+
+        Returns:
+            tuple: x and y arrays, shape ```(vehicles, 4)```
+        """
+        direction = np.radians(np.asarray(rotation, dtype=float)-90)[..., None]
+        forward = np.array([1, 1, -1, -1])*length/2
+        side = np.array([-1, 1, -1, 1])*width/2
+        cos, sin = np.cos(direction), np.sin(direction)
+        return (np.asarray(x, dtype=float)[..., None]+forward*cos-side*sin,
+                np.asarray(y, dtype=float)[..., None]+forward*sin+side*cos)
+
+    def wheels(self, x, y, rotation, width: float, length: float) -> np.ndarray:
+        """Surface classes under the four wheels of vehicles, shape ```(vehicles, 4)```, see ```wheel_positions```."""
+        return self.lookup(*self.wheel_positions(x, y, rotation, width, length))
+
+    def contacts(self, x, y, rotation, width: float, length: float) -> tuple:
+        """Surface classes under the four wheels of vehicles and how deep the deepest wheel of every vehicle is inside of a wall.
+
+        Returns:
+            tuple: classes, shape ```(vehicles, 4)```, and depths in units, shape ```(vehicles,)```
+        """
+        px, py, inside = self._pixels(*self.wheel_positions(x, y, rotation, width, length))
+        classes = np.where(inside, self.classes[py, px], WALL).astype(np.uint8)
+        depth = np.where(inside, self.wall[py, px], np.inf).max(axis=-1)
+        return classes, depth
+
+    def contact(self, x: float, y: float, rotation: float, width: float, length: float) -> tuple:
+        """```contacts``` of a single vehicle, with plain floats: four index reads into the grid instead of building arrays.
+
+        Returns:
+            tuple: classes of the front left, front right, rear left and rear right wheel, and the depth of the deepest one inside of a wall
+        """
+        direction = math.radians(rotation-90)
+        cos, sin = math.cos(direction), math.sin(direction)
+        fx, fy = cos*length/2, sin*length/2 # middle to the front axle
+        sx, sy = -sin*width/2, cos*width/2 # middle to the right wheels
+        ox, oy = self.size[0]/2, self.size[1]/2
+        ux, uy = self.pixels_per_unit
+        h, w = self.classes.shape
+        classes = []
+        depth = 0.0
+        for wx, wy in ((x+fx-sx, y+fy-sy), (x+fx+sx, y+fy+sy), (x-fx-sx, y-fy-sy), (x-fx+sx, y-fy+sy)):
+            px, py = math.floor((wx+ox)*ux), math.floor((wy+oy)*uy)
+            if 0 <= px < w and 0 <= py < h:
+                c = int(self.classes[py, px])
+                if c == WALL:
+                    d = float(self.wall[py, px])
+                    if d > depth: depth = d
+            else:
+                c = WALL
+                depth = math.inf
+            classes.append(c)
+        return tuple(classes), depth
@@ -0,0 +1,170 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from simulation import simulation, load_configs
+from recorder import recording
+from surface import surface_map
+import argparse, itertools, copy, json, os, time
+
+def apply_overrides(configs: dict, overrides: dict) -> dict:
+    """Returns a copy of the configs with overrides applied.
+
+    Override names are ```<section>.<key>```, where section is one of
+    ```engine``` (entry of engines.json the vehicle uses), ```vehicle``` (vehicle.json), ```tires``` (entry of tires.json of the session)
+    or ```config``` (config.json). Example: ```{"engine.resistance": 0.2, "vehicle.drag": 0.5}```
+    The transmission cant be overridden, the simulation doesnt use it yet and every point would give the same result.
+
+    Args:
+        configs (dict): configs from ```load_configs```
+        overrides (dict): override name and value
+
+    Returns:
+        dict: changed copy of the configs
+
+    Raises:
+        ValueError: override of an unknown section or the transmission, or without a key
+    """
+    configs = copy.deepcopy(configs)
+    sections = {
+        "engine": configs["engines"][configs["vehicle"]["engine"]],
+        "vehicle": configs["vehicle"],
+        "tires": configs["tires"][configs["session"]["tires"]],
+        "config": configs["config"],
+    }
+    for name, value in overrides.items():
+        section, key = name.split(".", 1) if "." in name else (name, "")
+        if section == "transmission":
+            raise ValueError("Transmission overrides have no effect, the simulation doesnt use the transmission: "+name)
+        if section not in sections or not key:
+            raise ValueError("Unknown config section in override: "+name)
+        sections[section][key] = value
+    return configs
+
+def grid_points(grid: dict) -> list[dict]:
+    """All combinations of a parameter grid, ```{"engine.resistance": [0.1, 0.2], ...}``` -> ```[{"engine.resistance": 0.1, ...}, ...]```"""
+    names = sorted(grid.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[i] for i in names])]
+
+def point_key(overrides: dict) -> str:
+    return json.dumps(overrides, sort_keys=True)
+
+def run_point(configs: dict, overrides: dict, script: list, surface = "session", root = ".") -> dict:
+    """Runs one point of the sweep headless and measures it.
+
+    Args:
+        configs (dict): configs from ```load_configs```
+        overrides (dict): overrides of this point
+        script (list): input script as ```[(events, ticks), ...]```
+        surface (surface_map, optional): surface map the vehicle drives on, None to drive without one. Defaults to "session", the one of the session map.
+        root (str, optional): folder the configs were loaded from, the session map is loaded from there. Defaults to ".".
+
+    Returns:
+        dict: overrides and metrics (time to top speed, top speed, peak revs, distance)
+    """
+    start = time.perf_counter()
+    sim = simulation(apply_overrides(configs, overrides))
+    # like main.py, otherwise grass and walls dont slow the vehicle down. Loaded in the worker, the arrays are memory mapped
+    sim.surface = surface_map.of_session(configs, root) if surface == "session" else surface
+    motor = sim.motor
+
+    tick = 0
+    top_speed = peak_revs = distance = 0
+    speeds = []
+    for events, ticks in script:
+        for i in range(ticks):
+            sim.step(events)
+            speed = sim.speed
+            speeds.append(speed)
+            distance += abs(speed)*sim.dt
+            if speed > top_speed: top_speed = speed
+            if motor.revs > peak_revs: peak_revs = motor.revs
+            tick += 1
+
+    # top speed counts as reached at 99% of it
+    reached = next((n for n, s in enumerate(speeds) if s >= top_speed*0.99), None) if top_speed > 0 else None
+    return {
+        "key": point_key(overrides),
+        "overrides": overrides,
+        "ticks": tick,
+        "time_to_top_speed": (reached+1)*sim.dt if reached is not None else None,
+        "top_speed": top_speed, # units per second
+        "peak_revs": peak_revs,
+        "distance": distance,
+        "pos": sim.pos,
+        "elapsed": time.perf_counter()-start,
+    }
+
+def completed(path: str) -> set:
+    """Keys of the points already in a result file."""
+    done = set()
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["key"])
+                except (ValueError, KeyError):
+                    pass # half written line of an interrupted sweep
+            f.close()
+    return done
+
+def sweep(configs: dict, grid: dict, script: list, out: str, workers = None, surface = "session", root = ".") -> int:
+    """Runs every point of a grid on all cores and appends each result to ```out``` (one json object per line) as soon as it is done.
+    Points that are already in ```out``` are skipped, so an interrupted sweep can just be started again.
+
+    Args:
+        configs (dict): configs from ```load_configs```
+        grid (dict): override names and list of values
+        script (list): input script as ```[(events, ticks), ...]```
+        out (str): result file
+        workers (int, optional): amount of processes. Defaults to all cores.
+        surface (surface_map, optional): surface map the vehicle drives on, None to drive without one. Defaults to "session", the one of the session map.
+        root (str, optional): folder the configs were loaded from, the session map is loaded from there. Defaults to ".".
+
+    Returns:
+        int: amount of points that were run
+    """
+    done = completed(out)
+    points = [i for i in grid_points(grid) if point_key(i) not in done]
+    print(str(len(done))+" points done already, "+str(len(points))+" to run")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(out, "a+") as f:
+        # end a half written line of an interrupted sweep, otherwise the first new result would be appended to it
+        if f.tell():
+            f.seek(f.tell()-1)
+            if f.read(1) != "\n": f.write("\n")
+        futures = [pool.submit(run_point, configs, i, script, surface, root) for i in points]
+        for n, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            f.write(json.dumps(result)+"\n")
+            f.flush()
+            print(str(n)+"/"+str(len(points))+" "+result["key"])
+        f.close()
+    return len(points)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run headless simulations for every combination of config overrides.")
+    parser.add_argument("grid", help="json file with override names and lists of values, e.g. {\"engine.resistance\": [0.1, 0.2]}")
+    parser.add_argument("--out", default="sweep.jsonl", help="result file, one json object per point. Defaults to sweep.jsonl.")
+    parser.add_argument("--replay", help="input recording used as the input script (made with main.py --record)")
+    parser.add_argument("--hold", default="throttle_100", help="comma seperated binds held down the whole run, when no recording is given. Defaults to throttle_100.")
+    parser.add_argument("--seconds", type=float, default=30, help="simulated seconds when holding binds. Defaults to 30.")
+    parser.add_argument("--workers", type=int, help="amount of processes. Defaults to all cores.")
+    parser.add_argument("--root", default=".", help="folder with the config files. Defaults to the current folder.")
+    parser.add_argument("--no-surface", action="store_true", help="drive without the surface map of the session map (grip, rolling resistance and walls)")
+    args = parser.parse_args()
+
+    configs = load_configs(args.root)
+    released = {i: False for i in configs["config"]["binds"].keys()}
+    if args.replay:
+        rec = recording.load(args.replay)
+        configs["config"]["hertz"] = rec.hertz
+        script = [(dict(released, **events), ticks) for events, ticks in rec]
+    else:
+        hold = [i for i in args.hold.split(",") if i]
+        script = [(dict(released, **{i: True for i in hold}), round(args.seconds*configs["config"]["hertz"]))]
+
+    with open(args.grid, "r") as f:
+        grid = json.load(f)
+        f.close()
+
+    start = time.perf_counter()
+    n = sweep(configs, grid, script, args.out, args.workers, None if args.no_surface else "session", args.root)
+    print(str(n)+" points in "+str(round(time.perf_counter()-start, 2))+" s, results in "+args.out)
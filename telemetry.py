@@ -0,0 +1,160 @@
+import numpy as np
+import argparse, json, mmap, os, struct
+
+# column name and type (array module codes), one file per column
+COLUMNS = (
+    ("tick", "q"),
+    ("revs", "d"),
+    ("torque", "d"),
+    ("throttle", "f"),
+    ("speed", "d"),
+    ("brake", "f"),
+    ("steer", "f"),
+    ("x", "d"),
+    ("y", "d"),
+    ("rotation", "d"),
+)
+_DTYPES = {"q": "i8", "d": "f8", "f": "f4"}
+
+def decimation_arg(value: str) -> int:
+    """argparse type of a decimation option, a whole number of at least 1."""
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("not a whole number: "+value)
+    if n < 1:
+        raise argparse.ArgumentTypeError("has to be at least 1: "+value)
+    return n
+
+class telemetry_recorder:
+    def __init__(self, path: str, hertz: int, decimation = 1, chunk = 65536, block = 1024):
+        """**Records the vehicle and engine state of the physics ticks into memory-mapped column files.**\n
+
+        Every column (see ```COLUMNS```) is its own file in the folder ```path```, a plain array of fixed-width values.
+        A sample is packed as one row into a small preallocated block with a single ```struct.pack_into``` call, no allocation and no system call.
+        When the block is full, numpy copies its rows into the columns in one go. The column files are made ```chunk``` samples big in advance,
+        mapped into memory and grow by another chunk when they are full. ```close``` cuts them to the recorded length and writes ```meta.json```.
+
+        Args:
+            path (str): folder of the run, is created if it doesnt exist
+            hertz (int): physics ticks per second, saved for the analysis
+            decimation (int, optional): only every n-th tick is recorded, at least 1. Defaults to 1.
+            chunk (int, optional): samples the files grow by. Defaults to 65536.
+            block (int, optional): samples packed before they are copied into the columns. Defaults to 1024.
+
+        Raises:
+            ValueError: decimation below 1
+        """
+        if decimation < 1:
+            raise ValueError("decimation has to be at least 1, got "+str(decimation))
+        self.path = path
+        self.hertz = hertz
+        self.decimation = decimation
+        self.chunk = chunk
+        self.tick = 0 # ticks seen
+        self._skip = 1 # ticks until the next sample
+
+        # row block, packed sample by sample
+        self._row = struct.Struct("<"+"".join(code for name, code in COLUMNS))
+        self._row_dtype = np.dtype([(name, "<"+_DTYPES[code]) for name, code in COLUMNS])
+        self._block = bytearray(self._row.size*block)
+        self._block_size = len(self._block)
+        self._offset = 0 # bytes used in the block
+
+        # column files
+        self._written = 0 # samples copied into the columns
+        self._capacity = 0
+        os.makedirs(path, exist_ok=True)
+        self._files = [open(os.path.join(path, name+".bin"), "w+b") for name, code in COLUMNS]
+        self._maps = []
+        self._columns = []
+
+    @property
+    def count(self) -> int:
+        """Recorded samples."""
+        return self._written+self._offset//self._row.size
+
+    def _grow(self, needed: int):
+        self._release()
+        while self._capacity < needed:
+            self._capacity += self.chunk
+        for f, (name, code) in zip(self._files, COLUMNS):
+            f.truncate(self._capacity*np.dtype(_DTYPES[code]).itemsize)
+            m = mmap.mmap(f.fileno(), 0)
+            self._maps.append(m)
+            self._columns.append(np.frombuffer(m, dtype="<"+_DTYPES[code]))
+
+    def _release(self):
+        self._columns = [] # arrays have to be gone before their map can be closed
+        for m in self._maps:
+            m.close()
+        self._maps = []
+
+    def _flush(self):
+        """Copies the packed rows of the block into the columns."""
+        n = self._offset//self._row.size
+        if not n: return
+        end = self._written+n
+        if end > self._capacity:
+            self._grow(end)
+        rows = np.frombuffer(self._block, dtype=self._row_dtype, count=n)
+        for (name, code), column in zip(COLUMNS, self._columns):
+            column[self._written:end] = rows[name]
+        del rows
+        self._written = end
+        self._offset = 0
+
+    def sample(self, sim):
+        """Records the state of a simulation after a physics tick, if this tick isnt skipped by the decimation.
+
+        Args:
+            sim (simulation): simulation to read ```motor```, ```speed```, ```brake```, ```steer```, ```pos``` and ```rotation``` from
+        """
+        self.tick += 1
+        self._skip -= 1
+        if self._skip: return
+        self._skip = self.decimation
+
+        motor = sim.motor
+        pos = sim.pos
+        self._row.pack_into(self._block, self._offset, self.tick, motor.revs, motor.torque, motor.throttle,
+                            sim.speed, sim.brake, sim.steer, pos[0], pos[1], sim.rotation)
+        self._offset += self._row.size
+        if self._offset == self._block_size:
+            self._flush()
+
+    def close(self):
+        """Copies the last rows into the columns, cuts the column files to the recorded samples and writes ```meta.json```."""
+        self._flush()
+        self._release()
+        for f, (name, code) in zip(self._files, COLUMNS):
+            f.truncate(self._written*np.dtype(_DTYPES[code]).itemsize)
+            f.close()
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({
+                "hertz": self.hertz,
+                "decimation": self.decimation,
+                "samples": self._written,
+                "columns": {name: "<"+_DTYPES[code] for name, code in COLUMNS},
+            }, f, indent=4)
+            f.close()
+
+def load(path: str) -> dict:
+    """Loads a recorded run as numpy arrays, the column files are mapped into memory as they are (nothing is parsed).
+
+    Args:
+        path (str): folder of the run
+
+    Returns:
+        dict: column name and array, plus ```"meta"``` with the content of meta.json
+    """
+    with open(os.path.join(path, "meta.json"), "r") as f:
+        meta = json.load(f)
+        f.close()
+    run = {"meta": meta}
+    for name, dtype in meta["columns"].items():
+        if meta["samples"]:
+            run[name] = np.memmap(os.path.join(path, name+".bin"), dtype=dtype, mode="r", shape=(meta["samples"],))
+        else:
+            run[name] = np.zeros(0, dtype=dtype)
+    return run
@@ -0,0 +1,43 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from simulation import load_configs
+from assets import asset_manager, assets
+from objects import vehicle, texture
+import pygame
+
+configs = load_configs()
+folder = "vehicles/"+configs["session"]["vehicle"]
+
+def test_files_are_loaded_once():
+    manager = asset_manager()
+    a = manager.image(folder+"/default.png")
+    b = manager.image(os.path.abspath(folder)+"/default.png")
+    assert a is b
+    assert manager.loads == 1 and manager.hits == 1
+    assert manager.memory()["file_bytes"] > 0
+
+def test_vehicles_share_textures_without_chdir():
+    pygame.display.set_mode((320, 240))
+    cwd = os.getcwd()
+    loads = assets.loads
+    cars = [vehicle((320, 240), folder, [i, 0], 0, rotation_sheet = 36) for i in range(20)]
+    assert os.getcwd() == cwd
+    assert assets.loads-loads <= 1
+    assert all(i.texture is cars[0].texture for i in cars)
+    assert all(i._textures["default"] is cars[0]._textures["default"] for i in cars)
+
+    # more copies dont even build a texture cache of their own
+    made = []
+    init = texture.__init__
+    texture.__init__ = lambda self, *args, **kwargs: made.append(self) or init(self, *args, **kwargs)
+    try:
+        vehicle((320, 240), folder, [0, 0], 0, rotation_sheet = 36)
+    finally:
+        texture.__init__ = init
+    assert made == []
+
+if __name__ == "__main__":
+    test_files_are_loaded_once()
+    test_vehicles_share_textures_without_chdir()
+    print("ok")
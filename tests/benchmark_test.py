@@ -0,0 +1,42 @@
+import json, os, subprocess, sys, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def benchmark(*args) -> subprocess.CompletedProcess:
+    # only the quick update benchmarks, on two maps
+    return subprocess.run([sys.executable, os.path.join(ROOT, "benchmark.py"), "--only", "update", "--repeat", "2", "--map", "track1", "--map", "grid", *args],
+                          capture_output=True, text=True, timeout=120, cwd=ROOT)
+
+def test_save_and_compare():
+    folder = tempfile.mkdtemp()
+    baseline = os.path.join(folder, "baseline.json")
+    p = benchmark("--save", baseline)
+    assert p.returncode == 0, p.stderr
+    with open(baseline, "r") as f:
+        saved = json.load(f)
+        f.close()
+    # map benchmarks run on every map, the others once
+    assert saved["meta"]["maps"] == ["track1", "grid"]
+    assert sorted(saved["results"].keys()) == ["engine.update_revs", "map.update (grid)", "map.update (track1)", "obj.update"]
+
+    # only a slowdown of more than 99% counts, noise never does
+    p = benchmark("--compare", baseline, "--threshold", "0.99")
+    assert p.returncode == 0, p.stderr
+    assert "compared to "+baseline in p.stdout
+    assert "map.update (grid)" in p.stdout.split("compared to")[1]
+    assert "REGRESSION" not in p.stdout
+
+    # a baseline a thousand times faster, everything regressed
+    for i in saved["results"].values():
+        i["mean"] *= 1000
+        i["stdev"] = 0
+    with open(baseline, "w") as f:
+        json.dump(saved, f)
+        f.close()
+    p = benchmark("--compare", baseline, "--threshold", "0.99")
+    assert p.returncode == 1
+    assert p.stdout.count("REGRESSION") == 4
+
+if __name__ == "__main__":
+    test_save_and_compare()
+    print("ok")
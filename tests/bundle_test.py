@@ -0,0 +1,53 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from simulation import load_configs
+from bundle import session_bundle
+from engine import torque_table
+from render import map
+from assets import assets
+import pygame, tempfile
+
+pygame.display.init()
+path = os.path.join(tempfile.mkdtemp(), "session.bundle")
+
+def test_bundle_matches_loading_the_files():
+    b = session_bundle.open(path)
+    configs = load_configs()
+    assert b.configs == configs
+    assert not b.stale()
+
+    # torque tables are installed, engines take them instead of sampling
+    e = configs["engines"][configs["vehicle"]["engine"]]
+    t = torque_table.shared(e["functions"], e["limits"])
+    assert t.table == torque_table(e["functions"], e["limits"]).table
+
+    # vehicle textures are handed to the asset manager
+    loads = assets.loads
+    vehicle = "vehicles/"+configs["session"]["vehicle"]
+    assets.image(vehicle+"/"+configs["vehicle"]["textures"]["default"])
+    assert assets.loads == loads
+
+    # chunks are the same pixels as the ones cut out of the texture
+    mapdata = configs["map"]
+    resolution = tuple(configs["config"]["resolution"])
+    baked = b.map(resolution)
+    cut = map(resolution, "maps/"+configs["session"]["map"]+"/"+mapdata["texture"], mapdata["size"], mapdata["chunksize"])
+    assert len(baked.levels) == len(cut.levels)
+    for level in (0, len(cut.levels)-1):
+        for y in (0, -1):
+            for x in (0, 1):
+                assert pygame.image.tobytes(baked.levels[level][y][x], "RGBA") == pygame.image.tobytes(cut.levels[level][y][x], "RGBA")
+    assert b.map((320, 240)) is None # baked for another resolution
+
+def test_bundle_is_stale_when_a_source_changes():
+    b = session_bundle.open(path)
+    b.header["sources"]["config.json"] -= 1
+    assert b.stale()
+    b.header["version"] = -1
+    assert b.stale()
+
+if __name__ == "__main__":
+    test_bundle_matches_loading_the_files()
+    test_bundle_is_stale_when_a_source_changes()
+    print("ok")
@@ -0,0 +1,48 @@
+from engine import engine
+from engine_bank import engine_bank
+import json, random
+
+with open("vehicles/engines.json") as f:
+    engines = json.load(f)
+    f.close()
+
+# second config with a different curve, so the bank has to handle more than one lookup table
+engines["test_curve"] = {
+    "idle_revs": 900,
+    "resistance": 0.3,
+    "functions": ["0.05*x", "-0.00001*(x-4000)**2+200"],
+    "limits": [4000, 7200]
+}
+
+def test_engine_bank_matches_engine():
+    names = ["cup_H6_4L", "test_curve"]*50
+    bank = engine_bank.from_config(engines, names)
+    motors = [engine(engines[i]["functions"], engines[i]["limits"], engines[i]["idle_revs"], engines[i]["resistance"]) for i in names]
+
+    rng = random.Random(1)
+    for tick in range(500):
+        # change throttle every now and then, like a driver would
+        if tick % 25 == 0:
+            for n, m in enumerate(motors):
+                m.throttle = bank.throttle[n] = rng.choice([0, 0.5, 1])
+        resistance = 0.9+0.27*rng.choice([0, 0.5, 1])
+
+        bank.update_revs(resistance)
+        for m in motors:
+            m.update_revs(resistance)
+
+        for n, m in enumerate(motors):
+            assert abs(bank.revs[n]-m.revs) < 1e-6
+            assert abs(bank.torque[n]-m.torque) < 1e-6
+
+def test_engine_bank_matches_exact_curve():
+    bank = engine_bank.from_config(engines, ["cup_H6_4L"])
+    motor = engine(engines["cup_H6_4L"]["functions"], engines["cup_H6_4L"]["limits"], 1200, exact = True)
+    for x in range(100, 6600, 7):
+        bank.revs[0] = x
+        assert abs(bank._point_at_graph(bank.revs)[0]-motor._point_at_graph(x)) < 0.01
+
+if __name__ == "__main__":
+    test_engine_bank_matches_engine()
+    test_engine_bank_matches_exact_curve()
+    print("ok")
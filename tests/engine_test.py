@@ -0,0 +1,47 @@
+from engine import compile_function, torque_table
+from simulation import load_configs
+import math
+
+configs = load_configs()
+
+def test_compile_function():
+    f = compile_function("(5.25*sqrt(x))-100")
+    assert f(100) == 5.25*10-100
+    assert compile_function("-abs(x-pi)%3+e**2")(1) == -abs(1-math.pi)%3+math.e**2
+
+    # only numbers, x, arithmetic and the math functions, nothing that reaches python itself
+    for expression in ("x.__class__", "math.sqrt(x)", "__import__('os')", "open('f')", "print(x)", "y+1", "X", "sqrt",
+                       "sqrt(x, 2)", "sqrt(x=x)", "'x'", "[x]", "x if x else 1", "x < 1", "lambda x: x", "(lambda: 1)()"):
+        try:
+            compile_function(expression)
+            assert False, expression
+        except ValueError:
+            pass
+
+def test_lookup_matches_exact():
+    e = configs["engines"][configs["vehicle"]["engine"]]
+    curve = torque_table(e["functions"], e["limits"])
+    # every 0.37 revs, so most points are in between two samples of the table
+    revs = [i*0.37 for i in range(int(curve.max_revs/0.37)+1)]+[curve.max_revs]
+    for x in revs:
+        # sqrt is steep right above 0, from idle on the table is much closer
+        tolerance = 0.01 if x >= e["idle_revs"] else 0.005*curve.peak
+        assert abs(curve.lookup(x)-curve.exact(x)) <= tolerance, x
+    assert curve.lookup(-10) == curve.exact(-10) == curve.exact(0)
+    assert curve.lookup(curve.max_revs+10) == curve.exact(curve.max_revs+10) == curve.exact(curve.max_revs)
+
+def test_segments_at_the_limits():
+    # a step at every limit, so the function that is used shows in the value
+    curve = torque_table(["1", "2", "3"], [10, 20, 30])
+    # x <= limit is the function of that limit, right above it the next one
+    assert [curve.exact(x) for x in (0, 10, 10.001, 20, 20.001, 30)] == [1, 1, 2, 2, 3, 3]
+    assert curve.exact(-1) == 1 and curve.exact(31) == 3
+    # the samples at the limits too
+    assert curve.table[10] == 1 and curve.table[11] == 2
+    assert curve.lookup(10) == 1 and curve.lookup(11) == 2 and curve.lookup(10.5) == 1.5
+
+if __name__ == "__main__":
+    test_compile_function()
+    test_lookup_matches_exact()
+    test_segments_at_the_limits()
+    print("ok")
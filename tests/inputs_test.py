@@ -0,0 +1,50 @@
+from inputs import input_handler
+import pygame, threading, time
+
+def handled(inputs: input_handler, events_list: list):
+    # feed events and wait until the input thread published them
+    seq = inputs._snapshot.seq
+    inputs.feed(events_list)
+    deadline = time.perf_counter()+5
+    while inputs._snapshot.seq == seq and time.perf_counter() < deadline:
+        time.sleep(0.001)
+
+def test_binds_and_latency():
+    inputs = input_handler({"throttle": pygame.K_w, "brake": pygame.K_s})
+    s = inputs.consume()
+    assert s.running and not any(s.events.values())
+
+    handled(inputs, [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_w), pygame.event.Event(pygame.KEYDOWN, key=pygame.K_x)])
+    s = inputs.consume()
+    assert s.events["throttle"] and not s.events["brake"]
+    assert inputs.latency()["samples"] == 1
+    # the same snapshot again is no new input
+    inputs.consume()
+    assert inputs.latency()["samples"] == 1
+
+    handled(inputs, [pygame.event.Event(pygame.KEYUP, key=pygame.K_w)])
+    assert not inputs.consume().events["throttle"]
+    assert inputs.latency()["samples"] == 2
+    assert inputs.latency()["max"] >= inputs.latency()["mean"] > 0
+
+    handled(inputs, [pygame.event.Event(pygame.QUIT)])
+    assert not inputs.snapshot().running
+    inputs.close()
+
+def test_hotkeys_run_on_main_thread():
+    inputs = input_handler({"throttle": pygame.K_w})
+    called = []
+    inputs.hotkeys[pygame.K_F3] = lambda: called.append(threading.get_ident())
+    # a bind change too, so the snapshot shows when the input thread is done
+    handled(inputs, [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_F3), pygame.event.Event(pygame.KEYDOWN, key=pygame.K_w)])
+    assert called == [] # queued, not called by the input thread
+    inputs.snapshot()
+    assert called == [threading.get_ident()]
+    inputs.consume()
+    assert len(called) == 1
+    inputs.close()
+
+if __name__ == "__main__":
+    test_binds_and_latency()
+    test_hotkeys_run_on_main_thread()
+    print("ok")
@@ -0,0 +1,66 @@
+from simulation import load_configs
+from physics import physics
+import math, subprocess, sys
+
+configs = load_configs()
+vehicle = configs["vehicle"]
+tires = configs["tires"][configs["session"]["tires"]]
+
+def drive(p: physics, seconds: float, torque: float, revs: float, throttle = 1, brake = 0, steer = 0, hz = 100):
+    for i in range(round(seconds*hz)):
+        p.step(1/hz, torque*throttle, revs, throttle, brake, steer)
+
+def test_speed_is_limited_by_the_revs():
+    p = physics(vehicle, tires)
+    drive(p, 60, 250, 3000)
+    assert abs(p.speed-p.top_speed(3000)) < 0.5
+    assert abs(p.x) < 1e-9 and p.y < 0 # rotation 0 drives up
+
+def test_braking_stops_then_reverses():
+    p = physics(vehicle, tires)
+    p.speed = 30.0
+    drive(p, 1, 0, 0, throttle = 0, brake = 1)
+    assert 0 < p.speed < 30
+    drive(p, 10, 0, 0, throttle = 0, brake = 1)
+    assert abs(p.speed+p.reverse_speed) < 0.1
+
+def test_coasting_does_not_roll_backwards():
+    p = physics(vehicle, tires)
+    p.speed = 5.0
+    drive(p, 60, 0, 0, throttle = 0)
+    assert p.speed == 0
+
+def test_kinematic_steering_and_grip():
+    # slow enough for the grip: yaw rate = speed/wheelbase*tan(steering angle)
+    p = physics(vehicle, tires)
+    p.speed = 2.0
+    p.step(0.01, 0, 0, 0, 0, 0.5)
+    expected = math.degrees(p.speed*math.tan(0.5*p.steering_lock)/p.wheelbase)
+    assert abs(p.yaw_rate-expected) < 1e-6
+    # too fast: the sideways acceleration is capped by the grip
+    p.speed = 40.0
+    p.step(0.01, 0, 0, 0, 0, 1)
+    assert abs(math.radians(p.yaw_rate)*p.speed-p.max_lateral) < 1e-6
+
+def test_substeps_converge():
+    runs = []
+    for substeps in (1, 4, 64):
+        p = physics(vehicle, tires, substeps)
+        drive(p, 5, 250, 6000, steer = 0.3)
+        runs.append((p.x, p.y))
+    coarse = math.dist(runs[0], runs[2])
+    fine = math.dist(runs[1], runs[2])
+    assert fine < coarse
+
+def test_no_pygame():
+    out = subprocess.run([sys.executable, "-c", "import physics, sys; print('pygame' in sys.modules)"], capture_output=True, text=True)
+    assert out.stdout.strip() == "False"
+
+if __name__ == "__main__":
+    test_speed_is_limited_by_the_revs()
+    test_braking_stops_then_reverses()
+    test_coasting_does_not_roll_backwards()
+    test_kinematic_steering_and_grip()
+    test_substeps_converge()
+    test_no_pygame()
+    print("ok")
@@ -0,0 +1,63 @@
+from simulation import simulation, load_configs
+from profiler import frame_profiler, PHASES, EVENTS, CONTROLS, UPDATE_REVS, MOVEMENT, PHYSICS
+import os, tempfile, time
+
+configs = load_configs()
+binds = list(configs["config"]["binds"].keys())
+
+def test_ring_buffer_keeps_latest_frames():
+    prof = frame_profiler(frames = 8)
+    for f in range(20):
+        prof.begin_frame()
+        prof.mark(0)
+    prof.begin_frame() # frame 20 isnt finished
+    rows = prof.rows()
+    assert len(rows) == 7
+    assert all(len(r) == len(PHASES) for r in rows)
+
+    path = os.path.join(tempfile.mkdtemp(), "profile.csv")
+    with open(prof.dump_csv(path), "r") as f:
+        lines = f.read().splitlines()
+        f.close()
+    assert lines[0] == "frame,"+",".join(PHASES)
+    assert lines[1].startswith("13,")
+    assert lines[-1].startswith("19,")
+
+def test_simulation_phases_are_measured():
+    sim = simulation(configs)
+    prof = frame_profiler()
+    sim.profiler = prof
+    held = {i: i == "throttle_100" for i in binds}
+    prof.begin_frame()
+    sim.step(held, 10)
+    prof.begin_frame()
+    row = prof.rows()[-1]
+    assert row[CONTROLS] > 0 and row[UPDATE_REVS] > 0 and row[MOVEMENT] > 0
+
+    # profiling doesnt change the simulation
+    plain = simulation(configs)
+    plain.step(held, 10)
+    assert plain.pos == sim.pos
+
+def test_work_after_a_tick_isnt_controls():
+    # the tick loop of main.py, with slow work after every tick (other vehicles, telemetry)
+    sim = simulation(configs)
+    prof = frame_profiler()
+    sim.profiler = prof
+    held = {i: i == "throttle_100" for i in binds}
+    prof.begin_frame()
+    for i in range(5):
+        prof.mark(EVENTS)
+        sim.step(held)
+        time.sleep(0.005)
+        prof.mark(PHYSICS)
+    prof.begin_frame()
+    row = prof.rows()[-1]
+    assert row[PHYSICS] >= 25e6
+    assert row[CONTROLS] < 5e6
+
+if __name__ == "__main__":
+    test_ring_buffer_keeps_latest_frames()
+    test_simulation_phases_are_measured()
+    test_work_after_a_tick_isnt_controls()
+    print("ok")
@@ -0,0 +1,66 @@
+from simulation import simulation, load_configs
+from recorder import input_recorder, recording
+from surface import surface_map
+from headless import replay
+import random
+
+configs = load_configs()
+binds = list(configs["config"]["binds"].keys())
+
+def test_recording_replays_the_same_run():
+    rng = random.Random(5)
+    recorder = input_recorder(binds, configs["config"]["hertz"])
+    live = simulation(configs)
+    held = {i: False for i in binds}
+    for tick in range(5000):
+        if rng.random() < 0.02:
+            i = rng.choice(binds)
+            held = dict(held, **{i: not held[i]})
+        recorder.record(held)
+        live.step(held)
+
+    rec = recording.from_bytes(recorder.to_bytes())
+    assert rec.ticks == 5000
+    assert rec.binds == binds
+
+    replayed = simulation(configs)
+    for events, ticks in rec:
+        replayed.step(events, ticks)
+    assert replayed.pos == live.pos
+    assert replayed.rotation == live.rotation
+
+def test_headless_replay_drives_on_the_surface():
+    # recorded like main.py, with the surface map of the session map attached
+    recorder = input_recorder(binds, configs["config"]["hertz"])
+    live = simulation(configs)
+    live.surface = surface_map.of_session(configs)
+    held = dict({i: False for i in binds}, throttle_100 = True)
+    for tick in range(1000):
+        recorder.record(held)
+        live.step(held)
+    rec = recording.from_bytes(recorder.to_bytes())
+
+    result = replay(configs, rec)
+    assert result["pos"] == live.pos
+    assert result["rotation"] == live.rotation
+    assert result["speed"] == live.speed
+    # without the surface the run is a different one
+    assert replay(configs, rec, surface = None)["speed"] != live.speed
+
+def test_one_hour_is_kilobytes():
+    rng = random.Random(6)
+    recorder = input_recorder(binds, 100)
+    held = {i: False for i in binds}
+    for tick in range(100*60*60):
+        # a new input roughly every half second
+        if rng.random() < 0.02:
+            i = rng.choice(binds)
+            held = dict(held, **{i: not held[i]})
+        recorder.record(held)
+    assert len(recorder.to_bytes()) < 32*1024
+
+if __name__ == "__main__":
+    test_recording_replays_the_same_run()
+    test_headless_replay_drives_on_the_surface()
+    test_one_hour_is_kilobytes()
+    print("ok")
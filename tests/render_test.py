@@ -0,0 +1,138 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from render import chunk_cache, map, streamed_map, render, vehicle, fleet
+from world import world
+from simulation import load_configs
+from engine import engine
+import pygame, tempfile, time
+
+pygame.display.init()
+
+def small_texture(folder: str) -> str:
+    # 64x32 pixel texture for 40x20 units, cut into chunks of 10 units (16x16 pixels at a 64x32 window)
+    texture = pygame.Surface((64, 32))
+    for x in range(64):
+        texture.fill((x*4, 0, 255-x*4), (x, 0, 1, 32))
+    path = os.path.join(folder, "map.png")
+    pygame.image.save(texture, path)
+    return path
+
+def small_map(folder: str, mipmaps = True) -> map:
+    return map((64, 32), small_texture(folder), [40, 20], 10, mipmaps = mipmaps, min_mipmap = 4)
+
+def test_zooms_of_one_bucket_use_one_level():
+    m = small_map(tempfile.mkdtemp())
+    assert m._level_amount == 3 # 16, 8 and 4 pixels
+    # 8.5 and 7.5 pixels round into the same bucket, the unrounded sizes would pick different levels
+    assert m.cache.bucket((8.5, 8.5)) == m.cache.bucket((7.5, 7.5))
+    for on_screen in (8.5, 7.5):
+        m.update((40, 20), (0, 0), (on_screen/10, on_screen/10))
+    assert m.cache.misses == len(m.cache._surfaces)
+    assert len({k[0] for k in m.cache._surfaces.keys()}) == 1
+
+def test_cache_keys_levels_apart():
+    cache = chunk_cache()
+    a, b = pygame.Surface((16, 16)), pygame.Surface((8, 8))
+    assert cache.get((0, 0), a, (10, 10), 0) is not cache.get((0, 0), b, (10, 10), 1)
+    assert cache.misses == 2
+
+def test_from_levels_like_map():
+    m = small_map(tempfile.mkdtemp())
+    baked = map.from_levels((64, 32), m.levels, [40, 20], 10)
+    assert set(m.__dict__.keys())-set(baked.__dict__.keys()) == {"_mipmap_dir", "_mipmap_key"}
+    assert baked.texture is not None and baked._textures == {}
+    for i in (m, baked):
+        i.update((40, 20), (0, 0), (0.85, 0.85))
+    # every pixel of the chunks is the same (the canvas of the texture map still has the texture under it)
+    drawn = pygame.surfarray.array_alpha(baked.image) > 0
+    assert drawn.sum() > 400
+    assert (pygame.surfarray.array3d(m.image)[drawn] == pygame.surfarray.array3d(baked.image)[drawn]).all()
+
+def test_dirty_rects():
+    configs = load_configs()
+    display = render((320, 240), [0, 0], 40, dirty_rects = True)
+    display.add_object("map", small_map(tempfile.mkdtemp()))
+    car = vehicle(display.size, "vehicles/"+configs["session"]["vehicle"])
+    display.add_object("main", car)
+    display.render()
+    assert display.dirty_fraction == 1 # first frame
+
+    # one moved sprite, the camera stands still (a new but equal position counts as standing still)
+    car.pos = [1, 0]
+    display.cam_pos = [0.0, 0.0]
+    display.render()
+    assert 0 < display.dirty_fraction < 1
+
+    # moving fleet cars are dirty too, without redrawing everything
+    cars = world(configs, 3, pos = [[-5, 0], [0, 5], [5, 5]])
+    cars.throttle[:] = 1
+    display.add_fleet("cars", fleet(cars, car))
+    display.render()
+    cars.step(20)
+    display.render()
+    assert 0 < display.dirty_fraction < 1
+
+    # a pan redraws everything
+    display.cam_pos = [3, 0]
+    display.render()
+    assert display.dirty_fraction == 1
+
+def test_fleet_leaves_the_shared_texture_cache_alone():
+    configs = load_configs()
+    car = vehicle((320, 240), "vehicles/"+configs["session"]["vehicle"])
+    other = vehicle((320, 240), "vehicles/"+configs["session"]["vehicle"])
+    assert other.texture is car.texture
+    capacity = car.texture.max_entries
+    f = fleet(world(configs, 3), car)
+    assert car.texture.max_entries == capacity
+    assert f.texture is not car.texture and f.texture.max_entries >= 720
+    assert f.texture.textures is car.texture.textures
+
+def test_power_curve_is_updated_with_dirty_rects():
+    configs = load_configs()
+    e = configs["engines"][configs["vehicle"]["engine"]]
+    motor = engine(e["functions"], e["limits"], e["idle_revs"], e["resistance"])
+    display = render((320, 240), [0, 0], 40, dirty_rects = True)
+    display.set_graph_scale(motor, display.size)
+    display.power_curve(motor)
+    display.update_graph(10)
+    assert display.dirty_fraction == 1 # the whole curve
+    display.update_graph(20)
+    assert display.dirty_fraction < 1 # only the rev marker
+
+def test_streamed_map():
+    folder = tempfile.mkdtemp()
+    tiles = os.path.join(folder, "tiles")
+    streamed_map.bake_tiles((64, 32), small_texture(folder), [40, 20], 10, tiles, min_mipmap = 4)
+    assert os.path.exists(os.path.join(tiles, "2", "4_2.png"))
+
+    pygame.display.set_mode((64, 32))
+    m = streamed_map((64, 32), tiles, [40, 20], 10)
+    assert m._level_amount == 3
+    # the first update only requests the chunks, they arrive on a later one
+    deadline = time.perf_counter()+5
+    while m._chunk(0, (0, 0)) is None and time.perf_counter() < deadline:
+        m.update((40, 20), (0, 0), (1.6, 1.6))
+        time.sleep(0.01)
+    chunk = m._chunk(0, (0, 0))
+    assert chunk is not None and chunk.get_size() == (16, 16)
+    # converted to the display format on the render thread
+    assert chunk.get_bitsize() == pygame.display.get_surface().get_bitsize()
+    assert tuple(chunk.get_at((0, 0)))[:3] == (0, 0, 255)
+
+    # far away chunks are thrown out again
+    m.update((40, 20), (-200, -200), (1.6, 1.6))
+    assert m._chunk(0, (0, 0)) is None
+    m.close()
+    assert not m._loader.is_alive()
+
+if __name__ == "__main__":
+    test_zooms_of_one_bucket_use_one_level()
+    test_cache_keys_levels_apart()
+    test_from_levels_like_map()
+    test_dirty_rects()
+    test_fleet_leaves_the_shared_texture_cache_alone()
+    test_power_curve_is_updated_with_dirty_rects()
+    test_streamed_map()
+    print("ok")
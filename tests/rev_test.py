@@ -1,7 +1,7 @@
 from engine import engine
 from render import render
 from datetime import datetime
-from typing import final
+from inputs import input_handler
 import threading, pygame, json
 
 # define engine
@@ -32,47 +32,8 @@ run_thread = threading.Event()
 run_thread.set()
 
 # events
-running = True
-events = {}
-binds: final = {}
-# events is the thing you should use. it saves the states of the binds, example: throttle = True. Its a simple way of seeing if your event is fulfilled
-# setup binds (flip all keys with elements, so you can find event by giving the key pressed)
-for i in config["binds"].keys():
-    binds[config["binds"][i]] = str(i)
-# setup events dict where you can read out, if an event is fulfilled (if button bound to it is pressed)
-for i in config["binds"].keys():
-    events[i] = False
-
-def run_eventhandler(events_list: list, in_async = False):
-    """**Takes a list of pygame events and sorts out the keys pressed, where the key is bound to an event and organizes them into a dictionary.**\n
-    
-    The dictionary ```binds``` holds bindings between a keyboard key and a specific event. For example the W key bound to the event of moving forward.
-    Once a key, where an event is bound to it, is pressed, the event in the "events" dictionary turns True.
-    The other way around, when you release that key, the event turns to False.\n
-    
-    **In short:** after running this method and giving it the list of pygame events, it neatly organizes the events
-    that are actually triggered in the ```events``` dictionary, where they can be easily checked by using ```events[<event>]```
-
-    Args:
-        events_list (list): List of pygame events
-        in_async (bool, optional): This is for recursion purposes only. Defaults to False.
-    """
-    global events, running
-    
-    if not in_async:
-        # restart yourself as async, so you dont hold up the rest
-        threading.Thread(target=run_eventhandler, args=(events_list, True)).start()
-    else:
-        for i in events_list:
-            # when closing window/ quitting, throw this to end mainloop
-            if i.type == pygame.QUIT: running = False
-            
-            # if key was down or up <=> if key was pressed
-            smth_happened = True if i.type == pygame.KEYDOWN or i.type == pygame.KEYUP else False
-            if smth_happened:
-                if i.__dict__["key"] in binds:
-                    # get the event you bound the key to, then set the state of event
-                    events[binds[i.__dict__["key"]]] = i.type == pygame.KEYDOWN
+# one input thread turns key presses into snapshots of the bind states, read them with inputs.consume()
+inputs = input_handler(config["binds"])
 
 # testing values
 brake = 0
@@ -81,7 +42,7 @@ now = now_second = datetime.now()
 try:
     while True:
         # if pygame window is closed, exit by using an exception, which is catched
-        if not running: raise KeyboardInterrupt
+        if not inputs.snapshot().running: raise KeyboardInterrupt
         
         # get elapsed time and add to accumulator
         elapsed = (datetime.now()-now).total_seconds()
@@ -89,6 +50,7 @@ try:
         
         # calculate physics that happened in accumulated time
         while acc >= dt:
+            events = inputs.consume().events
             # controls module
             if events["throttle_100"]:
                 motor.throttle = 1
@@ -119,8 +81,9 @@ try:
         # render frames (async)
         # render(interpol(acc / dt))
         display.update_graph(motor.revs*display.graph_scale[0])
-        run_eventhandler(display.get_events()) # hand over events to eventhandler
+        inputs.feed(display.get_events()) # hand over events to input thread
 except KeyboardInterrupt:
     # termination
     run_thread.clear()
+    inputs.close()
     pass
\ No newline at end of file
@@ -0,0 +1,70 @@
+from scheduler import scheduler
+from timing import frame_timer
+import time
+
+class fake_clock:
+    def __init__(self):
+        self.now = 0
+    def __call__(self) -> int:
+        return self.now
+
+def started(s: scheduler) -> fake_clock:
+    clock = s.clock = fake_clock()
+    s.start()
+    return clock
+
+def test_ticks_follow_the_clock():
+    s = scheduler(100)
+    clock = started(s)
+    assert s.due() == 0
+    clock.now += 25_000_000 # 2.5 ticks
+    assert s.due() == 2
+    assert abs(s.alpha()-0.5) < 1e-9
+    clock.now += 5_000_000
+    assert s.due() == 1
+    assert s.deadline() == clock.now+10_000_000 # right on a tick again
+
+def test_stall_is_capped():
+    timer = frame_timer()
+    s = scheduler(100, max_ticks = 5, max_catch_up = 0.25, timer = timer)
+    clock = started(s)
+    clock.now += 2_000_000_000 # 2 seconds stall = 200 ticks
+    assert s.due() == 5
+    assert s.skipped == 175 and timer.dropped == 175
+    # the rest of the budget runs over the next frames
+    assert s.deadline() <= clock.now
+    total = 5
+    while s.due():
+        total += 5
+    assert total == 25
+
+def test_frame_cap():
+    s = scheduler(100, max_fps = 20)
+    clock = started(s)
+    assert s.max_ticks >= 5
+    assert s.deadline() == 50_000_000
+    clock.now = 120_000_000 # late frame, the next one isnt due right away twice
+    s.due()
+    assert s.deadline() == 120_000_000
+    assert s.deadline() == 120_000_000 # asking doesnt move it
+    s.wait() # already due, returns right away
+    s.due()
+    assert s.deadline() == 170_000_000
+
+def test_wait_sleeps_until_the_deadline():
+    s = scheduler(200)
+    s.start()
+    begin = time.perf_counter_ns()
+    for i in range(10):
+        s.due()
+        s.wait()
+    elapsed = time.perf_counter_ns()-begin
+    assert 45_000_000 <= elapsed < 200_000_000
+    assert s.stats()["busy"] < 0.5
+
+if __name__ == "__main__":
+    test_ticks_follow_the_clock()
+    test_stall_is_capped()
+    test_frame_cap()
+    test_wait_sleeps_until_the_deadline()
+    print("ok")
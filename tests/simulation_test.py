@@ -0,0 +1,45 @@
+from simulation import simulation, load_configs
+import random
+
+configs = load_configs()
+binds = list(configs["config"]["binds"].keys())
+
+def random_inputs(seed: int, ticks: int) -> list[dict]:
+    rng = random.Random(seed)
+    inputs = []
+    held = {i: False for i in binds}
+    for tick in range(ticks):
+        # flip a random bind now and then
+        if rng.random() < 0.05:
+            i = rng.choice(binds)
+            held = dict(held)
+            held[i] = not held[i]
+        inputs.append(held)
+    return inputs
+
+def test_simulation_is_deterministic():
+    inputs = random_inputs(3, 3000)
+    a, b = simulation(configs), simulation(configs)
+    for i in inputs:
+        a.step(i)
+    for i in inputs:
+        b.step(i)
+    assert a.pos == b.pos
+    assert a.rotation == b.rotation
+    assert a.motor.revs == b.motor.revs
+    assert a.cam_zoom == b.cam_zoom
+
+def test_step_n_equals_single_steps():
+    inputs = {i: i in ("throttle_100", "left_50") for i in binds}
+    a, b = simulation(configs), simulation(configs)
+    a.step(inputs, 500)
+    for i in range(500):
+        b.step(inputs)
+    assert a.pos == b.pos
+    assert a.rotation == b.rotation
+    assert a.ticks == b.ticks == 500
+
+if __name__ == "__main__":
+    test_simulation_is_deterministic()
+    test_step_n_equals_single_steps()
+    print("ok")
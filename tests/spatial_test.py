@@ -0,0 +1,36 @@
+from spatial import spatial_hash
+import random, math
+
+def brute_rect(items, left, top, right, bottom):
+    return {k for k, (x, y, r) in items.items() if left-r <= x <= right+r and top-r <= y <= bottom+r}
+
+def brute_radius(items, pos, radius):
+    return {k for k, (x, y, r) in items.items() if math.hypot(x-pos[0], y-pos[1]) <= radius+r}
+
+def test_queries_match_brute_force():
+    rng = random.Random(4)
+    grid = spatial_hash(80)
+    items = {}
+    for k in range(500):
+        items[k] = (rng.uniform(-400, 400), rng.uniform(-300, 300), rng.uniform(0, 5))
+        grid.insert(k, items[k][:2], items[k][2])
+
+    for step in range(20):
+        # move everything a bit, some across cells
+        for k, (x, y, r) in items.items():
+            items[k] = (x+rng.uniform(-30, 30), y+rng.uniform(-30, 30), r)
+            grid.move(k, items[k][:2])
+        left, top = rng.uniform(-450, 300), rng.uniform(-350, 200)
+        rect = (left, top, left+rng.uniform(1, 200), top+rng.uniform(1, 150))
+        assert set(grid.query_rect(*rect)) == brute_rect(items, *rect)
+        pos, radius = (rng.uniform(-400, 400), rng.uniform(-300, 300)), rng.uniform(0, 120)
+        assert set(grid.query_radius(pos, radius)) == brute_radius(items, pos, radius)
+
+    grid.resize(25)
+    assert set(grid.query_rect(-100, -100, 100, 100)) == brute_rect(items, -100, -100, 100, 100)
+    grid.remove(0)
+    assert 0 not in grid and len(grid) == 499
+
+if __name__ == "__main__":
+    test_queries_match_brute_force()
+    print("ok")
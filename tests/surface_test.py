@@ -0,0 +1,90 @@
+from surface import surface_map, chamfer, ASPHALT, GRASS, WALL
+from simulation import simulation, load_configs
+import numpy as np
+import pygame, tempfile, os, json
+
+def test_chamfer_matches_brute_force():
+    rng = np.random.default_rng(3)
+    seeds = rng.random((30, 45)) < 0.02
+    d = chamfer(seeds)
+    ys, xs = np.nonzero(seeds)
+    for y in range(30):
+        for x in range(45):
+            dx, dy = np.abs(xs-x), np.abs(ys-y)
+            exact = (np.maximum(dx, dy)-np.minimum(dx, dy)+np.sqrt(2)*np.minimum(dx, dy)).min()
+            assert abs(d[y, x]-exact) < 1e-4
+
+def test_surface_map_from_texture():
+    folder = tempfile.mkdtemp()
+    # 40x20 pixels for 20x10 units: white grass, black road in rows 6-13, blue wall in the last 4 columns
+    image = pygame.Surface((40, 20))
+    image.fill((255, 255, 255))
+    image.fill((0, 0, 0), (0, 6, 40, 8))
+    image.fill((0, 0, 255), (36, 0, 4, 20))
+    pygame.image.save(image, os.path.join(folder, "map.png"))
+    mapdata = {"texture": "map.png", "size": [20, 10], "chunksize": 10}
+    with open(os.path.join(folder, "map.json"), "w") as f:
+        json.dump(mapdata, f)
+        f.close()
+
+    s = surface_map.load(folder, mapdata)
+    # world origin is the middle of the map
+    assert s.lookup(0, 0) == ASPHALT
+    assert s.lookup(0, -4) == GRASS
+    assert s.lookup(9.5, -4) == WALL
+    assert s.lookup(50, 0) == WALL # outside of the map
+    assert s.distance(0, 0) > 1.5 and s.distance(0, -4) < -1
+    assert s.penetration(0, 0) == 0 and s.penetration(9.8, -4) > 0
+    assert s.wheels(np.zeros(5), np.zeros(5), np.zeros(5), 2, 4).shape == (5, 4)
+
+    # second load comes from the cache files
+    cached = surface_map.load(folder, mapdata)
+    assert isinstance(cached.classes, np.memmap)
+    assert (cached.classes == s.classes).all() and (cached.boundary == s.boundary).all()
+
+def walled_map() -> surface_map:
+    # 100x100 units, 2 pixels per unit: asphalt, grass right of x = 10, a wall above y = -30
+    classes = np.full((200, 200), ASPHALT, dtype=np.uint8)
+    classes[:, 120:] = GRASS
+    classes[:40] = WALL
+    wall = classes == WALL
+    return surface_map(classes, np.zeros(classes.shape, dtype=np.float32), (chamfer(~wall)/2).astype(np.float32), [100, 100])
+
+def test_contact_matches_contacts():
+    s = walled_map()
+    rng = np.random.default_rng(5)
+    x, y, rotation = rng.uniform(-60, 60, 200), rng.uniform(-60, 60, 200), rng.uniform(0, 360, 200)
+    classes, depth = s.contacts(x, y, rotation, 2, 3)
+    assert (classes == s.wheels(x, y, rotation, 2, 3)).all()
+    for n in range(200):
+        c, d = s.contact(float(x[n]), float(y[n]), float(rotation[n]), 2, 3)
+        assert c == tuple(classes[n].tolist()) and d == depth[n]
+
+def test_grass_and_walls():
+    configs = load_configs()
+    held = {i: i == "throttle_100" for i in configs["config"]["binds"].keys()}
+    # the same run on asphalt and grass
+    speeds = []
+    for x in (0, 30):
+        sim = simulation(configs, [x, 20])
+        sim.surface = walled_map()
+        sim.step(held, 300)
+        speeds.append(sim.speed)
+    assert speeds[1] < speeds[0]
+
+    # full throttle up into the wall: stops in front of it
+    sim = simulation(configs, [0, 0])
+    sim.surface = walled_map()
+    stopped = False
+    for i in range(1000):
+        sim.step(held)
+        assert sim.wall_depth == 0 and sim.pos[1] > -31
+        stopped = stopped or (sim.speed == 0 and i > 10)
+    assert stopped
+
+if __name__ == "__main__":
+    test_chamfer_matches_brute_force()
+    test_surface_map_from_texture()
+    test_contact_matches_contacts()
+    test_grass_and_walls()
+    print("ok")
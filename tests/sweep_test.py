@@ -0,0 +1,50 @@
+from sweep import apply_overrides, grid_points, point_key, completed, sweep
+from simulation import load_configs
+import json, os, tempfile
+
+configs = load_configs()
+released = {i: False for i in configs["config"]["binds"].keys()}
+script = [(dict(released, throttle_100 = True), 50)]
+
+def test_overrides():
+    drag = configs["vehicle"]["drag"]
+    changed = apply_overrides(configs, {"engine.resistance": 0.5, "vehicle.drag": 1.5, "config.hertz": 50})
+    assert changed["engines"][changed["vehicle"]["engine"]]["resistance"] == 0.5
+    assert changed["vehicle"]["drag"] == 1.5
+    assert changed["config"]["hertz"] == 50
+    assert configs["vehicle"]["drag"] == drag # the original configs stay the same
+
+    for name in ("transmission.gears", "wheels.grip", "engine"):
+        try:
+            apply_overrides(configs, {name: 1})
+            assert False, name
+        except ValueError:
+            pass
+
+    points = grid_points({"vehicle.drag": [1, 2], "engine.resistance": [0.1, 0.2, 0.3]})
+    assert len(points) == 6
+    assert len({point_key(i) for i in points}) == 6
+
+def test_resume():
+    out = os.path.join(tempfile.mkdtemp(), "sweep.jsonl")
+    grid = {"vehicle.drag": [1, 2, 3]}
+    assert sweep(configs, grid, script, out, workers = 1) == 3
+
+    # interrupted: one point done, the next one only half written
+    with open(out, "r") as f:
+        lines = f.readlines()
+        f.close()
+    with open(out, "w") as f:
+        f.write(lines[0]+lines[1][:20])
+        f.close()
+    assert completed(out) == {json.loads(lines[0])["key"]}
+
+    assert sweep(configs, grid, script, out, workers = 1) == 2
+    assert completed(out) == {point_key(i) for i in grid_points(grid)}
+    # nothing left to run
+    assert sweep(configs, grid, script, out, workers = 1) == 0
+
+if __name__ == "__main__":
+    test_overrides()
+    test_resume()
+    print("ok")
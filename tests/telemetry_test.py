@@ -0,0 +1,55 @@
+from simulation import simulation, load_configs
+from telemetry import telemetry_recorder, load, decimation_arg
+import argparse, tempfile
+
+configs = load_configs()
+binds = list(configs["config"]["binds"].keys())
+
+def test_columns_match_the_run():
+    path = tempfile.mkdtemp()
+    # small chunks and blocks, so the files grow and the block is flushed a few times
+    telemetry = telemetry_recorder(path, 100, chunk = 1000, block = 64)
+    sim = simulation(configs)
+    held = {i: i in ("throttle_100", "left_50") for i in binds}
+    revs, xs = [], []
+    for tick in range(2500):
+        sim.step(held)
+        telemetry.sample(sim)
+        revs.append(sim.motor.revs)
+        xs.append(sim.pos[0])
+    telemetry.close()
+
+    run = load(path)
+    assert run["meta"]["samples"] == 2500
+    assert run["tick"].tolist() == list(range(1, 2501))
+    assert run["revs"].tolist() == revs
+    assert run["x"].tolist() == xs
+    assert (run["steer"] == -0.5).all()
+
+def test_decimation():
+    path = tempfile.mkdtemp()
+    telemetry = telemetry_recorder(path, 100, decimation = 10)
+    sim = simulation(configs)
+    for tick in range(95):
+        telemetry.sample(sim)
+    telemetry.close()
+    assert load(path)["tick"].tolist() == list(range(1, 95, 10))
+
+    for n in (0, -1):
+        try:
+            telemetry_recorder(tempfile.mkdtemp(), 100, decimation = n)
+            assert False, n
+        except ValueError:
+            pass
+    assert decimation_arg("3") == 3
+    for value in ("0", "-2", "1.5"):
+        try:
+            decimation_arg(value)
+            assert False, value
+        except argparse.ArgumentTypeError:
+            pass
+
+if __name__ == "__main__":
+    test_columns_match_the_run()
+    test_decimation()
+    print("ok")
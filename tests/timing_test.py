@@ -0,0 +1,83 @@
+from timing import histogram, frame_timer
+import random, time
+
+def test_percentiles_within_bucket_error():
+    rng = random.Random(7)
+    values = [int(rng.lognormvariate(9, 1)) for i in range(20000)] # microseconds, ~8 ms median
+    h = histogram()
+    for v in values:
+        h.record(v)
+    values.sort()
+    for p in (50, 95, 99):
+        exact = values[round(len(values)*p/100)-1]
+        assert abs(h.percentile(p)-exact) <= exact/64+1
+    assert h.percentile(100) == h.max == values[-1]
+
+def test_small_values_are_exact():
+    h = histogram()
+    for v in range(128):
+        h.record(v)
+    assert [i[0] for i in h.buckets()] == list(range(128))
+
+def test_ticks_per_frame():
+    timer = frame_timer()
+    timer.frame()
+    for i in range(10):
+        timer.tick(2)
+        timer.frame()
+    timer.drop(3)
+    s = timer.stats()
+    assert s["frames"] == 10
+    assert s["ticks_per_frame"] == 2
+    assert s["dropped_ticks"] == 3
+
+def test_interval():
+    timer = frame_timer()
+    timer.frame()
+    for i in range(10):
+        timer.frame()
+    timer.frames.record(50000) # one slow frame, 50 ms
+    timer.interval_frames.record(50000)
+    assert timer.interval()["p99"] == timer.stats()["p99"] == 50
+    # the next interval doesnt see the slow frame anymore, the whole run does
+    for i in range(10):
+        timer.frame()
+    s = timer.interval()
+    assert s["frames"] == 10 and s["max"] < 50
+    assert timer.stats()["max"] == 50
+
+def test_skipped_frames_arent_frame_time():
+    timer = frame_timer()
+    timer.frame()
+    timer.frame()
+    timer.tick(3)
+    timer.skip()
+    time.sleep(0.05) # nothing drawn for a while
+    timer.frame()
+    timer.frame()
+    s = timer.stats()
+    assert s["frames"] == 2 and s["max"] < 50
+    assert s["skipped_frames"] == 1
+    assert timer.ticks == 3
+    assert timer.interval()["skipped_frames"] == 1
+    assert timer.interval()["skipped_frames"] == 0
+
+    # a measured fps stays while standing still
+    timer = frame_timer(fps_window = 0.01)
+    timer.frame()
+    time.sleep(0.02)
+    timer.frame()
+    fps = timer.fps
+    assert fps > 0
+    timer.skip()
+    timer.skip()
+    assert timer.fps == fps
+    assert "0 frames (2 not drawn)" not in timer.report() and "1 frames (2 not drawn)" in timer.report()
+
+if __name__ == "__main__":
+    test_percentiles_within_bucket_error()
+    test_small_values_are_exact()
+    test_ticks_per_frame()
+    test_interval()
+    test_skipped_frames_arent_frame_time()
+    print("ok")
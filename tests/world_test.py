@@ -0,0 +1,63 @@
+from simulation import simulation, load_configs
+from world import world
+from surface import surface_map, chamfer, ASPHALT, GRASS, WALL
+import numpy as np
+import random
+
+configs = load_configs()
+binds = list(configs["config"]["binds"].keys())
+
+def walled_map() -> surface_map:
+    # 100x100 units: asphalt, grass right of x = 10, a wall above y = -30
+    classes = np.full((200, 200), ASPHALT, dtype=np.uint8)
+    classes[:, 120:] = GRASS
+    classes[:40] = WALL
+    wall = classes == WALL
+    return surface_map(classes, np.zeros(classes.shape, dtype=np.float32), (chamfer(~wall)/2).astype(np.float32), [100, 100])
+
+def test_world_moves_like_simulation(surface = None):
+    rng = random.Random(11)
+    count = 8
+    pos = [[n*6-20, -26+n] for n in range(count)]
+    sims = [simulation(configs, pos[n]) for n in range(count)]
+    cars = world(configs, count, pos = pos)
+    for i in sims+[cars]:
+        i.surface = surface
+    held = [{i: False for i in binds} for n in range(count)]
+    for tick in range(3000):
+        for n in range(count):
+            if rng.random() < 0.03:
+                i = rng.choice(binds)
+                held[n] = dict(held[n], **{i: not held[n][i]})
+            cars.set_inputs(n, held[n])
+            sims[n].step(held[n])
+        cars.step()
+
+    for n in range(count):
+        assert abs(cars.x[n]-sims[n].pos[0]) < 1e-6
+        assert abs(cars.y[n]-sims[n].pos[1]) < 1e-6
+        assert abs(cars.rotation[n]-sims[n].rotation) < 1e-6
+        assert abs(cars.engines.revs[n]-sims[n].motor.revs) < 1e-6
+        if surface is not None:
+            assert cars.wheels[n].tolist() == list(sims[n].wheels)
+
+def test_world_on_surface_like_simulation():
+    test_world_moves_like_simulation(walled_map())
+
+def test_step_n_equals_n_steps():
+    a, b = world(configs, 4), world(configs, 4)
+    for w in (a, b):
+        w.throttle[:] = [1, 0.5, 0, 0]
+        w.brake[:] = [0, 0, 1, 0]
+        w.steer[:] = [-1, 0.5, 0, 1]
+    a.step(250)
+    for i in range(250):
+        b.step()
+    assert (a.x == b.x).all() and (a.y == b.y).all() and (a.rotation == b.rotation).all()
+    assert (a.prev_x == b.prev_x).all()
+
+if __name__ == "__main__":
+    test_world_moves_like_simulation()
+    test_world_on_surface_like_simulation()
+    test_step_n_equals_n_steps()
+    print("ok")
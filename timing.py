@@ -0,0 +1,177 @@
+from array import array
+import json, time
+
+class histogram:
+    def __init__(self, sub_bits = 7, max_bits = 40):
+        """**Counts values in log-linear buckets (like HdrHistogram), for percentiles with a fixed relative error.**\n
+
+        Every power of two is split into ```2**(sub_bits-1)``` linear sub buckets, so a value is off by less than ```1/2**(sub_bits-1)```
+        (under 1.6% with the default) no matter if it is a few microseconds or seconds. Values below ```2**sub_bits``` are exact.
+        The counts live in one preallocated array, recording a value doesnt allocate.
+
+        Args:
+            sub_bits (int, optional): precision, see above. Defaults to 7.
+            max_bits (int, optional): values up to ```2**max_bits``` are recorded, bigger ones are counted as the biggest. Defaults to 40.
+        """
+        self.sub_bits = sub_bits
+        self._half = 1 << (sub_bits-1)
+        self._max = (1 << max_bits)-1
+        self.counts = array("Q", bytes(8*self._index(self._max)+8))
+        self.total = 0
+        self.max = 0
+        self.sum = 0
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length()-self.sub_bits
+        if shift <= 0:
+            return value
+        return shift*self._half+(value >> shift)
+
+    def _upper(self, index: int) -> int:
+        """Highest value that lands in a bucket."""
+        if index < 2*self._half:
+            return index
+        shift = index//self._half-1
+        return ((index-shift*self._half+1) << shift)-1
+
+    def record(self, value: int):
+        if value > self._max: value = self._max
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum += value
+        if value > self.max: self.max = value
+
+    def percentile(self, p: float) -> int:
+        """Value that ```p``` percent of all recorded values are smaller than or equal to (0 when empty)."""
+        if not self.total:
+            return 0
+        rank = max(1, round(self.total*p/100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def buckets(self) -> list[tuple]:
+        """Not empty buckets as ```(highest value, count)```."""
+        return [(self._upper(i), c) for i, c in enumerate(self.counts) if c]
+
+    def reset(self):
+        self.counts[:] = array("Q", bytes(8*len(self.counts)))
+        self.total = self.max = self.sum = 0
+
+class frame_timer:
+    def __init__(self, fps_window = 0.5):
+        """**Frame times on a monotonic clock (```perf_counter_ns```), kept in a histogram of microseconds.**\n
+
+        Call ```frame``` once per rendered frame. The time since the previous call is recorded, so a single slow frame
+        shows up in p99 and max instead of vanishing in an average. Physics ticks calculated and dropped in between frames are counted as well.
+        ```stats``` covers every frame since the start (or ```reset```), ```interval``` only the frames since it was called last.
+
+        Args:
+            fps_window (float, optional): seconds the ```fps``` value is counted over. Defaults to 0.5.
+        """
+        self.frames = histogram()
+        self.interval_frames = histogram() # frames since the last call of interval
+        self._interval_skipped = 0
+        self.ticks = 0 # physics ticks calculated
+        self.max_ticks = 0 # most physics ticks in one frame
+        self.dropped = 0 # physics ticks skipped to catch up
+        self.skipped = 0 # frames not drawn because nothing changed
+        self.fps = 0
+
+        self._pending = 0 # ticks since the last frame
+        self._last = None
+        self._window = int(fps_window*1e9)
+        self._window_begin = None
+        self._window_frames = 0
+
+    def tick(self, n = 1):
+        """Counts physics ticks calculated for the next frame."""
+        self._pending += n
+
+    def drop(self, n = 1):
+        """Counts physics ticks that were skipped."""
+        self.dropped += n
+
+    def frame(self, ticks = 0):
+        """Ends a frame. ```ticks``` are added to the ticks counted with ```tick```."""
+        now = time.perf_counter_ns()
+        ticks += self._pending
+        self._pending = 0
+        if self._last is None:
+            self._window_begin = now
+        else:
+            us = (now-self._last)//1000
+            self.frames.record(us)
+            self.interval_frames.record(us)
+            self.ticks += ticks
+            if ticks > self.max_ticks: self.max_ticks = ticks
+
+            self._window_frames += 1
+            elapsed = now-self._window_begin
+            if elapsed >= self._window:
+                self.fps = round(self._window_frames*1e9/elapsed, 1)
+                self._window_frames = 0
+                self._window_begin = now
+        self._last = now
+
+    def skip(self):
+        """A frame that isnt drawn because nothing changed. It is counted on its own, the time until the next drawn frame isnt counted as frame time
+        and ```fps``` keeps the value of the last drawn frames."""
+        self.ticks += self._pending
+        self._pending = 0
+        self.skipped += 1
+        self._interval_skipped += 1
+        self._last = None
+        self._window_frames = 0
+
+    def stats(self) -> dict:
+        """Frame times in milliseconds and tick counts.
+
+        Returns:
+            dict: ```{"frames", "skipped_frames", "mean", "p50", "p95", "p99", "max", "ticks_per_frame", "max_ticks_per_frame", "dropped_ticks"}```
+        """
+        h = self.frames
+        return {
+            "frames": h.total,
+            "skipped_frames": self.skipped,
+            "mean": h.sum/h.total/1000 if h.total else 0,
+            "p50": h.percentile(50)/1000,
+            "p95": h.percentile(95)/1000,
+            "p99": h.percentile(99)/1000,
+            "max": h.max/1000,
+            "ticks_per_frame": self.ticks/h.total if h.total else 0,
+            "max_ticks_per_frame": self.max_ticks,
+            "dropped_ticks": self.dropped,
+        }
+
+    def interval(self) -> dict:
+        """Frame times in milliseconds of the frames since the last call, then starts a new interval.
+
+        Returns:
+            dict: ```{"frames", "skipped_frames", "p50", "p99", "max"}```
+        """
+        h = self.interval_frames
+        s = {"frames": h.total, "skipped_frames": self._interval_skipped, "p50": h.percentile(50)/1000, "p99": h.percentile(99)/1000, "max": h.max/1000}
+        h.reset()
+        self._interval_skipped = 0
+        return s
+
+    def report(self) -> str:
+        s = self.stats()
+        return (str(s["frames"])+" frames ("+str(s["skipped_frames"])+" not drawn), frame time p50 "+format(s["p50"], ".2f")+" p95 "+format(s["p95"], ".2f")+" p99 "+format(s["p99"], ".2f")
+                +" max "+format(s["max"], ".2f")+" ms, "+format(s["ticks_per_frame"], ".2f")+" ticks/frame, "+str(s["dropped_ticks"])+" dropped")
+
+    def export(self, path: str):
+        """Saves the stats and the not empty buckets of the histogram (microseconds, count) as json."""
+        with open(path, "w") as f:
+            json.dump(dict(self.stats(), histogram_us=self.frames.buckets()), f, indent=4)
+            f.close()
+
+    def reset(self):
+        """Starts counting again, the next frame is measured from the last one."""
+        self.frames.reset()
+        self.interval_frames.reset()
+        self.ticks = self.max_ticks = self.dropped = self.skipped = self._interval_skipped = 0
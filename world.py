@@ -0,0 +1,151 @@
+from engine_bank import engine_bank
+from simulation import controls
+from physics import physics
+import numpy as np
+
+class world:
+    def __init__(self, configs: dict, count: int, engines = None, pos = None, rotation = None):
+        """**Many vehicles in one simulation, stored as arrays (one value per vehicle) and moved all at once.**\n
+
+        Does the same as ```simulation.step``` for every vehicle, but with numpy: one ```engine_bank``` holds the engines,
+        positions, rotations, speeds and controls are arrays. The vehicle values (mass, drag, ...) and the amount of sub-steps come from a ```physics``` object. Stepping costs about the same for one or hundreds of vehicles,
+        so AI or replay cars can drive along the player.
+
+        Controls are set per vehicle in ```throttle```, ```brake``` and ```steer``` (see ```simulation.controls```), or from a dict of bind states with ```set_inputs```.
+        With a ```surface``` the surface under the wheels and walls work like in ```simulation.step```.
+
+        Args:
+            configs (dict): configs from ```load_configs```
+            count (int): amount of vehicles
+            engines (list[str], optional): engine name of every vehicle. Defaults to the engine of the session vehicle for all.
+            pos (array, optional): start positions, shape ```(count, 2)```. Defaults to [0, 0] for all.
+            rotation (array, optional): start rotations in degrees. Defaults to 0 for all.
+        """
+        self.configs = configs
+        self.count = count
+        self.hz = configs["config"]["hertz"]
+        self.dt = 1/self.hz
+
+        # engines
+        if engines is None:
+            engines = [configs["vehicle"]["engine"]]*count
+        self.engines = engine_bank.from_config(configs["engines"], engines)
+
+        # vehicle state
+        pos = np.zeros((count, 2)) if pos is None else np.asarray(pos, dtype=float)
+        self.x = pos[:, 0].copy()
+        self.y = pos[:, 1].copy()
+        self.rotation = np.zeros(count) if rotation is None else np.array(rotation, dtype=float)
+        self.speed = np.zeros(count) # m/s, negative = reversing
+        self.ticks = 0
+
+        # controls
+        self.throttle = np.zeros(count)
+        self.brake = np.zeros(count)
+        self.steer = np.zeros(count)
+
+        # vehicle values, same for every vehicle
+        self.physics = physics(configs["vehicle"], configs["tires"].get(configs["session"].get("tires")), configs["config"].get("substeps", 4))
+        self.brakeforce = 0.27 # engine resistance when braking, like simulation
+
+        # surface_map of the map, see simulation.surface
+        self.surface = None
+        self.wheels = None # surface classes under the wheels, shape (count, 4)
+        self.wall_depth = None # how deep the deepest wheel of every vehicle is inside of a wall
+
+        # state before the last tick, so the renderer can interpolate in between
+        self.prev_x = self.x.copy()
+        self.prev_y = self.y.copy()
+        self.prev_rotation = self.rotation.copy()
+
+    def set_inputs(self, index: int, inputs: dict):
+        """Sets the controls of one vehicle from the states of the binds, like ```simulation.step``` gets them."""
+        self.throttle[index], self.brake[index], self.steer[index] = controls(inputs)
+
+    def step(self, n = 1):
+        """Calculates the next n physics ticks of all vehicles with their current controls.
+
+        Args:
+            n (int, optional): amount of ticks to calculate. Defaults to 1.
+        """
+        engines = self.engines
+        throttle, brake = self.throttle, self.brake
+        engines.throttle = throttle
+        resistance = 0.9+self.brakeforce*brake
+        p = self.physics
+        h = self.dt/p.substeps
+        mass, drag, rolling, max_lateral = p.mass, p.drag, p.rolling_force, p.max_lateral
+        braking = p.brake_force*brake
+        surface = self.surface
+        if surface is not None:
+            width, length = self.configs["vehicle"]["axle_width"], self.configs["vehicle"]["wheelbase"]
+            grip_of, rolling_of = np.array(surface.grip), np.array(surface.rolling)
+            if self.wheels is None:
+                self.wheels, self.wall_depth = surface.contacts(self.x, self.y, self.rotation, width, length)
+        reverse = np.where((brake > 0) & (throttle == 0), -p.reverse_force*brake, 0.0)
+        reverse_limit = -p.reverse_speed*brake
+        curvature = np.tan(self.steer*p.steering_lock)/p.wheelbase
+        x, y, rotation, speed = self.x, self.y, self.rotation, self.speed
+
+        for i in range(n):
+            self.prev_x[:] = x
+            self.prev_y[:] = y
+            self.prev_rotation[:] = rotation
+
+            # engine calculations
+            engines.update_revs(resistance)
+            drive = engines.torque*p.torque_to_force
+            limit = engines.revs*p.revs_to_speed
+            if surface is not None:
+                # surface under the wheels, like physics.surface_grip and surface_rolling
+                grip = grip_of[self.wheels].mean(axis=1)
+                rolling = p.rolling_force*rolling_of[self.wheels].mean(axis=1)
+                max_lateral = p.max_lateral*grip
+                braking = p.brake_force*brake*grip
+
+            # same sub-steps as physics.step, for all vehicles at once
+            for s in range(p.substeps):
+                force = np.where((drive != 0) & (speed < limit), drive, np.where((reverse != 0) & (speed <= 0) & (speed > reverse_limit), reverse, 0.0))
+                resist = np.where(speed > 0, drag*speed*speed+rolling+braking, np.where(speed < 0, -drag*speed*speed-rolling, 0.0))
+                v = speed+(force-resist)*h/mass
+                v[((speed > 0) & (v < 0) & (force >= 0)) | ((speed < 0) & (v > 0) & (force <= 0))] = 0
+                speed = v
+
+                yaw = speed*curvature
+                slipping = np.abs(yaw*speed) > max_lateral
+                if slipping.any():
+                    yaw[slipping] = np.copysign((max_lateral if surface is None else max_lateral[slipping])/np.abs(speed[slipping]), yaw[slipping])
+                rotation += np.degrees(yaw*h)
+                direction = np.radians(rotation-90)
+                x += speed*h*np.cos(direction)
+                y += speed*h*np.sin(direction)
+            rotation %= 360
+
+            if surface is not None:
+                wheels, depth = surface.contacts(x, y, rotation, width, length)
+                hit = depth > self.wall_depth
+                if hit.any():
+                    # drove (deeper) into a wall: stay where they were, the speed into the wall is gone
+                    x[hit], y[hit], rotation[hit], speed[hit] = self.prev_x[hit], self.prev_y[hit], self.prev_rotation[hit], 0
+                    wheels[hit], depth[hit] = self.wheels[hit], self.wall_depth[hit]
+                self.wheels, self.wall_depth = wheels, depth
+
+        self.speed = speed
+        self.ticks += n
+
+    def interpolated(self, alpha: float) -> tuple:
+        """Positions and rotations of all vehicles in between the previous and current physics tick.
+
+        Args:
+            alpha (float): 0 = previous state, 1 = current state
+
+        Returns:
+            tuple: x, y and rotation arrays
+        """
+        if alpha == 1:
+            return self.x, self.y, self.rotation
+        # rotate the short way around, 359 -> 1 goes over 0
+        turn = (self.rotation-self.prev_rotation+180) % 360 - 180
+        return (self.prev_x+(self.x-self.prev_x)*alpha,
+                self.prev_y+(self.y-self.prev_y)*alpha,
+                (self.prev_rotation+turn*alpha) % 360)